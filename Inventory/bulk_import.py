@@ -0,0 +1,139 @@
+import csv
+import sys
+import datetime as dt
+import threading
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+
+# nonce_manager lives at the repository root and is shared with app.py
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+import nonce_manager
+
+# Bulk product import for the inventory contract.  A CSV is read row by row,
+# each row is validated, and valid rows are sent as registerProduct
+# transactions with nonces handed out by nonce_manager, so the next transaction
+# goes out without waiting for the previous one to be mined.  At most `window`
+# transactions are in flight at a time; receipts are collected concurrently
+# and every row ends up in a per-row report.
+#
+# CSV columns: product_name, product_type, product_cost, product_location,
+# product_count, token_uri and optionally upload_date (defaults to today)
+
+REQUIRED_COLUMNS = ["product_name", "product_type", "product_cost", "product_location", "product_count", "token_uri"]
+PRODUCT_TYPES = ['Diapers', 'Food']
+
+# row outcomes
+INVALID = "invalid"
+MINED = "mined"
+REVERTED = "reverted"
+FAILED = "failed"
+
+
+def today():
+    return dt.date.today().strftime('%m/%d/%Y')
+
+
+# Yields (line number, row) from a text stream without reading it all first
+def read_rows(stream):
+    reader = csv.DictReader(stream)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"CSV is missing columns: {', '.join(missing)}")
+    for row in reader:
+        # line 1 is the header
+        yield reader.line_num, row
+
+
+# registerProduct arguments (without the owner) for a CSV row, raises ValueError
+def parse_row(row):
+    name = (row.get("product_name") or "").strip()
+    product_type = (row.get("product_type") or "").strip()
+    location = (row.get("product_location") or "").strip()
+    if not name:
+        raise ValueError("product_name is empty")
+    if product_type not in PRODUCT_TYPES:
+        raise ValueError(f"product_type must be one of {', '.join(PRODUCT_TYPES)}")
+    if not location:
+        raise ValueError("product_location is empty")
+    try:
+        cost = Decimal(row.get("product_cost").strip())
+        count = Decimal(row.get("product_count").strip())
+    except (AttributeError, InvalidOperation):
+        raise ValueError("product_cost and product_count must be numbers")
+    # the contract stores whole units, "12.0" is fine but "12.5" would be truncated
+    if not (cost.is_finite() and count.is_finite()) or cost % 1 or count % 1:
+        raise ValueError("product_cost and product_count must be whole numbers")
+    cost, count = int(cost), int(count)
+    if cost < 0:
+        raise ValueError("product_cost is negative")
+    if count <= 0:
+        raise ValueError("product_count must be at least 1")
+    upload_date = (row.get("upload_date") or "").strip() or today()
+    return name, product_type, cost, location, count, upload_date, (row.get("token_uri") or "").strip()
+
+
+class BulkImporter:
+    def __init__(self, w3, contract, sender, window=32, max_workers=8, timeout=600, nonces=None):
+        self.w3 = w3
+        self.contract = contract
+        self.sender = sender
+        self.window = threading.BoundedSemaphore(window)
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.nonces = nonces or nonce_manager.NonceManager(w3)
+
+    # Signed by the node (the sender is an unlocked account).  An "already
+    # known" error is not retried: the node holds a transaction with this nonce
+    # and resending the row under a new one would register the product twice
+    def _send(self, args):
+        fn = self.contract.functions.registerProduct(self.sender, *args)
+        return self.nonces.send_transaction(fn, self.sender)
+
+    def _wait(self, result):
+        try:
+            receipt = self.w3.eth.wait_for_transaction_receipt(result["tx_hash"], timeout=self.timeout)
+            result["status"] = MINED if receipt.get("status", 1) else REVERTED
+            result["block"] = receipt["blockNumber"]
+            result["gas_used"] = receipt["gasUsed"]
+        except Exception as e:
+            result["status"] = FAILED
+            result["error"] = str(e)
+        finally:
+            self.window.release()
+
+    # Imports every row of `rows` (from read_rows) and returns one result dict per
+    # row.  `progress(results)` is called after each row is sent or rejected
+    def run(self, rows, progress=None):
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for line, row in rows:
+                result = {
+                    "line": line, "product_name": row.get("product_name"), "status": None,
+                    "tx_hash": None, "block": None, "gas_used": None, "error": None,
+                }
+                results.append(result)
+                try:
+                    args = parse_row(row)
+                except ValueError as e:
+                    result["status"] = INVALID
+                    result["error"] = str(e)
+                else:
+                    # blocks while `window` transactions are still unmined
+                    self.window.acquire()
+                    try:
+                        result["tx_hash"] = self._send(args).hex()
+                    except Exception as e:
+                        self.window.release()
+                        result["status"] = FAILED
+                        result["error"] = str(e)
+                    else:
+                        pool.submit(self._wait, result)
+                if progress is not None:
+                    progress(results)
+        return results
+
+
+def report_frame(results):
+    return pd.DataFrame(results, columns=["line", "product_name", "status", "tx_hash", "block", "gas_used", "error"])
@@ -1,10 +1,11 @@
 import os
+import io
 import json
 from web3 import Web3
 from pathlib import Path
 from dotenv import load_dotenv
-import datetime as dt
 import streamlit as st
+import bulk_import
 
 load_dotenv()
 
@@ -13,8 +14,11 @@ st.sidebar.title("Community Connect App")
 #  Define and connect a new web3 provider
 w3 = Web3(Web3.HTTPProvider(os.getenv("WEB3_PROVIDER_URI")))
 
+# st.cache_resource is Streamlit 1.18+, older releases only have st.cache
+cache_resource = getattr(st, 'cache_resource', None) or st.cache(allow_output_mutation=True)
+
 # Cache the contract to tell Streamlit to load this contract only one time, regardless of other changes
-@st.cache(allow_output_mutation=True)
+@cache_resource
 def load_contract():
     # Load the contract's ABI details
     with open(Path('product_abi.json')) as f:
@@ -37,30 +41,58 @@ contract = load_contract()
 # Allow users to give pieces of information.  1-Select an account for the contract owner from a list of accounts.  2-Amount to donate
 
 accounts = w3.eth.accounts
+mode = st.sidebar.radio('', options=['Add a Product', 'Bulk CSV Import'])
 owner_address = st.selectbox('Select an address to register a product from', options=accounts)
-product_name = st.text_input('What is the name of the product you want to add?')
-productType = st.selectbox(label = 'Product Type', options = ['Diapers', 'Food'])
-productCost = st.number_input('Enter the cost of the product')
-productLocation = st.text_input('What is the location (address) of the product?')
-productCount = st.number_input('What is the quantity of items you are adding?')
-uploadDate = '11/21/2022'
-TokenURI = st.text_input('Input product URI')
-
-
-if st.button("Add product"):
-    tx_hash = contract.functions.registerProduct(
-        product_name,
-        productType,
-        int(productCost),
-        productLocation,
-        int(productCount),
-        uploadDate,
-        TokenURI
-    ).transact({'from' : owner_address})
-    # Display the information on the webpage
-    receipt = w3.eth.waitForTransactionReceipt(tx_hash)
-    st.write("Transaction receipt mined:")
-    st.write(dict(receipt))
+
+if mode == 'Add a Product':
+    product_name = st.text_input('What is the name of the product you want to add?')
+    productType = st.selectbox(label = 'Product Type', options = bulk_import.PRODUCT_TYPES)
+    productCost = st.number_input('Enter the cost of the product')
+    productLocation = st.text_input('What is the location (address) of the product?')
+    productCount = st.number_input('What is the quantity of items you are adding?')
+    uploadDate = bulk_import.today()
+    TokenURI = st.text_input('Input product URI')
+
+
+    if st.button("Add product"):
+        tx_hash = contract.functions.registerProduct(
+            owner_address,
+            product_name,
+            productType,
+            int(productCost),
+            productLocation,
+            int(productCount),
+            uploadDate,
+            TokenURI
+        ).transact({'from' : owner_address})
+        # Display the information on the webpage
+        receipt = w3.eth.waitForTransactionReceipt(tx_hash)
+        st.write("Transaction receipt mined:")
+        st.write(dict(receipt))
+
+# Registers every row of a CSV, with many transactions in flight at once
+else:
+    st.markdown(f"CSV columns: `{', '.join(bulk_import.REQUIRED_COLUMNS)}` and optionally `upload_date` (defaults to today)")
+    uploaded = st.file_uploader('Product CSV', type=['csv'])
+    window = st.slider('Transactions in flight', min_value=1, max_value=128, value=32)
+
+    if uploaded is not None and st.button("Import products"):
+        importer = bulk_import.BulkImporter(w3, contract, owner_address, window=window)
+        status = st.empty()
+
+        def progress(results):
+            status.write(f'{len(results)} rows read')
+
+        try:
+            results = importer.run(bulk_import.read_rows(io.TextIOWrapper(uploaded, encoding='utf-8-sig')), progress)
+        except ValueError as e:
+            st.error(str(e))
+        else:
+            report = bulk_import.report_frame(results)
+            counts = report['status'].value_counts().to_dict()
+            status.write(', '.join(f'{count} {outcome}' for outcome, count in counts.items()))
+            st.write(report)
+            st.download_button('Download import report', report.to_csv(index=False), file_name='import_report.csv')
 
     
     
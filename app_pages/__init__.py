@@ -0,0 +1,17 @@
+import importlib
+
+# Sidebar label -> page module.  Modules are imported the first time their page
+# is opened, so a rerun only pays for the page that is actually shown
+PAGES = {
+    'Currency Converter': 'converter',
+    'Make a Donation': 'donation',
+    'Request for Goods': 'goods',
+    'Request for Cash Assistance': 'cash',
+    'Get Balances': 'balances',
+    'View Contract Ledger': 'ledger',
+    'Ledger Analytics': 'analytics',
+}
+
+
+def load_page(label):
+    return importlib.import_module(f'app_pages.{PAGES[label]}')
@@ -0,0 +1,67 @@
+import pandas as pd
+import streamlit as st
+import singleton_requests
+from ipfs import retrieve_ledger_since
+from app_pages.common import contract, views, load_event_indexer, load_ledger_analytics
+
+# Folds ledger rows published since the last visit into the shared aggregates,
+# naming and ordering each transaction by the event it emitted.  Only the
+# segments pinned after the last head folded in are read
+def sync_analytics():
+    analytics = load_ledger_analytics()
+    ipfsHash = views.call(contract.functions.getIPFSHash())
+    if ipfsHash != '' and ipfsHash != analytics.head:
+        new_df = analytics.unseen(retrieve_ledger_since(ipfsHash, analytics.head))
+        if not new_df.empty:
+            indexer = load_event_indexer()
+            indexer.sync(views.block_number())
+            analytics.add(new_df, indexer.events_for(new_df.index), indexer.positions_for(new_df.index))
+        analytics.head = ipfsHash
+    return analytics
+
+RECENT_ROWS = 50
+
+# Newest transactions recorded by this server.  The session keeps its table and
+# the receipt buffer sequence number it has seen, so a rerun only reads the
+# rows appended since the previous one
+def recent_activity():
+    recent_df = st.session_state.get('recent_activity')
+    new_df, seq = singleton_requests.get_receipts_df(
+        since=st.session_state.get('recent_activity_seq'), limit=RECENT_ROWS
+    )
+    if recent_df is None:
+        recent_df = new_df
+    elif not new_df.empty:
+        recent_df = pd.concat([new_df, recent_df]).head(RECENT_ROWS)
+    st.session_state['recent_activity'] = recent_df
+    st.session_state['recent_activity_seq'] = seq
+    return recent_df
+
+# Dashboard of donation flow, gas spend and per-address totals
+def render():
+    st.header('Ledger Analytics')
+    analytics = sync_analytics()
+    if not len(analytics):
+        st.write('No transactions to display yet')
+        return
+    st.caption(f'{len(analytics)} transactions')
+
+    daily_df = analytics.daily_frame()
+    st.subheader('Daily Donations and Payouts (ETH)')
+    st.line_chart(daily_df[['Donations (ETH)', 'Payouts (ETH)']])
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader('Gas by Function')
+        function_df = analytics.function_frame()
+        st.bar_chart(function_df['Gas'])
+        st.write(function_df)
+    with col2:
+        st.subheader('Daily Gas')
+        st.bar_chart(daily_df['Gas'])
+
+    st.subheader('Totals by Address')
+    st.write(analytics.address_frame())
+
+    st.subheader('Recent Activity')
+    st.write(recent_activity())
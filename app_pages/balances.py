@@ -0,0 +1,73 @@
+from pathlib import Path
+import streamlit as st
+from PIL import Image
+import price_oracle
+from app_pages.common import w3, contract, get_accounts, views, cache_resource
+
+# Decoded once per process instead of on every rerun
+@cache_resource
+def load_image(name):
+    return Image.open(Path('./Resources', name)).copy()
+
+# Account and contract balances in wei, ether and USD
+def render():
+    accounts = get_accounts()
+    st.header('Get Balances')
+    # getBalance function and app.py
+
+    with st.form("viewBalances", clear_on_submit=True):
+        # Here we allow the user to view any account balance in the contract with a selectbox
+        # and display it in wei, ether, and USD
+        accountowners = st.selectbox('Select account to Check Balance', options=accounts)
+        submitted = st.form_submit_button("Get Balance")
+        if submitted:
+            tx_hash = w3.eth.get_balance(accountowners)
+            wei = round(tx_hash,2) 
+            eth = w3.fromWei(wei, "ether")
+            eth_usd = price_oracle.get_eth_usd()
+            usd_balance = float(eth_usd)*float(eth)
+            st.write(f"This account has a balance of **{tx_hash:,.2f} WEI:**")
+
+            st.write(f"**{eth:,.2f} ETHER** or **${usd_balance:,.2f} USD**.")
+
+    # Here we incorporate graphics to illustrate the movement of money between accounts
+    # preselected as supplier, donor, recipient and contract.  Their balances are
+    # read through the view cache, so reruns within a block cost no RPC
+    col1, col2 = st.columns(2)
+    with col1:
+        st.image(load_image('Donor.png'))
+        donor_balance = views.balance(accounts[0])
+        wei = round(donor_balance,2) 
+        eth = w3.fromWei(wei, "ether")
+        eth_usd = price_oracle.get_eth_usd()
+        usd_balance = int(eth_usd)*int(eth)
+        st.write(f"This account has a balance of **{donor_balance:,.2f} WEI:**")
+        st.write(f"**{eth:,.2f} ETHER** or **${usd_balance:,.2f} USD**.")
+
+        st.image(load_image('Contract.png'))
+        contractBalance = views.balance(contract.address)
+        wei = round(contractBalance,2) 
+        eth = w3.fromWei(wei, "ether")
+        eth_usd = price_oracle.get_eth_usd()
+        usd_balance = float(eth_usd)*float(eth)
+        st.write(f"This account has a balance of **{contractBalance:,.2f} WEI:**")
+        st.write(f"**{eth:,.2f} ETHER** or **${usd_balance:,.2f} USD**.")
+
+    with col2:
+        st.image(load_image('Recipient.png'))
+        recipientBalance = views.balance(accounts[5])
+        wei = round(recipientBalance,2) 
+        eth = w3.fromWei(wei, "ether")
+        eth_usd = price_oracle.get_eth_usd()
+        usd_balance = float(eth_usd)*float(eth)
+        st.write(f"This account has a balance of **{recipientBalance:,.2f} WEI:**")
+        st.write(f"**{eth:,.2f} ETHER** or **${usd_balance:,.2f} USD**.")
+
+        st.image(load_image('Supplier.png'))
+        supplierBalance = views.balance(accounts[4])
+        wei = round(supplierBalance,2) 
+        eth = w3.fromWei(wei, "ether")
+        eth_usd = price_oracle.get_eth_usd()
+        usd_balance = float(eth_usd)*float(eth)
+        st.write(f"This account has a balance of **{supplierBalance:,.2f} WEI:**")
+        st.write(f"**{eth:,.2f} ETHER** or **${usd_balance:,.2f} USD**.")
@@ -0,0 +1,58 @@
+import streamlit as st
+from app_pages.common import contract, get_accounts, usdToWei, weiToUSD, record_transaction, choose_request
+
+# Cash assistance workflow: recipient request and non-profit approval
+def render():
+    accounts = get_accounts()
+    nonprofit = accounts[3]
+
+    st.header('Request for Cash Assistance')
+    cash_options = st.sidebar.radio('', options=['1 - Submit Request for Cash', '2 - Review Cash Request'])
+
+    # Authorized recipient can make a request for cash below
+    if cash_options == '1 - Submit Request for Cash':
+        with st.form("cash request", clear_on_submit=True):
+
+            recipient = st.selectbox('Provide Your Public Address', options=accounts[5:6])  # Currently only first hash listed is the only authorizedRecipient in our smart contract
+            amount = st.number_input('Provide Amount Needed')
+            amount = int(amount)
+            amount = usdToWei(amount)
+            address = st.selectbox('Your request will be fulfilled by:', [nonprofit])
+
+            submitted = st.form_submit_button("Request for Cash Assistance")
+            if submitted:
+                tx_hash = contract.functions.requestCash(recipient, amount).transact({
+                    'from': nonprofit,
+                })
+                # Hand the transaction to the background manager, the ledger row is
+                # recorded and published to IPFS once it is mined
+                record_transaction(tx_hash, 'Cash Request')
+
+
+    # Non-profit can view open cash requests and approve or deny... if approved
+    # the cash is immediately deployed to the recipient
+    if cash_options == '2 - Review Cash Request':
+        
+        st.subheader("Open Cash Request Sent for Approval")
+
+        selected = choose_request(contract.functions.viewCashRequests, ['open'], 'cash')
+        if selected is not None:
+            cashRequestId = selected[0]
+            request = selected[1:]
+            with st.form("viewCashInvoice", clear_on_submit=True):
+
+                cashRequested = int(f'{request[1]}')
+                cashRequested = weiToUSD(cashRequested)
+                st.markdown(f'**Requestor Address:**   {request[0]}')
+                st.markdown(f'**Amount Requested:**   {cashRequested}')
+                st.markdown(f'**Cash request status:** {request[2]}')
+                
+                submitted = st.form_submit_button("Approve Cash Request")
+                if submitted:
+                    tx_hash = contract.functions.sendCash(cashRequestId, nonprofit).transact({
+                        'from': nonprofit,
+                    })
+
+                    # Hand the transaction to the background manager, the ledger row is
+                    # recorded and published to IPFS once it is mined
+                    record_transaction(tx_hash, 'Cash Transfer')
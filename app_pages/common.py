@@ -0,0 +1,225 @@
+import os
+import json
+from functools import partial
+from web3 import Web3
+from pathlib import Path
+from dotenv import load_dotenv
+import streamlit as st
+import tx_manager
+import nonce_manager
+import view_cache
+import price_oracle
+import http_session
+import metrics
+
+# Shared setup for every page module: the web3 provider, contract, accounts and
+# the process-wide managers.  Only light dependencies are imported here; pages
+# import what they need (plotly, PIL, ...) themselves.
+
+load_dotenv()
+
+# Read in mapbox token for mapping
+mapbox_access_token = os.getenv("MAPBOX_ACCESS_TOKEN")
+
+#  Define and connect a new web3 provider, sharing the pooled keep-alive session
+w3 = Web3(http_session.web3_provider(os.getenv("WEB3_PROVIDER_URI")))
+# time every JSON-RPC call, and serve / export the metrics if configured
+w3.middleware_onion.add(metrics.web3_middleware, 'metrics')
+metrics.start_exporters()
+
+# One shared instance per process for every session and rerun, neither hashed
+# nor copied.  st.cache_resource is Streamlit 1.18+, older releases only have
+# st.cache, which hashes the function and its arguments on every call
+cache_resource = getattr(st, 'cache_resource', None) or st.cache(allow_output_mutation=True)
+
+# Cache the contract to tell Streamlit to load this contract only one time, regardless of other changes
+@cache_resource
+def load_contract():
+    # Load the contract's ABI details
+    with open(Path('./contracts/compiled/CC_abi.json')) as f:
+        CC_abi = json.load(f)
+
+    # Contract function next needs to read the address of the deployed contract from the .env file.
+    contract_address = os.getenv("SMART_CONTRACT_ADDRESS")
+
+    # Connect to the contract
+    contract = w3.eth.contract(
+        address = contract_address,
+        abi = CC_abi
+    )
+    return contract
+
+
+contract = load_contract()
+
+supplier_key = os.getenv("SUPPLIER_PRIVATE_KEY")
+nonprofit_key = os.getenv('NONPROFIT_PRIVATE_KEY')
+
+# list of accounts, looked up once per session instead of on every rerun
+def get_accounts():
+    if 'accounts' not in st.session_state:
+        st.session_state['accounts'] = w3.eth.accounts
+    return st.session_state['accounts']
+
+def get_nonprofit():
+    return get_accounts()[3]
+
+# Function to convert USD to wei using the shared ETH-USD price oracle
+def usdToWei(dollars):
+    to_ether = price_oracle.usd_to_ether(dollars)
+    to_wei = w3.toWei(to_ether, 'ether')
+
+    return to_wei
+
+# Function converting wei to USD
+def weiToUSD(wei):
+    eth_usd = price_oracle.get_eth_usd()
+    st.write(eth_usd)
+    ether = w3.fromWei(wei, 'ether')
+    USD = float(ether) * float(eth_usd)
+
+    return USD
+
+
+# Shared post-transaction step for every workflow, run on a tx manager worker once
+# the receipt is mined.  Looks up the contract balance and block timestamp in one
+# batched RPC pinned to the receipt's block, then hands the new ledger row to the
+# ledger publisher (and analytics), see tx_pipeline.publish_receipt
+def publish_receipt(receipt, publisher, analytics=None, indexer=None):
+    import tx_pipeline
+
+    return tx_pipeline.publish_receipt(w3, receipt, publisher, analytics, indexer)
+
+# Cache the ledger publisher so every session feeds one write-behind buffer and journal
+@cache_resource
+def load_ledger_publisher():
+    import ledger_publisher
+    return ledger_publisher.LedgerPublisher(contract, get_nonprofit())
+
+# Cache the transaction manager so every session shares one worker pool
+@cache_resource
+def load_tx_manager():
+    return tx_manager.TransactionManager(w3)
+
+transactions = load_tx_manager()
+
+# Cache the nonce manager so every session draws signed-transaction nonces from one counter
+@cache_resource
+def load_nonce_manager():
+    return nonce_manager.NonceManager(w3)
+
+nonces = load_nonce_manager()
+
+# Cache contract view results per block, shared by every session so rapid reruns
+# only cost a throttled eth_blockNumber check
+@cache_resource
+def load_view_cache():
+    return view_cache.ViewCache(w3)
+
+views = load_view_cache()
+
+# Cache the event indexer so its checkpoint and connection are shared by every session
+@cache_resource
+def load_event_indexer():
+    import event_indexer
+    return event_indexer.EventIndexer(w3, contract)
+
+# Cache the ledger analytics so every session reads and feeds one set of aggregates
+@cache_resource
+def load_ledger_analytics():
+    import ledger_analytics
+    return ledger_analytics.LedgerAnalytics()
+
+# Cache the supplier matcher so every session shares one spatial index of
+# inventory products and suppliers
+@cache_resource
+def load_supplier_matcher():
+    import supplier_matcher
+    matcher = supplier_matcher.SupplierMatcher(w3, supplier_matcher.load_inventory_contract(w3))
+    matcher.load_suppliers()
+    return matcher
+
+# Hands a sent transaction to the background manager and remembers it for this
+# session, the handler returns without waiting for the block
+def record_transaction(tx_hash, label):
+    on_mined = partial(publish_receipt, publisher=load_ledger_publisher(),
+        analytics=load_ledger_analytics(), indexer=load_event_indexer())
+    handle = transactions.track(tx_hash, label=label, on_mined=on_mined)
+    st.session_state.setdefault('transactions', []).append(handle.id)
+    st.info(f'{label} submitted, transaction {handle.id[:8]} is pending. Its status is shown in the sidebar.')
+    return handle
+
+# Number of entries in each page returned by the contract's paginated views
+PAGE_SIZE = 10
+
+# Fetches one page from a paginated contract view (viewRequests, viewCashRequests),
+# trimmed to the entries that exist, along with the total number of entries
+def fetch_page(view, page_number):
+    offset = page_number * PAGE_SIZE
+    page, total = views.call(view(offset))
+    return page[:max(min(PAGE_SIZE, total - offset), 0)], total
+
+# Lets the user page through requests and pick one whose status is in `statuses`.
+# Returns the selected request tuple (id first, status last) or None
+def choose_request(view, statuses, key):
+    page_number = st.number_input('Page', min_value=1, value=1, step=1, key=f'{key}_page')
+    page, total = fetch_page(view, int(page_number) - 1)
+    st.caption(f'Page {page_number} of {max(-(-total // PAGE_SIZE), 1)}, {total} requests in total')
+    matching = {entry[0]: entry for entry in page if entry[-1] in statuses}
+    if not matching:
+        st.write('No requests awaiting action on this page')
+        return None
+    entry_id = st.selectbox('Select a request', options=list(matching), key=f'{key}_id')
+    return matching[entry_id]
+
+# Sidebar panel listing this session's transactions, refreshed on every rerun
+def show_transactions():
+    handles = transactions.statuses(st.session_state.get('transactions', []))
+    if not handles:
+        return
+    st.sidebar.subheader("Your Transactions")
+    for handle in reversed(handles):
+        st.sidebar.markdown(f'**{handle.label}** ({handle.id[:8]}): {handle.status}')
+        if handle.error is not None:
+            st.sidebar.caption(str(handle.error))
+    st.sidebar.button("Refresh status")
+    shown = st.session_state.setdefault('transactions_shown', [])
+    for handle in handles:
+        if handle.status == tx_manager.MINED and handle.id not in shown:
+            shown.append(handle.id)
+            st.markdown(f'#### {handle.label} mined')
+            st.write(handle.result)
+    st.sidebar.markdown("""---""")
+
+# Optional debug panel (METRICS_PANEL=1) with per-stage latencies, cache hit
+# counts and the most recent spans for this process
+def show_metrics():
+    import pandas as pd
+
+    st.markdown("""---""")
+    st.subheader('Debug Metrics')
+    rows = metrics.registry.snapshot()
+    stages = [row for row in rows if row['type'] == 'histogram']
+    if stages:
+        stage_df = pd.DataFrame([{
+            'Stage': row['labels'].get('stage'),
+            'Labels': ', '.join(f'{k}={v}' for k, v in row['labels'].items() if k != 'stage'),
+            'Count': row['count'],
+            'Mean ms': row['mean'] * 1000,
+            'p50 ms': row['p50'] * 1000 if row['p50'] is not None else None,
+            'p95 ms': row['p95'] * 1000 if row['p95'] is not None else None,
+            'Total s': row['sum'],
+        } for row in stages]).sort_values('Total s', ascending=False)
+        st.write(stage_df)
+    counters = [row for row in rows if row['type'] == 'counter']
+    if counters:
+        st.write(pd.DataFrame([{
+            'Metric': row['metric'],
+            'Labels': ', '.join(f'{k}={v}' for k, v in row['labels'].items()),
+            'Value': row['value'],
+        } for row in counters]))
+    recent = metrics.registry.recent_spans()
+    if recent:
+        st.caption('Most recent spans')
+        st.write(pd.DataFrame(recent))
+    st.download_button('Download Prometheus metrics', metrics.registry.prometheus_text(), file_name='metrics.prom')
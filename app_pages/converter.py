@@ -0,0 +1,18 @@
+import streamlit as st
+import price_oracle
+from app_pages.common import w3
+
+# Basic currency converter to allow the user to convert between USD, ether and wei
+def render():
+    with st.form('converter', clear_on_submit = True):
+        st.header('Currency Converter')
+
+        eth_usd = price_oracle.get_eth_usd()
+        dollars = st.number_input('Enter the amount of USD to convert to ether and wei:', value = 0.00)
+        to_ether = float(dollars) / float(eth_usd)
+        to_wei = w3.toWei(to_ether, 'ether')
+
+        submitted = st.form_submit_button('Convert')
+        if submitted:
+            st.markdown(f'**{dollars} dollars is equal to {to_ether:,.2f} ether**')
+            st.markdown(f'**{dollars} dollars is equal to {to_wei:,.2f} wei**')
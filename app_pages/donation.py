@@ -0,0 +1,33 @@
+import streamlit as st
+from app_pages.common import contract, get_accounts, usdToWei, record_transaction
+
+# Donors send ETH to the contract
+def render():
+    accounts = get_accounts()
+    nonprofit = accounts[3]
+
+    st.header('Make a Donation')
+
+    # Create a streamlit 'form' that will allow for the batch submission to the smart contract
+    # and then clear the data from the inputs
+    
+    with st.form("donation", clear_on_submit=True):
+
+        # For now we are just allowing donations to flow from the donor to the contract
+        address = st.selectbox('Select a Recipient', options=[nonprofit])
+        donation = st.number_input("How much would you like to donate?")
+        choose_address = st.selectbox('Choose address to donate from', options = accounts[0:2])
+        donation = int(donation)
+        donation = usdToWei(donation)
+
+        submitted = st.form_submit_button("Donate")
+        if submitted:
+            tx_hash = contract.functions.deposit(donation).transact({
+            'from': choose_address,
+            'value': donation
+            })
+            # Hand the transaction to the background manager, the ledger row is
+            # recorded and published to IPFS once it is mined
+            record_transaction(tx_hash, 'Donation')
+
+            st.balloons()
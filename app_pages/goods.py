@@ -0,0 +1,225 @@
+import streamlit as st
+import pandas as pd
+import plotly.graph_objects as go
+import geocoder
+from app_pages.common import (contract, get_accounts, usdToWei, weiToUSD, record_transaction,
+    choose_request, views, nonces, supplier_key, mapbox_access_token, load_supplier_matcher)
+
+# Goods workflow: request, supplier fill offer, approval and invoice payment
+def render():
+    accounts = get_accounts()
+    nonprofit = accounts[3]
+    
+    #st.subheader('Submit a Goods Request')
+    goods_options = st.sidebar.radio('', options=['1 - Submit a Goods Request', '2 - View Open Goods Request', '3 - View Fill Goods Offers', '4 - Pay Supplier Invoice'])
+
+    if goods_options == '1 - Submit a Goods Request':
+        st.subheader('Please fill out request details below')
+        #requestLocation = ''
+        with st.form("submitRequest", clear_on_submit=True):
+
+            # Taking in requesters location to be mapped
+            col1, col2 = st.columns(2)
+            with col1:
+                street_address = st.text_input('Enter street address')
+                state = st.text_input('Enter your state i.e. CA, AZ')
+            with col2:
+                city = st.text_input('Enter City')
+                zip = st.text_input('Enter your zip code')
+
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                newName = st.text_input('What is the name of the product?')
+                newProductType = st.selectbox('Select type of assistance requested', options = ['Food', 'Supplies', 'Ride'])
+            
+            # Input quantity of items requested if food or supplies, else ride quantity defaults to 1
+            with col2:
+                owner_address = st.selectbox('Select your wallet address to submit request form', options = accounts[5:10])
+                if newProductType != "Ride":
+                    newProductCount = st.number_input('Enter product quantity requested', value=0)
+                else:
+                    newProductCount = 1
+
+            submitted = st.form_submit_button("Register Request")
+            if submitted:
+
+                # Displays map of requesters location for confirmation
+                requestLocation = f'{street_address} {city} {state} {zip}'
+                # Served from the local geocoding cache when this address has been seen before
+                location = geocoder.geocode(requestLocation)
+                if location is None:
+                    st.error(f'Could not find "{requestLocation}" on the map, please check the address and submit again')
+                else:
+                    latitude, longitude = location
+        
+                    fig = go.Figure(go.Scattermapbox(lat=[latitude], lon=[longitude], 
+                        mode='markers', marker=go.scattermapbox.Marker(size=18, symbol='car')))
+        
+                    fig.update_layout(hovermode='closest', title = f'{requestLocation}', mapbox=dict(
+                        accesstoken=mapbox_access_token, bearing=0, center=go.layout.mapbox.Center(
+                        lat=latitude, lon=longitude), pitch=0, zoom=15))
+               
+                    tx_hash = contract.functions.registerRequest(
+                        owner_address,
+                        newName,
+                        newProductType,
+                        int(newProductCount),
+                        requestLocation
+                    ).transact({'from' : owner_address})
+                    # Hand the transaction to the background manager, the ledger row is
+                    # recorded and published to IPFS once it is mined
+                    record_transaction(tx_hash, 'Goods Request')
+
+                    st.markdown("**Thank you!  Your request is pending supplier confirmation!  Please confirm\
+                    your location below:**")
+                    #st.write(f'{requestLocation}')
+                    st.plotly_chart(fig, title=f'{requestLocation}')
+
+
+    # Supplier can view open supplies requests and offer to fill, optionally requesting
+    # compensation to do so            
+    if goods_options == '2 - View Open Goods Request':
+        st.subheader('Supplier, please fill out form if you would like to fulfill this request')     
+
+        # Open requests are listed a page at a time from the contract
+        selected = choose_request(contract.functions.viewRequests, ['Open', 'Fill Offered'], 'fill')
+        if selected is not None:
+            requestId = selected[0]
+            request = selected[1:]
+
+            # Nearest in-stock inventory and suppliers for this request's type and location
+            suggestions = load_supplier_matcher().best_suppliers(request[4], request[2])
+            if suggestions:
+                st.markdown('### Suggested Suppliers')
+                st.write(pd.DataFrame(suggestions).rename(columns={
+                    'supplier': 'Supplier', 'kind': 'Source', 'product': 'Product',
+                    'count': 'In Stock', 'distance_km': 'Distance (km)'}))
+            else:
+                st.caption('No nearby supplier or inventory found for this request')
+
+            with st.form('fillRequest', clear_on_submit=True):    
+
+                col1, col2 = st.columns(2)
+                with col1:
+                    st.markdown(f'**Requestor Wallet Address:**   {request[0]}')
+                    st.markdown(f'**Name of Item Requested:**   {request[1]}')
+                    st.markdown(f'**Type of Product:**   {request[2]}')
+                with col2:
+                    st.markdown(f'**Quantity of Product:**   {request[3]}')
+                    st.markdown(f'**Request Location:**  {request[4]}')
+                    st.markdown(f'**Request Status:**  {request[5]}')
+                    
+                st.markdown('### Supplier Information:')
+                col1, col2, col3 = st.columns(3)
+                with col1: 
+                    supplier= st.selectbox(f'Supplier Address', options=accounts[4:5])
+                with col2:
+                    amount = st.number_input('Compensation requested')
+                    amount = usdToWei(amount)
+                with col3:
+                    invoiceNumber = st.number_input('Invoice Number', value=0)
+                    
+                submitted = st.form_submit_button("Send Offer")
+                
+                if submitted:
+                    # The nonce comes from the local nonce manager, so several offers
+                    # can be signed and in flight before the first one is mined
+                    tx_hash_1 = nonces.send_transaction(contract.functions.fillRequest(
+                        requestId,
+                        supplier,
+                        int(amount),
+                        int(invoiceNumber)
+                    ), supplier, supplier_key)
+                    
+                    # Hand the transaction to the background manager, the ledger row is
+                    # recorded and published to IPFS once it is mined
+                    record_transaction(tx_hash_1, 'Fill Offer')
+
+                    # Mapping the location of the selected request
+                    requestLocation = f'{request[4]}'
+                    # Served from the local geocoding cache when this address has been seen before
+                    location = geocoder.geocode(requestLocation)
+                    if location is None:
+                        st.error(f'Could not find "{requestLocation}" on the map')
+                    else:
+                        latitude, longitude = location
+                        fig = go.Figure(go.Scattermapbox(lat=[latitude], lon=[longitude],
+                            mode='markers', marker=go.scattermapbox.Marker(size=18, symbol='car')))
+            
+                        fig.update_layout(hovermode='closest', title = f'{request[4]}',
+                            mapbox=dict(accesstoken=mapbox_access_token, bearing=0, center=go.layout.mapbox.Center(
+                            lat=latitude, lon=longitude), pitch=0, zoom=15))
+
+                        st.markdown("#### Offer with Community Connect for Review & Approval")
+                        st.plotly_chart(fig, use_container_width=True)
+            
+
+    if goods_options == '3 - View Fill Goods Offers':
+        
+        st.subheader("Community Connect, please review & approve supplier's offer to fulfill request")  
+
+        selected = choose_request(contract.functions.viewRequests, ['Fill Offered'], 'approve')
+        if selected is not None:
+            requestId = selected[0]
+            with st.form('fillRequest', clear_on_submit=True):    
+
+                # Allowing the suppliers to view open supplies requests and offer to fill
+                request = views.call(contract.functions.viewFillOffer(requestId))
+                supplier = accounts[4]
+                compensationRequested = int(f'{request[1]}')
+                compensationRequested = weiToUSD(compensationRequested)
+                invoiceNumber = int(f'{request[2]}')
+                st.markdown(f'**Supplier Address:**   {request[0]}')
+                st.markdown(f'**Compensation Requested:**   {compensationRequested}')
+                st.markdown(f'**InvoiceNumber:**   {request[2]}')
+                st.markdown(f'**Product Name:**   {request[3]}')
+                st.markdown(f'**Type of Product:**   {request[4]}')
+                st.markdown(f'**Quantity of Product:**   {request[5]}')
+
+                submitted = st.form_submit_button("Approve Offer")
+                if submitted:
+                    tx_hash = contract.functions.approveFillOffer(requestId).transact({
+                        'from': nonprofit,
+                    })
+                    
+                    # Hand the transaction to the background manager, the ledger row is
+                    # recorded and published to IPFS once it is mined
+                    record_transaction(tx_hash, 'Offer Approval')
+                    
+                    st.write("Great! This order will be prepped and sent to requestor!")
+
+
+    if goods_options == '4 - Pay Supplier Invoice':
+        
+        st.subheader('Goods Received and Invoice Approved to be Paid to Supplier')
+
+        selected = choose_request(contract.functions.viewRequests, ['Fill Approved'], 'pay')
+        if selected is not None:
+            requestId = selected[0]
+            with st.form("payInvoice", clear_on_submit=True):
+
+                # Once the fill offer has been approved, the nonprofit will be able
+                # to pay the supplier via the contract balance
+                request = views.call(contract.functions.viewApprovedInvoice(requestId))
+                compensationApproved = int(f'{request[1]}')
+                compensationApproved = weiToUSD(compensationApproved)
+                
+                invoiceNum = int(f'{request[2]}')
+                st.markdown(f'**Approved Supplier Address:**   {request[0]}')
+                st.markdown(f'**Approved Compensation:**   {compensationApproved}')
+                st.markdown(f'**Approved Invoice Number:**   {request[2]}')
+                
+                submitted = st.form_submit_button("Pay Invoice")
+                if submitted:
+                    tx_hash = contract.functions.payInvoice(
+                        requestId=requestId,
+                        invoiceNum=invoiceNum,
+                        received=True
+                    ).transact({'from' : nonprofit})
+                    # Hand the transaction to the background manager, the ledger row is
+                    # recorded and published to IPFS once it is mined
+                    record_transaction(tx_hash, 'Invoice Payment')
+
+                    st.write(f"Good News! Request submission for **Invoice {invoiceNum}** has been received from requestor and invoice paid to supplier!")
+                    st.balloons()
@@ -0,0 +1,135 @@
+import datetime
+import streamlit as st
+from ipfs import load_segment
+import price_history
+import singleton_requests
+from receipt_store import get_store
+from app_pages.common import contract, views, load_event_indexer, load_ledger_publisher
+
+PAGE_SIZES = [25, 50, 100]
+# sort label -> (receipt store column, descending)
+SORTS = {
+    'Newest first': ('timestamp', True),
+    'Oldest first': ('timestamp', False),
+    'Highest gas': ('gas', True),
+    'Lowest gas': ('gas', False),
+}
+
+# IPFS ledger heads already copied into the local receipt store by this process
+_imported = set()
+
+# Copies the segments published since the last imported head into the local
+# receipt store, so the browser never has to load the whole IPFS ledger
+def import_ledger(ipfsHash):
+    store = get_store()
+    cid = ipfsHash
+    while cid and cid not in _imported:
+        segment, segment_df = load_segment(cid)
+        store.import_frame(segment_df)
+        if segment["checkpoint"]:
+            break
+        cid = segment["prev"]
+    _imported.add(ipfsHash)
+
+# Ledger rows with the contract balance valued in USD as of each row's timestamp,
+# unchanged when no price history can be loaded
+def with_usd(df):
+    try:
+        return price_history.value_ledger(df)
+    except Exception as e:
+        st.caption(f'USD values unavailable: {e}')
+        return df
+
+def _next_page():
+    page = st.session_state['ledger_page']
+    cursors = st.session_state['ledger_cursors'][:page + 1]
+    cursors.append(st.session_state['ledger_next'])
+    st.session_state['ledger_cursors'] = cursors
+    st.session_state['ledger_page'] = page + 1
+
+def _previous_page():
+    st.session_state['ledger_page'] = max(st.session_state['ledger_page'] - 1, 0)
+
+# Filtered, sorted ledger served a page at a time from the local receipt store.
+# Pages are fetched with keyset cursors, so only the rows shown are read and
+# sent to the browser no matter how long the history is.  Rows whose tx hash is
+# in `exclude` are left out
+def ledger_browser(exclude=()):
+    with st.form('ledgerFilters'):
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            address = st.text_input('Address (sender or recipient)').strip()
+            tx_hash = st.text_input('Tx Hash').strip()
+        with col2:
+            limit_dates = st.checkbox('Only transactions between')
+            today = datetime.date.today()
+            dates = st.date_input('Dates', value=(today - datetime.timedelta(days=30), today))
+        with col3:
+            sort = st.selectbox('Sort by', options=list(SORTS))
+            page_size = st.selectbox('Rows per page', options=PAGE_SIZES)
+        st.form_submit_button('Apply')
+
+    filters = {}
+    if address:
+        filters['address'] = address
+    if tx_hash:
+        filters['tx_hash'] = tx_hash
+    if limit_dates and len(dates) == 2:
+        filters['start'] = datetime.datetime.combine(dates[0], datetime.time())
+        filters['end'] = datetime.datetime.combine(dates[1] + datetime.timedelta(days=1), datetime.time())
+
+    # new filters start over from the first page
+    view = (tuple(sorted(filters.items())), sort, page_size)
+    if st.session_state.get('ledger_view') != view:
+        st.session_state['ledger_view'] = view
+        st.session_state['ledger_cursors'] = [None]
+        st.session_state['ledger_page'] = 0
+
+    page = st.session_state['ledger_page']
+    column, descending = SORTS[sort]
+    # `exclude` shrinks as rows get published, it is not part of the view so
+    # paging carries on; keyset cursors stay valid when rows come and go
+    page_df, next_cursor = singleton_requests.query_receipts(
+        limit=page_size, cursor=st.session_state['ledger_cursors'][page], sort=column, descending=descending,
+        exclude=exclude, **filters
+    )
+    st.session_state['ledger_next'] = next_cursor
+
+    if page_df.empty:
+        st.write('No transactions match these filters')
+    else:
+        st.caption(f'Page {page + 1}, transactions {page * page_size + 1} to {page * page_size + len(page_df)}')
+        st.write(with_usd(page_df))
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button('Previous page', on_click=_previous_page, disabled=page == 0)
+    with col2:
+        st.button('Next page', on_click=_next_page, disabled=next_cursor is None)
+
+# Page that allows user to view the current contract ledger pulled from ipfs
+def render():
+    st.header('Contract Ledger')
+
+    ipfsHash = views.call(contract.functions.getIPFSHash())
+    if ipfsHash != '':
+        import_ledger(ipfsHash)
+    # Rows from mined transactions that the publisher has not anchored yet are
+    # listed below the browser, so the browser leaves them out
+    publisher = load_ledger_publisher()
+    pending_df = publisher.pending()
+    ledger_browser(exclude=list(pending_df.index))
+
+    if publisher.last_error is not None:
+        st.warning(f'Publishing to IPFS failed, the rows below will be retried: {publisher.last_error}')
+    if not pending_df.empty:
+        st.caption(f'{len(pending_df)} recent transactions waiting to be published to IPFS')
+        st.write(with_usd(pending_df))
+
+    # Contract events are read from the local index, which only pulls the logs
+    # emitted since the last sync.  The head comes from the view cache's
+    # throttled block check, so a rerun on an unchanged chain costs no RPC
+    st.subheader('Contract Events')
+    indexer = load_event_indexer()
+    indexer.sync(views.block_number())
+    st.write(indexer.query(limit=100))
@@ -0,0 +1,468 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import hashlib
+import datetime
+import tempfile
+import threading
+import statistics
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from urllib.parse import unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# End-to-end benchmark of the dApp workflows.  CC.sol is deployed on an
+# in-process py-evm chain (eth-tester) and Pinata, the IPFS gateways and Mapbox
+# are replaced by a local HTTP stand-in, so a run needs no Ganache, network or
+# API keys and its numbers only move when our code does.  Each workflow is
+# driven through the same modules the Streamlit pages use and reports:
+#
+#   * latency per workflow and per stage (send, mine, record, publish, ...)
+#   * gasUsed per contract function
+#   * publish and read time as the IPFS ledger grows
+#
+#   python benchmark.py                          default run
+#   python benchmark.py --runs 20 --json out.json
+#
+# Ledger rows go through tx_pipeline.publish_receipt into a LedgerPublisher, as
+# on every page.  The publisher runs without its background thread (the tester
+# chain is driven from one thread); instead the benchmark flushes it in line
+# whenever LEDGER_FLUSH_ROWS rows are pending, and once more on close.
+#
+# Requires `pip install "eth-tester[py-evm]"`.  The contract bytecode is read
+# from contracts/compiled/CC_bytecode.json (or CC_BYTECODE_PATH); when it is
+# missing CC.sol is compiled with py-solc-x (`pip install py-solc-x`), which
+# downloads solc and the contract's github imports the way Remix does, and the
+# result is saved there for the next run.
+
+BYTECODE_PATH = os.getenv("CC_BYTECODE_PATH", "contracts/compiled/CC_bytecode.json")
+SOLC_VERSION = os.getenv("SOLC_VERSION", "0.5.17")
+ETH_USD = 3000.0
+LEDGER_SIZES = [25, 50, 100, 200]
+
+
+# Local stand-in for Pinata (pinning), the IPFS gateways (reads) and Mapbox
+# (geocoding).  `latency` seconds are added to every response to mimic a
+# network round trip
+class FakeServices:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.pins = {}
+        self.requests = defaultdict(int)
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, body):
+                time.sleep(services.latency)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def reply_bytes(self, data):
+                time.sleep(services.latency)
+                self.send_response(200)
+                self.send_header("Content-Type", "application/octet-stream")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_POST(self):
+                services.requests["pin"] += 1
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                if self.path.endswith("/pinFileToIPFS"):
+                    # multipart upload, keep the body of the "file" part
+                    boundary = self.headers["Content-Type"].split("boundary=")[1].encode()
+                    part = next(p for p in body.split(b"--" + boundary) if b'name="file"' in p.split(b"\r\n\r\n", 1)[0])
+                    content = part.split(b"\r\n\r\n", 1)[1][:-2]
+                    cid = "bafk" + hashlib.sha256(content).hexdigest()[:52]
+                    size = len(content)
+                else:
+                    content = json.loads(body)["pinataContent"]
+                    cid = "bafk" + hashlib.sha256(json.dumps(content, sort_keys=True).encode()).hexdigest()[:52]
+                    size = len(json.dumps(content))
+                services.pins[cid] = content
+                self.reply(200, {"IpfsHash": cid, "PinSize": size, "Timestamp": datetime.datetime.utcnow().isoformat()})
+
+            def do_GET(self):
+                if self.path.startswith("/ipfs/"):
+                    services.requests["gateway"] += 1
+                    cid = self.path[len("/ipfs/"):]
+                    if isinstance(services.pins.get(cid), bytes):
+                        return self.reply_bytes(services.pins[cid])
+                    if cid in services.pins:
+                        return self.reply(200, services.pins[cid])
+                    return self.reply(404, {"error": "not pinned"})
+                if self.path.startswith("/geocoding/"):
+                    services.requests["geocode"] += 1
+                    address = unquote(self.path.split("/")[-1].split(".json")[0])
+                    digest = hashlib.sha256(address.encode()).digest()
+                    latitude = 33 + digest[0] / 255
+                    longitude = -112 + digest[1] / 255
+                    return self.reply(200, {"features": [{"center": [longitude, latitude]}]})
+                self.reply(404, {"error": "unknown path"})
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+# Points every module at the fake services and a scratch directory.  Must run
+# before the app modules are imported, they read their settings at import time
+def configure(services, workdir):
+    fixture = Path(workdir, "eth_usd.json")
+    fixture.write_text(json.dumps({"ETH-USD": ETH_USD}))
+    os.environ.update({
+        "PINATA_API_URL": services.url,
+        "PINATA_API_KEY": "benchmark",
+        "PINATA_SECRET_API_KEY": "benchmark",
+        "IPFS_GATEWAYS": f"{services.url}/ipfs/",
+        "MAPBOX_API_URL": services.url,
+        "MAPBOX_ACCESS_TOKEN": "benchmark",
+        "ETH_USD_FIXTURE": str(fixture),
+        "LEDGER_CACHE_DIR": str(Path(workdir, "ledger_cache")),
+        "RECEIPT_DB_PATH": str(Path(workdir, "receipts.db")),
+        "EVENT_DB_PATH": str(Path(workdir, "events.db")),
+        "GEOCODE_DB_PATH": str(Path(workdir, "geocode.db")),
+        "LEDGER_JOURNAL_PATH": str(Path(workdir, "ledger_journal.jsonl")),
+    })
+
+
+# Raw github url for a Remix style "github.com/<org>/<repo>/blob/<ref>/<path>" import
+def _github_raw_url(path):
+    parts = path.split("/")
+    if parts[0] != "github.com" or len(parts) < 6 or parts[3] != "blob":
+        raise ValueError(f"cannot resolve import {path!r}")
+    return f"https://raw.githubusercontent.com/{parts[1]}/{parts[2]}/{parts[4]}/{'/'.join(parts[5:])}"
+
+
+# Compiles `source` with solc SOLC_VERSION and writes {"object": bytecode} to
+# `out_path`, the layout Remix exports
+def compile_bytecode(source, out_path):
+    import solcx
+    import http_session
+
+    if SOLC_VERSION not in {str(v) for v in solcx.get_installed_solc_versions()}:
+        solcx.install_solc(SOLC_VERSION)
+    main_name = Path(source).name
+    texts = {main_name: Path(source).read_text()}
+    pending = [main_name]
+    while pending:
+        for path in re.findall(r'import\s+"([^"]+)"', texts[pending.pop()]):
+            if path not in texts:
+                response = http_session.get(_github_raw_url(path))
+                response.raise_for_status()
+                texts[path] = response.text
+                pending.append(path)
+    output = solcx.compile_standard({
+        "language": "Solidity",
+        "sources": {name: {"content": text} for name, text in texts.items()},
+        "settings": {"outputSelection": {main_name: {"*": ["evm.bytecode.object"]}}},
+    }, solc_version=SOLC_VERSION)
+    bytecode = next(
+        contract["evm"]["bytecode"]["object"]
+        for contract in output["contracts"][main_name].values() if contract["evm"]["bytecode"]["object"]
+    )
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    Path(out_path).write_text(json.dumps({"object": bytecode}))
+
+
+# Contract bytecode from `path`, compiled from `source` first when it is missing
+def load_bytecode(path=BYTECODE_PATH, source="contracts/CC.sol"):
+    if not Path(path).exists():
+        if source is None:
+            sys.exit(f"no contract bytecode at {path}, export it from Remix or set CC_BYTECODE_PATH")
+        print(f"compiling {source} with solc {SOLC_VERSION} into {path}")
+        compile_bytecode(source, path)
+    text = Path(path).read_text().strip()
+    if text.startswith("{"):
+        text = json.loads(text)["object"]
+    return text[2:] if text.startswith("0x") else text
+
+
+# The nonprofit and authorized recipient are hard coded in CC.sol.  Swap them for
+# tester accounts so the permissioned functions can be exercised
+def retarget_bytecode(bytecode, nonprofit, recipient, source="contracts/CC.sol"):
+    solidity = Path(source).read_text()
+    for name, account in (("nonProfit", nonprofit), ("authorizedRecipient", recipient)):
+        hard_coded = re.search(rf"address payable (?:constant )?{name}\s*=\s*0x([0-9a-fA-F]{{40}})", solidity).group(1)
+        bytecode = bytecode.replace(hard_coded.lower(), account[2:].lower())
+    return bytecode
+
+
+class Timings:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.gas = defaultdict(list)
+
+    @contextmanager
+    def stage(self, workflow, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[(workflow, name)].append(time.perf_counter() - start)
+
+    def total(self, workflow, seconds):
+        self.samples[(workflow, "total")].append(seconds)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    summary = {"n": len(ordered), "mean": statistics.fmean(ordered), "p50": statistics.median(ordered), "max": ordered[-1]}
+    summary["p95"] = statistics.quantiles(ordered, n=20, method="inclusive")[-1] if len(ordered) >= 2 else ordered[0]
+    return summary
+
+
+class Bench:
+    def __init__(self, w3, contract, accounts, keys, timings, workdir):
+        import tx_pipeline
+        import ipfs
+        import geocoder
+        import price_oracle
+        import ledger_publisher
+        from nonce_manager import NonceManager
+
+        self.w3 = w3
+        self.contract = contract
+        self.timings = timings
+        self.tx_pipeline = tx_pipeline
+        self.ipfs = ipfs
+        self.geocoder = geocoder
+        self.price_oracle = price_oracle
+        self.nonces = NonceManager(w3)
+        self.donor = accounts[0]
+        self.supplier, self.supplier_key = accounts[2], keys[2]
+        self.nonprofit = accounts[3]
+        self.recipient = accounts[5]
+        self.owner = accounts[6]
+        self.flush_rows = ledger_publisher.FLUSH_ROWS
+        # flushed in line by maybe_flush(), never by the publisher's own thread
+        self.publisher = ledger_publisher.LedgerPublisher(
+            contract, self.nonprofit, path=Path(workdir, "bench_journal.jsonl"), autoflush=False,
+        )
+
+    # Flushes the publisher once LEDGER_FLUSH_ROWS rows are pending, like its
+    # background thread would
+    def maybe_flush(self, workflow):
+        if len(self.publisher.buffer) >= self.flush_rows:
+            with self.timings.stage(workflow, "flush"):
+                self.publisher.flush()
+
+    def close(self):
+        with self.timings.stage("ledger", "final flush"):
+            self.publisher.close()
+        if self.publisher.last_error is not None:
+            raise self.publisher.last_error
+
+    def usd_to_wei(self, workflow, dollars):
+        with self.timings.stage(workflow, "price"):
+            return self.w3.toWei(self.price_oracle.usd_to_ether(dollars), "ether")
+
+    # The per-transaction path every page follows: send, wait for the receipt,
+    # record the ledger row and queue it with the ledger publisher
+    def transaction(self, workflow, fn_name, send):
+        with self.timings.stage(workflow, "send"):
+            tx_hash = send()
+        with self.timings.stage(workflow, "mine"):
+            receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash)
+        if receipt["status"] != 1:
+            raise RuntimeError(f"{fn_name} reverted")
+        self.timings.gas[fn_name].append(receipt["gasUsed"])
+        with self.timings.stage(workflow, "publish"):
+            self.tx_pipeline.publish_receipt(self.w3, receipt, self.publisher)
+        self.maybe_flush(workflow)
+        return receipt
+
+    def run(self, workflow, steps):
+        start = time.perf_counter()
+        result = steps(workflow)
+        self.timings.total(workflow, time.perf_counter() - start)
+        return result
+
+    def donate(self, workflow):
+        donation = self.usd_to_wei(workflow, 500)
+        fn = self.contract.functions.deposit(donation)
+        self.transaction(workflow, "deposit", lambda: fn.transact({"from": self.donor, "value": donation}))
+
+    def request(self, workflow, n):
+        location = f"{100 + n} Main St Phoenix AZ 85001"
+        with self.timings.stage(workflow, "geocode"):
+            self.geocoder.geocode(location)
+        fn = self.contract.functions.registerRequest(self.owner, f"Product {n}", "Food", 1, location)
+        self.transaction(workflow, "registerRequest", lambda: fn.transact({"from": self.owner}))
+        return self.contract.functions.requestCount().call() - 1
+
+    def fill(self, workflow, request_id, invoice):
+        compensation = self.usd_to_wei(workflow, 50)
+        fn = self.contract.functions.fillRequest(request_id, self.supplier, compensation, invoice)
+        self.transaction(workflow, "fillRequest", lambda: self.nonces.send_transaction(fn, self.supplier, self.supplier_key))
+
+    def approve(self, workflow, request_id):
+        fn = self.contract.functions.approveFillOffer(request_id)
+        self.transaction(workflow, "approveFillOffer", lambda: fn.transact({"from": self.nonprofit}))
+
+    def pay(self, workflow, request_id, invoice):
+        fn = self.contract.functions.payInvoice(request_id, invoice, True)
+        self.transaction(workflow, "payInvoice", lambda: fn.transact({"from": self.nonprofit}))
+
+    def cash(self, workflow):
+        amount = self.usd_to_wei(workflow, 20)
+        fn = self.contract.functions.requestCash(self.recipient, amount)
+        self.transaction(workflow, "requestCash", lambda: fn.transact({"from": self.nonprofit}))
+        cash_request_id = self.contract.functions.cashRequestCount().call() - 1
+        fn = self.contract.functions.sendCash(cash_request_id, self.nonprofit)
+        self.transaction(workflow, "sendCash", lambda: fn.transact({"from": self.nonprofit}))
+
+    def workflows(self, n):
+        self.run("donate", self.donate)
+        request_id = self.run("request", lambda w: self.request(w, n))
+        self.run("fill", lambda w: self.fill(w, request_id, 1000 + n))
+        self.run("approve", lambda w: self.approve(w, request_id))
+        self.run("pay", lambda w: self.pay(w, request_id, 1000 + n))
+        self.run("cash", self.cash)
+
+    # Grows the ledger with synthetic rows queued through the publisher like the
+    # app, and measures publish (queue plus flush, per row) and read cost at each
+    # size in `sizes`
+    def ledger_scaling(self, sizes):
+        from ledger_cache import get_cache
+        from tx_pipeline import LedgerRow
+
+        self.publisher.flush()
+        results = []
+        rows = len(self.ledger())
+        for size in sizes:
+            publish = []
+            while rows < size:
+                row = LedgerRow("0", "0x" + os.urandom(32).hex(), self.donor, self.contract.address, 21000,
+                                datetime.datetime.utcnow().replace(microsecond=0))
+                start = time.perf_counter()
+                self.publisher.add([row])
+                if len(self.publisher.buffer) >= self.flush_rows:
+                    self.publisher.flush()
+                publish.append(time.perf_counter() - start)
+                rows += 1
+            start = time.perf_counter()
+            self.publisher.flush()
+            if publish:
+                publish[-1] += time.perf_counter() - start
+            # cold: no cached segments and no resolved head in memory
+            get_cache().clear()
+            self.ipfs._resolved = (None, None)
+            start = time.perf_counter()
+            ledger = self.ledger()
+            cold = time.perf_counter() - start
+            start = time.perf_counter()
+            self.ledger()
+            warm = time.perf_counter() - start
+            head, _ = self.ipfs.load_segment(self.contract.functions.getIPFSHash().call())
+            results.append({
+                "rows": len(ledger),
+                "depth": head["depth"],
+                "publish_mean": statistics.fmean(publish) if publish else None,
+                "cold_read": cold,
+                "warm_read": warm,
+            })
+        return results
+
+    def ledger(self):
+        head = self.contract.functions.getIPFSHash().call()
+        return self.ipfs.retrieve_block_df(head) if head else []
+
+
+# Fresh chain with the contract deployed, its deployment gas goes into `timings`
+def start_chain(bytecode, source="contracts/CC.sol", timings=None):
+    from eth_tester import EthereumTester, PyEVMBackend
+    from eth_tester.backends.pyevm.main import get_default_account_keys
+    from web3 import Web3, EthereumTesterProvider
+
+    w3 = Web3(EthereumTesterProvider(EthereumTester(PyEVMBackend())))
+    accounts = w3.eth.accounts
+    keys = [key.to_hex() for key in get_default_account_keys()]
+    with open(Path('./contracts/compiled/CC_abi.json')) as f:
+        CC_abi = json.load(f)
+    bytecode = retarget_bytecode(bytecode, accounts[3], accounts[5], source)
+    tx_hash = w3.eth.contract(abi=CC_abi, bytecode=bytecode).constructor().transact({"from": accounts[0]})
+    receipt = w3.eth.wait_for_transaction_receipt(tx_hash)
+    if timings is not None:
+        timings.gas["(deployment)"].append(receipt["gasUsed"])
+    address = receipt["contractAddress"]
+    return w3, w3.eth.contract(address=address, abi=CC_abi), accounts, keys
+
+
+def report(timings, scaling, services):
+    print(f"{'workflow':<10}{'stage':<10}{'n':>5}{'mean ms':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    workflows = {}
+    for (workflow, stage), samples in timings.samples.items():
+        summary = summarize(samples)
+        workflows.setdefault(workflow, {})[stage] = summary
+    for workflow, stages in workflows.items():
+        for stage in sorted(stages, key=lambda s: (s == "total", s)):
+            s = stages[stage]
+            print(f"{workflow:<10}{stage:<10}{s['n']:>5}{s['mean'] * 1000:>10.1f}{s['p50'] * 1000:>10.1f}"
+                  f"{s['p95'] * 1000:>10.1f}{s['max'] * 1000:>10.1f}")
+
+    print(f"\n{'function':<18}{'n':>5}{'mean gas':>12}{'max gas':>12}")
+    gas = {}
+    for fn_name, used in sorted(timings.gas.items()):
+        gas[fn_name] = {"n": len(used), "mean": statistics.fmean(used), "max": max(used)}
+        print(f"{fn_name:<18}{len(used):>5}{gas[fn_name]['mean']:>12.0f}{max(used):>12}")
+
+    print(f"\n{'rows':>6}{'depth':>7}{'publish ms':>12}{'cold read ms':>14}{'warm read ms':>14}")
+    for point in scaling:
+        publish = f"{point['publish_mean'] * 1000:.1f}" if point["publish_mean"] is not None else "-"
+        print(f"{point['rows']:>6}{point['depth']:>7}{publish:>12}{point['cold_read'] * 1000:>14.1f}{point['warm_read'] * 1000:>14.2f}")
+
+    print(f"\nservice requests: {dict(services.requests)}")
+    return {"workflows": workflows, "gas": gas, "ledger": scaling, "requests": dict(services.requests)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dApp workflows on an in-process chain")
+    parser.add_argument("--runs", type=int, default=5, help="times to run every workflow")
+    parser.add_argument("--ledger-sizes", default=",".join(map(str, LEDGER_SIZES)),
+                        help="comma separated ledger sizes for the scaling curve, empty to skip")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every fake service response")
+    parser.add_argument("--bytecode", default=BYTECODE_PATH)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    services = FakeServices(latency=args.latency).start()
+    workdir = tempfile.mkdtemp(prefix="cc-benchmark-")
+    configure(services, workdir)
+
+    timings = Timings()
+    w3, contract, accounts, keys = start_chain(load_bytecode(args.bytecode), timings=timings)
+    bench = Bench(w3, contract, accounts, keys, timings, workdir)
+    for n in range(args.runs):
+        bench.workflows(n)
+    sizes = [int(size) for size in args.ledger_sizes.split(",") if size]
+    scaling = bench.ledger_scaling(sizes)
+    bench.close()
+
+    results = report(timings, scaling, services)
+    services.stop()
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
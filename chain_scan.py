@@ -0,0 +1,285 @@
+import os
+import json
+import sqlite3
+import argparse
+import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import pandas as pd
+from eth_utils import function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from web3 import Web3, HTTPProvider
+from dotenv import load_dotenv
+load_dotenv()
+
+import tx_pipeline
+from tx_pipeline import LedgerRow, _rpc_batch
+from singleton_requests import LEDGER_COLUMNS
+
+# Rebuilds the contract ledger straight from the chain and audits the pinned
+# IPFS ledger against it.  The block range is cut into fixed-size chunks that
+# are scanned by a pool of workers; on an HTTP provider each worker fetches
+# blocks, receipts and balances as JSON-RPC batches.  Every transaction sent to
+# the contract (except the updateIPFSHash anchors, which the app never records)
+# becomes a row with the same fields convert_receipt produces.  Rows and
+# finished chunks are committed to SQLite together, so an interrupted scan
+# resumes where it stopped.
+#
+#   python chain_scan.py rebuild              scan up to the head
+#   python chain_scan.py verify --csv diff.csv   scan, then diff the IPFS ledger
+
+DB_PATH = os.getenv("CHAIN_SCAN_DB_PATH", "chain_scan.db")
+WORKERS = int(os.getenv("CHAIN_SCAN_WORKERS", "8"))
+RANGE_SIZE = int(os.getenv("CHAIN_SCAN_RANGE", "500"))
+BATCH_SIZE = int(os.getenv("CHAIN_SCAN_BATCH", "50"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scanned (
+    contract TEXT NOT NULL,
+    start_block INTEGER NOT NULL,
+    end_block INTEGER NOT NULL,
+    PRIMARY KEY (contract, start_block)
+);
+CREATE TABLE IF NOT EXISTS rows (
+    contract TEXT NOT NULL,
+    tx_hash TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    tx_index INTEGER NOT NULL,
+    contract_balance TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT NOT NULL,
+    gas INTEGER NOT NULL,
+    timestamp INTEGER NOT NULL,
+    PRIMARY KEY (contract, tx_hash)
+);
+CREATE INDEX IF NOT EXISTS rows_order ON rows (contract, block_number, tx_index);
+"""
+
+
+class ChainScanner:
+    def __init__(self, w3, contract, path=DB_PATH, workers=WORKERS, range_size=RANGE_SIZE, batch_size=BATCH_SIZE,
+                 exclude=("updateIPFSHash",)):
+        self.w3 = w3
+        self.contract = contract
+        self.address = contract.address.lower()
+        self.workers = workers
+        self.range_size = range_size
+        self.batch_size = batch_size
+        self.batch = isinstance(w3.provider, HTTPProvider)
+        self.excluded = {
+            "0x" + function_abi_to_4byte_selector(abi).hex()
+            for abi in contract.abi if abi.get("type") == "function" and abi["name"] in exclude
+        }
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    # (block number, timestamp, [(tx hash, tx index)]) for each block in
+    # `numbers`, keeping only the transactions sent to the contract
+    def _blocks(self, numbers):
+        if self.batch:
+            raw = _rpc_batch(self.w3.provider, [("eth_getBlockByNumber", [hex(n), True]) for n in numbers])
+        else:
+            raw = [self.w3.eth.get_block(n, full_transactions=True) for n in numbers]
+        blocks = []
+        for block in raw:
+            txs = []
+            for tx in block["transactions"]:
+                to = tx["to"]
+                if to is None or to.lower() != self.address:
+                    continue
+                data = tx["input"] if isinstance(tx["input"], str) else HexBytes(tx["input"]).hex()
+                if data[:10].lower() in self.excluded:
+                    continue
+                tx_hash = tx["hash"] if isinstance(tx["hash"], str) else tx["hash"].hex()
+                txs.append((tx_hash, _int(tx["transactionIndex"])))
+            blocks.append((_int(block["number"]), _int(block["timestamp"]), txs))
+        return blocks
+
+    # Receipts for `tx_hashes` and the contract balance at each block in `numbers`
+    def _receipts_and_balances(self, tx_hashes, numbers):
+        if self.batch:
+            raw = _rpc_batch(
+                self.w3.provider,
+                [("eth_getTransactionReceipt", [h]) for h in tx_hashes]
+                + [("eth_getBalance", [self.contract.address, hex(n)]) for n in numbers],
+            )
+            receipts = [
+                {
+                    "transactionHash": HexBytes(r["transactionHash"]),
+                    "from": Web3.toChecksumAddress(r["from"]),
+                    "to": Web3.toChecksumAddress(r["to"]),
+                    "gasUsed": _int(r["gasUsed"]),
+                    "status": _int(r.get("status", "0x1")),
+                }
+                for r in raw[:len(tx_hashes)]
+            ]
+            balances = [_int(b) for b in raw[len(tx_hashes):]]
+        else:
+            receipts = [self.w3.eth.get_transaction_receipt(h) for h in tx_hashes]
+            balances = [self.w3.eth.get_balance(self.contract.address, block_identifier=n) for n in numbers]
+        return receipts, dict(zip(numbers, balances))
+
+    # Scans blocks start..end, returns the rows found as tuples for the rows table
+    def _scan_range(self, start, end):
+        found = []
+        for chunk_start in range(start, end + 1, self.batch_size):
+            numbers = list(range(chunk_start, min(chunk_start + self.batch_size, end + 1)))
+            blocks = [block for block in self._blocks(numbers) if block[2]]
+            if not blocks:
+                continue
+            tx_hashes = [tx_hash for _, _, txs in blocks for tx_hash, _ in txs]
+            receipts, balances = self._receipts_and_balances(tx_hashes, [number for number, _, _ in blocks])
+            receipts = iter(receipts)
+            for number, timestamp, txs in blocks:
+                for tx_hash, tx_index in txs:
+                    receipt = next(receipts)
+                    # reverted calls never reach the ledger
+                    if receipt.get("status", 1) == 0:
+                        continue
+                    row = LedgerRow.from_receipt(receipt, balances[number], {"timestamp": timestamp})
+                    found.append((
+                        self.contract.address, row.tx_hash, number, tx_index, row.contract_balance,
+                        row.sender, row.to, row.gas, timestamp,
+                    ))
+        return found
+
+    def _store(self, start, end, rows):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO scanned VALUES (?, ?, ?)", (self.contract.address, start, end)
+            )
+
+    def _pending_ranges(self, from_block, to_block):
+        with self.lock:
+            done = {
+                start: end for start, end in self.conn.execute(
+                    "SELECT start_block, end_block FROM scanned WHERE contract = ?", (self.contract.address,)
+                )
+            }
+        ranges = []
+        for start in range(from_block, to_block + 1, self.range_size):
+            end = min(start + self.range_size - 1, to_block)
+            if done.get(start, -1) < end:
+                ranges.append((start, end))
+        return ranges
+
+    # Scans from_block..to_block (default: genesis to head) on the worker pool,
+    # skipping chunks finished by an earlier run.  Returns the number of rows
+    # found by this run; `progress(done, total)` is called as chunks finish
+    def scan(self, from_block=0, to_block=None, progress=None):
+        if to_block is None:
+            to_block = self.w3.eth.block_number
+        ranges = self._pending_ranges(from_block, to_block)
+        found = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {pool.submit(self._scan_range, start, end): (start, end) for start, end in ranges}
+            for done, future in enumerate(as_completed(futures), 1):
+                start, end = futures[future]
+                rows = future.result()
+                self._store(start, end, rows)
+                found += len(rows)
+                if progress is not None:
+                    progress(done, len(ranges))
+        return found
+
+    # The rebuilt ledger in the IPFS ledger layout, newest first
+    def ledger(self):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT contract_balance, tx_hash, sender, recipient, gas, timestamp FROM rows "
+                "WHERE contract = ? ORDER BY block_number DESC, tx_index DESC",
+                (self.contract.address,),
+            ).fetchall()
+        return tx_pipeline.ledger_frame(
+            LedgerRow(balance, tx_hash, sender, to, gas, datetime.datetime.utcfromtimestamp(timestamp))
+            for balance, tx_hash, sender, to, gas, timestamp in rows
+        )
+
+    def reset(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM rows WHERE contract = ?", (self.contract.address,))
+            self.conn.execute("DELETE FROM scanned WHERE contract = ?", (self.contract.address,))
+
+
+def _int(value):
+    return int(value, 16) if isinstance(value, str) else int(value)
+
+
+# Puts both ledgers on the same footing, IPFS round trips turn balances into
+# numbers and timestamps into pandas datetimes
+def _normalize(df):
+    df = df.copy()
+    df.index = df.index.map(lambda h: str(h).lower())
+    df['Contract Balance'] = df['Contract Balance'].map(lambda v: str(int(v)))
+    df['From'] = df['From'].str.lower()
+    df['To'] = df['To'].str.lower()
+    df['Gas'] = df['Gas'].astype('int64')
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'])
+    return df
+
+
+# Differences between the chain-rebuilt ledger and the IPFS ledger, one row per
+# problem: a transaction missing from IPFS, one on IPFS the chain does not
+# know, or a field whose values disagree
+def diff_ledgers(chain_df, ipfs_df):
+    chain_df, ipfs_df = _normalize(chain_df), _normalize(ipfs_df)
+    problems = []
+    for tx_hash in chain_df.index.difference(ipfs_df.index):
+        problems.append({"Tx Hash": tx_hash, "Problem": "missing from IPFS ledger", "Column": None,
+                         "Chain": None, "IPFS": None})
+    for tx_hash in ipfs_df.index.difference(chain_df.index):
+        problems.append({"Tx Hash": tx_hash, "Problem": "not found on chain", "Column": None,
+                         "Chain": None, "IPFS": None})
+    common = chain_df.index.intersection(ipfs_df.index)
+    columns = [column for column in LEDGER_COLUMNS if column != "Tx Hash"]
+    chain_common, ipfs_common = chain_df.loc[common, columns], ipfs_df.loc[common, columns]
+    for column in columns:
+        differs = chain_common[column] != ipfs_common[column]
+        for tx_hash in common[differs.to_numpy()]:
+            problems.append({"Tx Hash": tx_hash, "Problem": "mismatch", "Column": column,
+                             "Chain": chain_common.at[tx_hash, column], "IPFS": ipfs_common.at[tx_hash, column]})
+    return pd.DataFrame(problems, columns=["Tx Hash", "Problem", "Column", "Chain", "IPFS"])
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    import http_session
+
+    parser = argparse.ArgumentParser(description="Rebuild the contract ledger from the chain and verify the IPFS ledger")
+    parser.add_argument("command", choices=["rebuild", "verify"])
+    parser.add_argument("--from-block", type=int, default=0)
+    parser.add_argument("--to-block", type=int)
+    parser.add_argument("--workers", type=int, default=WORKERS)
+    parser.add_argument("--reset", action="store_true", help="forget earlier progress and rescan")
+    parser.add_argument("--csv", help="write the rebuilt ledger (rebuild) or the differences (verify) to this file")
+    args = parser.parse_args()
+
+    w3 = Web3(http_session.web3_provider(os.getenv("WEB3_PROVIDER_URI")))
+    with open(Path('./contracts/compiled/CC_abi.json')) as f:
+        CC_abi = json.load(f)
+    contract = w3.eth.contract(address=os.getenv("SMART_CONTRACT_ADDRESS"), abi=CC_abi)
+    scanner = ChainScanner(w3, contract, workers=args.workers)
+    if args.reset:
+        scanner.reset()
+    found = scanner.scan(args.from_block, args.to_block,
+                         progress=lambda done, total: print(f"\r{done}/{total} ranges", end="", flush=True))
+    chain_df = scanner.ledger()
+    print(f"\n{found} new rows, {len(chain_df)} rows in the rebuilt ledger")
+
+    if args.command == "rebuild":
+        if args.csv:
+            chain_df.to_csv(args.csv)
+    else:
+        from ipfs import retrieve_block_df
+
+        ipfsHash = contract.functions.getIPFSHash().call()
+        ipfs_df = retrieve_block_df(ipfsHash) if ipfsHash else chain_df.iloc[0:0]
+        problems = diff_ledgers(chain_df, ipfs_df)
+        print(f"{len(ipfs_df)} rows in the IPFS ledger, {len(problems)} differences")
+        if not problems.empty:
+            print(problems.groupby(["Problem", "Column"], dropna=False).size().to_string())
+        if args.csv:
+            problems.to_csv(args.csv, index=False)
@@ -1,4 +1,5 @@
 pragma solidity ^0.5.0;
+pragma experimental ABIEncoderV2;
 
 import "github.com/OpenZeppelin/openzeppelin-contracts/blob/release-v2.5.0/contracts/math/SafeMath.sol";
 
@@ -7,175 +8,230 @@ contract CommunityConnect {
     // holds the ETH address of the main customer
     // allows the account owner to receive withdrawal payments at their Ethereum address
     address payable nonProfit = 0x6A11B707EcAE548501Ba9ab92a114C4b98378A08;
-    address payable supplier = 0x2c8e3e5EC4064612d4936970dc27e2d930f78245;
     // This Ethereum address will represent a third-party account that's authorized to receive withdrawal payments.
     address payable authorizedRecipient= 0x29f413f693525Cc5C7B9aBd8346F399641F2e852;
-    // holds the ETH address of the main customer
-    address payable accountOwner;
     // holds account balance
     uint256 public contractBalance;
-    // address for approved supplier who fills the request
-    address payable approvedSupplier;
-    string supplierLocation;
-    // request product info
-    string productName;
-    string productType;
-    uint256 productCount;
-    string requestStatus;
-    string requestLocation;
-    // cash request info
-    address payable cashRecipient;
-    uint256 cashRequested;
-    string cashRequestStatus;
-    // invoice data
-    uint256 invoiceNumber;
-    uint256 compensationRequested;
-    uint256 compensationApproved;
-    uint256 approvedInvoiceNumber;
-    //booleans
-    bool isOffer = false;
-    bool isApproved = false;
-    //bool isReceived = false;
-    bool invoicePaid = false;
     //IPFS hash string
     string IPFSHash;
 
+    // number of entries returned by each paginated view
+    uint256 constant PAGE_SIZE = 10;
+
+    // goods request info, keyed by request id
+    struct Request {
+        uint256 id;
+        address payable accountOwner;
+        string productName;
+        string productType;
+        uint256 productCount;
+        string requestLocation;
+        string requestStatus;
+    }
+
+    // supplier offer and invoice data, keyed by the id of the request it fills
+    struct FillOffer {
+        address payable supplier;
+        uint256 compensationRequested;
+        uint256 invoiceNumber;
+        bool isOffer;
+        bool isApproved;
+        bool invoicePaid;
+    }
+
+    // cash request info, keyed by cash request id
+    struct CashRequest {
+        uint256 id;
+        address payable cashRecipient;
+        uint256 cashRequested;
+        string cashRequestStatus;
+    }
+
+    // ids are handed out incrementally, the counts double as the next id
+    uint256 public requestCount;
+    uint256 public cashRequestCount;
+    mapping(uint256 => Request) requests;
+    mapping(uint256 => FillOffer) fillOffers;
+    mapping(uint256 => CashRequest) cashRequests;
+
     mapping(address => uint256) balances;
 
+    // events for every state change, so off-chain indexers can follow the contract through eth_getLogs
+    event Deposit(address indexed donor, uint256 amount, uint256 contractBalance);
+    event RequestRegistered(uint256 indexed requestId, address indexed accountOwner, string productName, string productType, uint256 productCount, string requestLocation);
+    event FillOffered(uint256 indexed requestId, address indexed supplier, uint256 compensation, uint256 invoiceNumber);
+    event FillApproved(uint256 indexed requestId, address indexed supplier, uint256 compensation, uint256 invoiceNumber);
+    event InvoicePaid(uint256 indexed requestId, address indexed supplier, uint256 invoiceNumber, uint256 amount);
+    event CashRequested(uint256 indexed cashRequestId, address indexed recipient, uint256 amount);
+    event CashSent(uint256 indexed cashRequestId, address indexed recipient, uint256 amount);
+
     // adds ETH to smart contract.  include `payable` modifer so contract accepts ETH that gets sent to this function
     // Donors can send Eth to contract
     function deposit(uint256 donation) public payable {
         require(msg.value == donation);
         contractBalance = address(this).balance;
+        emit Deposit(msg.sender, msg.value, contractBalance);
     }
-  
+
     // This function allows view of info
     /*function getInfo() view public returns(address, address payable, uint) {
         return (nonProfit, authorizedRecipient, contractBalance);
     }*/
-    
-    // This function allows Users to make requests to the contract
-    function registerRequest(address payable newAccountOwner, 
-        string memory newName, 
-        string memory newProductType, 
+
+    // This function allows Users to make requests to the contract, every call
+    // opens a new request instead of replacing the last one
+    function registerRequest(address payable newAccountOwner,
+        string memory newName,
+        string memory newProductType,
         uint256 newProductCount,
         string memory newRequestLocation
-        ) public {
-        accountOwner = newAccountOwner;
-        productName = newName;
-        productType = newProductType;
-        productCount = newProductCount;
-        requestLocation=newRequestLocation;
-        requestStatus = "Open";
-    }
-    
-    // This function allows Suppliers to see the requests made by Users
-    function viewRequest() view public returns ( 
-            address, 
-            string memory, 
-            string memory, 
-            uint256, 
+        ) public returns (uint256) {
+        uint256 requestId = requestCount;
+        requests[requestId] = Request(
+            requestId,
+            newAccountOwner,
+            newName,
+            newProductType,
+            newProductCount,
+            newRequestLocation,
+            "Open"
+        );
+        requestCount = requestCount.add(1);
+        emit RequestRegistered(requestId, newAccountOwner, newName, newProductType, newProductCount, newRequestLocation);
+        return requestId;
+    }
+
+    // This function allows Suppliers to see a request made by Users
+    function viewRequest(uint256 requestId) view public returns (
+            address,
+            string memory,
+            string memory,
+            uint256,
             string memory,
             string memory
         ) {
+        require(requestId < requestCount, "Request does not exist");
+        Request storage request = requests[requestId];
         return (
-            accountOwner, 
-            productName, 
-            productType, 
-            productCount, 
-            requestLocation,
-            requestStatus 
+            request.accountOwner,
+            request.productName,
+            request.productType,
+            request.productCount,
+            request.requestLocation,
+            request.requestStatus
         );
     }
 
-    
+    // Page of requests starting at `offset`, along with the total number of
+    // requests.  Slots past the end of the list are left empty
+    function viewRequests(uint256 offset) view public returns (Request[10] memory page, uint256 total) {
+        total = requestCount;
+        for (uint256 i = 0; i < PAGE_SIZE && offset + i < total; i++) {
+            page[i] = requests[offset + i];
+        }
+        return (page, total);
+    }
+
+
     // Just viewing the offer status of a request
     /*function getOfferStatus() view public returns(bool) {
         return isOffer;
     }*/
-    
+
     // This function is a check for Suppliers to call when they agree to fill the request
     function fillRequest(
-            address payable newSupplier, 
-            uint256 compensation, 
+            uint256 requestId,
+            address payable newSupplier,
+            uint256 compensation,
             uint256 newInvoiceNumber
             //string memory newSupplierLocation
         ) public returns (
-            address, 
-            uint256, 
+            address,
+            uint256,
             uint256
         ) {
-            isOffer = true;
-            supplier = newSupplier;
-            compensationRequested = compensation;
-            invoiceNumber = newInvoiceNumber;
-            requestStatus = "Fill Offered";
+            require(requestId < requestCount, "Request does not exist");
+            FillOffer storage offer = fillOffers[requestId];
+            require(offer.isApproved == false, "Request already has an approved offer");
+            offer.isOffer = true;
+            offer.supplier = newSupplier;
+            offer.compensationRequested = compensation;
+            offer.invoiceNumber = newInvoiceNumber;
+            requests[requestId].requestStatus = "Fill Offered";
             //supplierLocation = newSupplierLocation;
+            emit FillOffered(requestId, newSupplier, compensation, newInvoiceNumber);
 
-        return(supplier, compensationRequested, invoiceNumber);
+        return(offer.supplier, offer.compensationRequested, offer.invoiceNumber);
     }
-    
+
     // Users can view request fill offers
-    function viewFillOffer() view public returns (
-            address, 
-            uint256, 
-            uint256, 
-            string memory, 
-            string memory, 
+    function viewFillOffer(uint256 requestId) view public returns (
+            address,
+            uint256,
+            uint256,
+            string memory,
+            string memory,
             uint256
         ) {
-            require (isOffer == true, "No fill offers to view");
+            FillOffer storage offer = fillOffers[requestId];
+            require (offer.isOffer == true, "No fill offers to view");
+            Request storage request = requests[requestId];
         return (
-            supplier, 
-            compensationRequested, 
-            invoiceNumber, 
-            productName, 
-            productType, 
-            productCount
+            offer.supplier,
+            offer.compensationRequested,
+            offer.invoiceNumber,
+            request.productName,
+            request.productType,
+            request.productCount
         );
     }
 
     // non-profit can approve fillOffer here
-    function approveFillOffer() public {
+    function approveFillOffer(uint256 requestId) public {
         require(msg.sender == nonProfit, "You are not allowed to approve offers");
-        isApproved = true;
-        compensationApproved = compensationRequested;
-        approvedInvoiceNumber = invoiceNumber;
-        approvedSupplier = supplier;
-        requestStatus = "Fill Approved";
+        FillOffer storage offer = fillOffers[requestId];
+        require(offer.isOffer == true, "No fill offers to approve");
+        offer.isApproved = true;
+        requests[requestId].requestStatus = "Fill Approved";
+        emit FillApproved(requestId, offer.supplier, offer.compensationRequested, offer.invoiceNumber);
     }
 
 
     // This function allows the Nonprofit to see the invoice Suppliers have sent
-    function viewApprovedInvoice() view public returns(address, uint256, uint256) {
-        return (approvedSupplier, compensationApproved, approvedInvoiceNumber);
+    function viewApprovedInvoice(uint256 requestId) view public returns(address, uint256, uint256) {
+        FillOffer storage offer = fillOffers[requestId];
+        require(offer.isApproved == true, "Fill offer has not been approved!");
+        return (offer.supplier, offer.compensationRequested, offer.invoiceNumber);
     }
-    
+
     // user signifies they received the goods/service
     /*function userReceived() public {
         require (msg.sender == accountOwner || msg.sender == nonProfit, "You are not approved to receive this order");
         isReceived=true;
     }*/
-    
-    // view received status 
+
+    // view received status
     /*function getReceivedStatus() view public returns(bool) {
         return isReceived;
     }*/
 
-    // This function allows the Nonprofit to pay the Supplier, I think we should change this to the Nonprofit sends the money but it comes from contract 
+    // This function allows the Nonprofit to pay the Supplier, I think we should change this to the Nonprofit sends the money but it comes from contract
 
-    function payInvoice(uint256 invoiceNum, bool received) public payable {
+    function payInvoice(uint256 requestId, uint256 invoiceNum, bool received) public payable {
+        FillOffer storage offer = fillOffers[requestId];
         // require(recipient == approvedSupplier, "This address is not authorized to receive compensation!");
         // do we need this?
-        require (invoiceNum == approvedInvoiceNumber, "This invoice number has not been approved");
+        require (invoiceNum == offer.invoiceNumber, "This invoice number has not been approved");
         require(msg.sender == nonProfit, "You are not authorized to pay invoices");
-        require (isApproved == true, "Fill offer has not been approved!");
+        require (offer.isApproved == true, "Fill offer has not been approved!");
+        require (offer.invoicePaid == false, "This invoice has already been paid");
         require(received == true, "Order has not been received!");
-        require(compensationApproved <= address(this).balance, "Not enough money in contract to pay supplier");
-        approvedSupplier.transfer(compensationRequested);
-        contractBalance = contractBalance.sub(compensationApproved);
-        invoicePaid = true;
-        requestStatus = "Request Filled";
+        require(offer.compensationRequested <= address(this).balance, "Not enough money in contract to pay supplier");
+        offer.invoicePaid = true;
+        requests[requestId].requestStatus = "Request Filled";
+        offer.supplier.transfer(offer.compensationRequested);
+        contractBalance = contractBalance.sub(offer.compensationRequested);
+        emit InvoicePaid(requestId, offer.supplier, invoiceNum, offer.compensationRequested);
     }
 
 
@@ -191,27 +247,46 @@ contract CommunityConnect {
     /*function getPaidStatus() view public returns (bool) {
         return invoicePaid;
     }*/
-    function requestCash(address payable recipient, uint cashAmount) public {
+    function requestCash(address payable recipient, uint cashAmount) public returns (uint256) {
         require (recipient == authorizedRecipient, "You are not authorized to receive cash");
         require(cashAmount <= address(this).balance);
-        cashRecipient = recipient;
-        cashRequested = cashAmount;
-        cashRequestStatus = "open";
-    }    
-    
-    
-    function viewCashRequest() view public returns (address, uint256, string memory) {
-        return (cashRecipient, cashRequested, cashRequestStatus);
+        uint256 cashRequestId = cashRequestCount;
+        cashRequests[cashRequestId] = CashRequest(cashRequestId, recipient, cashAmount, "open");
+        cashRequestCount = cashRequestCount.add(1);
+        emit CashRequested(cashRequestId, recipient, cashAmount);
+        return cashRequestId;
+    }
+
+
+    function viewCashRequest(uint256 cashRequestId) view public returns (address, uint256, string memory) {
+        require(cashRequestId < cashRequestCount, "Cash request does not exist");
+        CashRequest storage cashRequest = cashRequests[cashRequestId];
+        return (cashRequest.cashRecipient, cashRequest.cashRequested, cashRequest.cashRequestStatus);
+    }
+
+    // Page of cash requests starting at `offset`, along with the total number of
+    // cash requests.  Slots past the end of the list are left empty
+    function viewCashRequests(uint256 offset) view public returns (CashRequest[10] memory page, uint256 total) {
+        total = cashRequestCount;
+        for (uint256 i = 0; i < PAGE_SIZE && offset + i < total; i++) {
+            page[i] = cashRequests[offset + i];
+        }
+        return (page, total);
     }
 
     // This function allows the nonprofit to send cash assistance to users
-    function sendCash(uint value, address payable recipient, address sender) public {
-        require(sender == nonProfit && recipient == authorizedRecipient, "The recipient address is not authorized!");
-        require(value <= address(this).balance, " The Non-Profit does not have the available funds at this time!");
-        recipient.transfer(value);
+    function sendCash(uint256 cashRequestId, address sender) public {
+        require(cashRequestId < cashRequestCount, "Cash request does not exist");
+        CashRequest storage cashRequest = cashRequests[cashRequestId];
+        require(sender == nonProfit && cashRequest.cashRecipient == authorizedRecipient, "The recipient address is not authorized!");
+        require(keccak256(bytes(cashRequest.cashRequestStatus)) == keccak256(bytes("open")), "This cash request is not open");
+        require(cashRequest.cashRequested <= address(this).balance, " The Non-Profit does not have the available funds at this time!");
+        cashRequest.cashRequestStatus = "paid";
+        cashRequest.cashRecipient.transfer(cashRequest.cashRequested);
         //contractBalance = address(this).balance;
-    }    
-    
+        emit CashSent(cashRequestId, cashRequest.cashRecipient, cashRequest.cashRequested);
+    }
+
     // accepts ETH even if it gets sent without using the `deposit` function
     function() external payable {}
-}
\ No newline at end of file
+}
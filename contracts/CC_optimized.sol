@@ -0,0 +1,348 @@
+pragma solidity ^0.5.0;
+pragma experimental ABIEncoderV2;
+
+// Storage-optimized CommunityConnect, meant to cost less gas per call.  Exposes
+// exactly the same functions, return types and events as CC.sol, so
+// contracts/compiled/CC_abi.json and the Python side work unchanged against
+// either deployment.  What changes is storage (the gasUsed difference is
+// measured by gas_report.py into contracts/GAS_REPORT.md):
+//
+//  * statuses are enums packed next to the owner address instead of strings
+//    rewritten on every state change; the offer flags (isOffer, isApproved,
+//    invoicePaid) are derived from the request status instead of stored
+//  * a request's owner, product count and status share one slot, product name
+//    and type are stored as bytes32 (at most 32 bytes each), and the request id
+//    is the mapping key rather than a stored field
+//  * an offer is two slots (supplier + compensation, invoice number), a cash
+//    request is one (recipient + amount + status)
+//  * the nonprofit and recipient addresses are constants, so permission checks
+//    do not read storage, and the contract balance is read from the chain
+//    rather than kept in a separate storage variable
+//  * both id counters share one slot and need no SafeMath
+//
+// The request location stays a string: viewRequest/viewRequests return it for
+// the supplier map, which a hash could not do.
+
+contract CommunityConnect {
+    address payable constant nonProfit = 0x6A11B707EcAE548501Ba9ab92a114C4b98378A08;
+    address payable constant authorizedRecipient = 0x29f413f693525Cc5C7B9aBd8346F399641F2e852;
+    //IPFS hash string
+    string IPFSHash;
+
+    // number of entries returned by each paginated view
+    uint256 constant PAGE_SIZE = 10;
+
+    enum RequestStatus { Open, FillOffered, FillApproved, Filled }
+    enum CashStatus { Open, Paid }
+
+    // storage layout of a goods request, keyed by request id
+    struct StoredRequest {
+        address payable accountOwner;
+        uint64 productCount;
+        RequestStatus status;
+        bytes32 productName;
+        bytes32 productType;
+        string requestLocation;
+    }
+
+    // supplier offer for the request with the same id
+    struct StoredOffer {
+        address payable supplier;
+        uint96 compensationRequested;
+        uint256 invoiceNumber;
+    }
+
+    struct StoredCashRequest {
+        address payable cashRecipient;
+        uint88 cashRequested;
+        CashStatus status;
+    }
+
+    // shapes returned by the paginated views, identical to CC.sol
+    struct Request {
+        uint256 id;
+        address payable accountOwner;
+        string productName;
+        string productType;
+        uint256 productCount;
+        string requestLocation;
+        string requestStatus;
+    }
+
+    struct CashRequest {
+        uint256 id;
+        address payable cashRecipient;
+        uint256 cashRequested;
+        string cashRequestStatus;
+    }
+
+    // ids are handed out incrementally, the counts double as the next id
+    uint128 requestTotal;
+    uint128 cashRequestTotal;
+    mapping(uint256 => StoredRequest) requests;
+    mapping(uint256 => StoredOffer) fillOffers;
+    mapping(uint256 => StoredCashRequest) cashRequests;
+
+    // events for every state change, so off-chain indexers can follow the contract through eth_getLogs
+    event Deposit(address indexed donor, uint256 amount, uint256 contractBalance);
+    event RequestRegistered(uint256 indexed requestId, address indexed accountOwner, string productName, string productType, uint256 productCount, string requestLocation);
+    event FillOffered(uint256 indexed requestId, address indexed supplier, uint256 compensation, uint256 invoiceNumber);
+    event FillApproved(uint256 indexed requestId, address indexed supplier, uint256 compensation, uint256 invoiceNumber);
+    event InvoicePaid(uint256 indexed requestId, address indexed supplier, uint256 invoiceNumber, uint256 amount);
+    event CashRequested(uint256 indexed cashRequestId, address indexed recipient, uint256 amount);
+    event CashSent(uint256 indexed cashRequestId, address indexed recipient, uint256 amount);
+
+    function contractBalance() view public returns (uint256) {
+        return address(this).balance;
+    }
+
+    function requestCount() view public returns (uint256) {
+        return requestTotal;
+    }
+
+    function cashRequestCount() view public returns (uint256) {
+        return cashRequestTotal;
+    }
+
+    // Donors can send Eth to contract
+    function deposit(uint256 donation) public payable {
+        require(msg.value == donation);
+        emit Deposit(msg.sender, msg.value, address(this).balance);
+    }
+
+    function registerRequest(address payable newAccountOwner,
+        string memory newName,
+        string memory newProductType,
+        uint256 newProductCount,
+        string memory newRequestLocation
+        ) public returns (uint256) {
+        require(newProductCount <= uint64(-1), "Product count too large");
+        uint256 requestId = requestTotal;
+        StoredRequest storage request = requests[requestId];
+        // Open is the zero value, so the status costs nothing to set
+        request.accountOwner = newAccountOwner;
+        request.productCount = uint64(newProductCount);
+        request.productName = toBytes32(newName);
+        request.productType = toBytes32(newProductType);
+        request.requestLocation = newRequestLocation;
+        requestTotal = uint128(requestId + 1);
+        emit RequestRegistered(requestId, newAccountOwner, newName, newProductType, newProductCount, newRequestLocation);
+        return requestId;
+    }
+
+    // This function allows Suppliers to see a request made by Users
+    function viewRequest(uint256 requestId) view public returns (
+            address,
+            string memory,
+            string memory,
+            uint256,
+            string memory,
+            string memory
+        ) {
+        require(requestId < requestTotal, "Request does not exist");
+        StoredRequest storage request = requests[requestId];
+        return (
+            request.accountOwner,
+            toString(request.productName),
+            toString(request.productType),
+            request.productCount,
+            request.requestLocation,
+            requestStatusName(request.status)
+        );
+    }
+
+    // Page of requests starting at `offset`, along with the total number of
+    // requests.  Slots past the end of the list are left empty
+    function viewRequests(uint256 offset) view public returns (Request[10] memory page, uint256 total) {
+        total = requestTotal;
+        for (uint256 i = 0; i < PAGE_SIZE && offset + i < total; i++) {
+            StoredRequest storage request = requests[offset + i];
+            page[i] = Request(
+                offset + i,
+                request.accountOwner,
+                toString(request.productName),
+                toString(request.productType),
+                request.productCount,
+                request.requestLocation,
+                requestStatusName(request.status)
+            );
+        }
+        return (page, total);
+    }
+
+    // This function is a check for Suppliers to call when they agree to fill the request
+    function fillRequest(
+            uint256 requestId,
+            address payable newSupplier,
+            uint256 compensation,
+            uint256 newInvoiceNumber
+        ) public returns (
+            address,
+            uint256,
+            uint256
+        ) {
+            require(requestId < requestTotal, "Request does not exist");
+            StoredRequest storage request = requests[requestId];
+            require(request.status <= RequestStatus.FillOffered, "Request already has an approved offer");
+            require(compensation <= uint96(-1), "Compensation too large");
+            fillOffers[requestId] = StoredOffer(newSupplier, uint96(compensation), newInvoiceNumber);
+            if (request.status != RequestStatus.FillOffered) {
+                request.status = RequestStatus.FillOffered;
+            }
+            emit FillOffered(requestId, newSupplier, compensation, newInvoiceNumber);
+
+        return(newSupplier, compensation, newInvoiceNumber);
+    }
+
+    // Users can view request fill offers
+    function viewFillOffer(uint256 requestId) view public returns (
+            address,
+            uint256,
+            uint256,
+            string memory,
+            string memory,
+            uint256
+        ) {
+            StoredRequest storage request = requests[requestId];
+            require(request.status >= RequestStatus.FillOffered, "No fill offers to view");
+            StoredOffer storage offer = fillOffers[requestId];
+        return (
+            offer.supplier,
+            offer.compensationRequested,
+            offer.invoiceNumber,
+            toString(request.productName),
+            toString(request.productType),
+            request.productCount
+        );
+    }
+
+    // non-profit can approve fillOffer here
+    function approveFillOffer(uint256 requestId) public {
+        require(msg.sender == nonProfit, "You are not allowed to approve offers");
+        StoredRequest storage request = requests[requestId];
+        require(request.status == RequestStatus.FillOffered, "No fill offers to approve");
+        request.status = RequestStatus.FillApproved;
+        StoredOffer storage offer = fillOffers[requestId];
+        emit FillApproved(requestId, offer.supplier, offer.compensationRequested, offer.invoiceNumber);
+    }
+
+    // This function allows the Nonprofit to see the invoice Suppliers have sent
+    function viewApprovedInvoice(uint256 requestId) view public returns(address, uint256, uint256) {
+        require(requests[requestId].status >= RequestStatus.FillApproved, "Fill offer has not been approved!");
+        StoredOffer storage offer = fillOffers[requestId];
+        return (offer.supplier, offer.compensationRequested, offer.invoiceNumber);
+    }
+
+    // This function allows the Nonprofit to pay the Supplier from the contract's funds
+    function payInvoice(uint256 requestId, uint256 invoiceNum, bool received) public payable {
+        StoredRequest storage request = requests[requestId];
+        StoredOffer storage offer = fillOffers[requestId];
+        require (invoiceNum == offer.invoiceNumber, "This invoice number has not been approved");
+        require(msg.sender == nonProfit, "You are not authorized to pay invoices");
+        require (request.status >= RequestStatus.FillApproved, "Fill offer has not been approved!");
+        require (request.status != RequestStatus.Filled, "This invoice has already been paid");
+        require(received == true, "Order has not been received!");
+        uint256 compensation = offer.compensationRequested;
+        address payable supplier = offer.supplier;
+        require(compensation <= address(this).balance, "Not enough money in contract to pay supplier");
+        request.status = RequestStatus.Filled;
+        supplier.transfer(compensation);
+        emit InvoicePaid(requestId, supplier, invoiceNum, compensation);
+    }
+
+    function updateIPFSHash(string memory newHash) public {
+        IPFSHash = newHash;
+    }
+
+    function getIPFSHash() view public returns (string memory) {
+        return (IPFSHash);
+    }
+
+    function requestCash(address payable recipient, uint cashAmount) public returns (uint256) {
+        require (recipient == authorizedRecipient, "You are not authorized to receive cash");
+        require(cashAmount <= address(this).balance);
+        require(cashAmount <= uint88(-1), "Cash amount too large");
+        uint256 cashRequestId = cashRequestTotal;
+        cashRequests[cashRequestId] = StoredCashRequest(recipient, uint88(cashAmount), CashStatus.Open);
+        cashRequestTotal = uint128(cashRequestId + 1);
+        emit CashRequested(cashRequestId, recipient, cashAmount);
+        return cashRequestId;
+    }
+
+    function viewCashRequest(uint256 cashRequestId) view public returns (address, uint256, string memory) {
+        require(cashRequestId < cashRequestTotal, "Cash request does not exist");
+        StoredCashRequest storage cashRequest = cashRequests[cashRequestId];
+        return (cashRequest.cashRecipient, cashRequest.cashRequested, cashStatusName(cashRequest.status));
+    }
+
+    // Page of cash requests starting at `offset`, along with the total number of
+    // cash requests.  Slots past the end of the list are left empty
+    function viewCashRequests(uint256 offset) view public returns (CashRequest[10] memory page, uint256 total) {
+        total = cashRequestTotal;
+        for (uint256 i = 0; i < PAGE_SIZE && offset + i < total; i++) {
+            StoredCashRequest storage cashRequest = cashRequests[offset + i];
+            page[i] = CashRequest(
+                offset + i,
+                cashRequest.cashRecipient,
+                cashRequest.cashRequested,
+                cashStatusName(cashRequest.status)
+            );
+        }
+        return (page, total);
+    }
+
+    // This function allows the nonprofit to send cash assistance to users
+    function sendCash(uint256 cashRequestId, address sender) public {
+        require(cashRequestId < cashRequestTotal, "Cash request does not exist");
+        StoredCashRequest storage cashRequest = cashRequests[cashRequestId];
+        address payable recipient = cashRequest.cashRecipient;
+        uint256 amount = cashRequest.cashRequested;
+        require(sender == nonProfit && recipient == authorizedRecipient, "The recipient address is not authorized!");
+        require(cashRequest.status == CashStatus.Open, "This cash request is not open");
+        require(amount <= address(this).balance, " The Non-Profit does not have the available funds at this time!");
+        cashRequest.status = CashStatus.Paid;
+        recipient.transfer(amount);
+        emit CashSent(cashRequestId, recipient, amount);
+    }
+
+    function requestStatusName(RequestStatus status) internal pure returns (string memory) {
+        if (status == RequestStatus.Open) return "Open";
+        if (status == RequestStatus.FillOffered) return "Fill Offered";
+        if (status == RequestStatus.FillApproved) return "Fill Approved";
+        return "Request Filled";
+    }
+
+    function cashStatusName(CashStatus status) internal pure returns (string memory) {
+        return status == CashStatus.Open ? "open" : "paid";
+    }
+
+    // Left-aligned bytes32 copy of a string of at most 32 bytes
+    function toBytes32(string memory source) internal pure returns (bytes32 result) {
+        bytes memory raw = bytes(source);
+        require(raw.length <= 32, "Product name and type are limited to 32 bytes");
+        if (raw.length == 0) {
+            return 0x0;
+        }
+        assembly {
+            result := mload(add(raw, 32))
+        }
+        // clear whatever follows the string in memory
+        result &= bytes32(~(uint256(-1) >> (8 * raw.length)));
+    }
+
+    // Inverse of toBytes32, the string ends at the first zero byte
+    function toString(bytes32 source) internal pure returns (string memory) {
+        uint256 length = 0;
+        while (length < 32 && source[length] != 0) {
+            length++;
+        }
+        bytes memory result = new bytes(length);
+        for (uint256 i = 0; i < length; i++) {
+            result[i] = source[i];
+        }
+        return string(result);
+    }
+
+    // accepts ETH even if it gets sent without using the `deposit` function
+    function() external payable {}
+}
@@ -0,0 +1,222 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+import pandas as pd
+from eth_utils import event_abi_to_log_topic
+from web3 import Web3
+from dotenv import load_dotenv
+load_dotenv()
+
+# Indexer for the events emitted by CC.sol.  Logs are pulled with eth_getLogs
+# over block ranges that grow while the node answers quickly and shrink when a
+# range fails (too many results, timeouts).  Every decoded event is stored in a
+# local SQLite view together with the last indexed block, so a restart picks up
+# where it left off and history queries never touch the IPFS ledger.
+
+DB_PATH = os.getenv("EVENT_DB_PATH", "events.db")
+# blocks to stay behind the head, protects against short reorgs on real networks
+CONFIRMATIONS = int(os.getenv("EVENT_CONFIRMATIONS", "0"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    event TEXT NOT NULL,
+    actor TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_event ON events (event, block_number);
+CREATE INDEX IF NOT EXISTS events_actor ON events (actor COLLATE NOCASE, block_number);
+CREATE INDEX IF NOT EXISTS events_tx_hash ON events (tx_hash);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    contract TEXT PRIMARY KEY,
+    last_block INTEGER NOT NULL
+);
+"""
+
+
+class EventIndexer:
+    def __init__(self, w3, contract, path=DB_PATH, start_block=0, min_range=1, max_range=10000):
+        self.w3 = w3
+        self.contract = contract
+        self.start_block = start_block
+        self.min_range = min_range
+        self.max_range = max_range
+        self.range = min(2000, max_range)
+        # lock guards the connection, sync_lock keeps a single sync in flight
+        self.lock = threading.Lock()
+        self.sync_lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        # topic0 -> contract event class, for decoding raw logs
+        self.topics = {
+            event_abi_to_log_topic(abi): getattr(contract.events, abi["name"])
+            for abi in contract.abi if abi["type"] == "event"
+        }
+
+    def last_block(self):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT last_block FROM checkpoint WHERE contract = ?", (self.contract.address,)
+            ).fetchone()
+        return row[0] if row else self.start_block - 1
+
+    def _decode(self, log):
+        event = self.topics.get(bytes(log["topics"][0])) if log["topics"] else None
+        if event is None:
+            return None
+        decoded = event().processLog(log)
+        args = dict(decoded["args"])
+        # first address argument is the indexed actor for every CC.sol event
+        actor = next((v for v in args.values() if isinstance(v, str) and Web3.isAddress(v)), None)
+        return (
+            decoded["blockNumber"],
+            decoded["logIndex"],
+            decoded["transactionHash"].hex(),
+            decoded["event"],
+            actor,
+            json.dumps(args),
+        )
+
+    def _store(self, rows, to_block):
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?)", rows)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (?, ?)", (self.contract.address, to_block)
+            )
+
+    # Indexes every block between the checkpoint and the safe head, returns the
+    # number of events stored.  Pass `block_number` when the chain head is
+    # already known (e.g. ViewCache.block_number) to skip the RPC
+    def sync(self, block_number=None):
+        with self.sync_lock:
+            if block_number is None:
+                block_number = self.w3.eth.block_number
+            head = block_number - CONFIRMATIONS
+            from_block = self.last_block() + 1
+            stored = 0
+            while from_block <= head:
+                to_block = min(from_block + self.range - 1, head)
+                try:
+                    logs = self.w3.eth.get_logs({
+                        "address": self.contract.address,
+                        "fromBlock": from_block,
+                        "toBlock": to_block,
+                    })
+                except Exception:
+                    if self.range <= self.min_range:
+                        raise
+                    self.range = max(self.range // 2, self.min_range)
+                    continue
+
+                rows = [row for row in map(self._decode, logs) if row is not None]
+                self._store(rows, to_block)
+                stored += len(rows)
+                from_block = to_block + 1
+                # sparse ranges are cheap, widen the next one
+                if len(logs) < 1000:
+                    self.range = min(self.range * 2, self.max_range)
+            return stored
+
+    # Indexed history lookup, newest first
+    def query(self, event=None, actor=None, from_block=None, to_block=None, limit=100, offset=0):
+        clauses, params = [], []
+        if event is not None:
+            clauses.append("event = ?")
+            params.append(event)
+        if actor is not None:
+            clauses.append("actor = ? COLLATE NOCASE")
+            params.append(actor)
+        if from_block is not None:
+            clauses.append("block_number >= ?")
+            params.append(from_block)
+        if to_block is not None:
+            clauses.append("block_number <= ?")
+            params.append(to_block)
+        sql = "SELECT * FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?"
+        params.extend([limit, offset])
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        df = pd.DataFrame.from_records(
+            rows, columns=["Block", "Log Index", "Tx Hash", "Event", "Actor", "Args"]
+        )
+        df["Args"] = df["Args"].map(json.loads)
+        return df
+
+    # Most recent args of `event`, the local equivalent of the contract's view calls
+    def latest(self, event):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT args FROM events WHERE event = ? ORDER BY block_number DESC, log_index DESC LIMIT 1",
+                (event,),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Name of the first event emitted by each of `tx_hashes`, as {tx_hash: event}
+    def events_for(self, tx_hashes):
+        tx_hashes = list(tx_hashes)
+        found = {}
+        with self.lock:
+            for start in range(0, len(tx_hashes), 500):
+                chunk = tx_hashes[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT tx_hash, event FROM events WHERE tx_hash IN ({','.join('?' * len(chunk))}) "
+                    "ORDER BY block_number DESC, log_index DESC",
+                    chunk,
+                ).fetchall()
+                # newest log first, so the first log of each transaction is written last
+                for tx_hash, event in rows:
+                    found[tx_hash] = event
+        return found
+
+    # (block number, index of its first log) of each of `tx_hashes` that emitted
+    # an event, as {tx_hash: (block_number, log_index)}.  Log indexes count up
+    # through the block, so they order transactions within it
+    def positions_for(self, tx_hashes):
+        tx_hashes = list(tx_hashes)
+        found = {}
+        with self.lock:
+            for start in range(0, len(tx_hashes), 500):
+                chunk = tx_hashes[start:start + 500]
+                rows = self.conn.execute(
+                    f"SELECT tx_hash, block_number, MIN(log_index) FROM events WHERE tx_hash IN ({','.join('?' * len(chunk))}) "
+                    "GROUP BY tx_hash, block_number",
+                    chunk,
+                ).fetchall()
+                for tx_hash, block_number, log_index in rows:
+                    found[tx_hash] = (block_number, log_index)
+        return found
+
+    # Name of the first contract event in a mined receipt's logs, or None
+    def receipt_event(self, receipt):
+        for log in receipt["logs"]:
+            event = self.topics.get(bytes(log["topics"][0])) if log["topics"] else None
+            if event is not None:
+                return event.event_name
+        return None
+
+    # Keeps the view up to date until interrupted
+    def follow(self, interval=2.0):
+        while True:
+            self.sync()
+            time.sleep(interval)
+
+
+if __name__ == "__main__":
+    from pathlib import Path
+    import http_session
+
+    w3 = Web3(http_session.web3_provider(os.getenv("WEB3_PROVIDER_URI")))
+    with open(Path('./contracts/compiled/CC_abi.json')) as f:
+        CC_abi = json.load(f)
+    contract = w3.eth.contract(address=os.getenv("SMART_CONTRACT_ADDRESS"), abi=CC_abi)
+    indexer = EventIndexer(w3, contract)
+    print(f"indexed {indexer.sync()} events up to block {indexer.last_block()}")
@@ -0,0 +1,78 @@
+import sys
+import argparse
+import tempfile
+import statistics
+
+import benchmark
+
+# gasUsed comparison between CC.sol and the storage-optimized CC_optimized.sol.
+# Both contracts share one ABI, so each is deployed on its own fresh in-process
+# chain and driven through the same benchmark workflows, and the mean gasUsed
+# per function is compared side by side.
+#
+#   python gas_report.py                             print the table
+#   python gas_report.py --out contracts/GAS_REPORT.md
+#
+# Needs the same setup as benchmark.py.  Bytecode missing from contracts/compiled
+# is compiled from the contract source, see benchmark.load_bytecode.
+
+VARIANTS = [
+    ("CC.sol", "contracts/CC.sol", benchmark.BYTECODE_PATH),
+    ("CC_optimized.sol", "contracts/CC_optimized.sol", "contracts/compiled/CC_optimized_bytecode.json"),
+]
+
+
+# {function: [gasUsed, ...]} for one contract variant
+def measure(source, bytecode_path, runs):
+    timings = benchmark.Timings()
+    w3, contract, accounts, keys = benchmark.start_chain(benchmark.load_bytecode(bytecode_path, source), source, timings)
+    bench = benchmark.Bench(w3, contract, accounts, keys, timings, tempfile.mkdtemp(prefix="cc-gas-report-"))
+    for n in range(runs):
+        bench.workflows(n)
+    bench.close()
+    return timings.gas
+
+
+def markdown(results):
+    (baseline_name, baseline), (optimized_name, optimized) = results
+    lines = [
+        f"| function | calls | {baseline_name} | {optimized_name} | saved | saved % |",
+        "|---|---:|---:|---:|---:|---:|",
+    ]
+    for fn_name in sorted(set(baseline) | set(optimized)):
+        before = statistics.fmean(baseline[fn_name]) if baseline.get(fn_name) else None
+        after = statistics.fmean(optimized[fn_name]) if optimized.get(fn_name) else None
+        calls = len(baseline.get(fn_name) or optimized.get(fn_name))
+        if before is None or after is None:
+            lines.append(f"| {fn_name} | {calls} | {before or '-'} | {after or '-'} | - | - |")
+            continue
+        lines.append(
+            f"| {fn_name} | {calls} | {before:,.0f} | {after:,.0f} | {before - after:,.0f} | {(before - after) / before:.1%} |"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare gasUsed per function between CC.sol and CC_optimized.sol")
+    parser.add_argument("--runs", type=int, default=3, help="times to run every workflow on each contract")
+    parser.add_argument("--baseline", default=VARIANTS[0][2], help="bytecode of CC.sol")
+    parser.add_argument("--optimized", default=VARIANTS[1][2], help="bytecode of CC_optimized.sol")
+    parser.add_argument("--out", help="also write the markdown table to this file")
+    args = parser.parse_args(argv)
+
+    services = benchmark.FakeServices().start()
+    benchmark.configure(services, tempfile.mkdtemp(prefix="cc-gas-report-"))
+    results = []
+    for (name, source, _), bytecode_path in zip(VARIANTS, (args.baseline, args.optimized)):
+        results.append((name, measure(source, bytecode_path, args.runs)))
+    services.stop()
+
+    table = markdown(results)
+    sys.stdout.write(table)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(f"# gasUsed per function, mean of {args.runs} workflow runs\n\n{table}")
+
+
+if __name__ == "__main__":
+    main()
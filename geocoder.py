@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+import http_session
+import metrics
+from dotenv import load_dotenv
+load_dotenv()
+
+# Geocoding service for request and product locations.  Addresses are
+# normalized before lookup and every result is kept in a local SQLite cache,
+# so an address is only ever sent to Mapbox once.  A json fixture can stand in
+# for Mapbox when running offline.
+
+DB_PATH = os.getenv("GEOCODE_DB_PATH", "geocode.db")
+MAX_WORKERS = int(os.getenv("GEOCODE_WORKERS", "8"))
+MAPBOX_TOKEN = os.getenv("MAPBOX_ACCESS_TOKEN")
+MAPBOX_API_URL = os.getenv("MAPBOX_API_URL", "https://api.mapbox.com")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address TEXT PRIMARY KEY,
+    latitude REAL NOT NULL,
+    longitude REAL NOT NULL,
+    fetched_at REAL NOT NULL
+);
+"""
+
+
+# Lower case, punctuation dropped and whitespace collapsed, so "123 Main St.,
+# Phoenix AZ" and "123 main st phoenix  az" share a cache entry
+def normalize_address(address):
+    address = re.sub(r"[^\w\s#-]", " ", str(address).lower())
+    return " ".join(address.split())
+
+
+# Mapbox places lookup, returns (latitude, longitude) or None when nothing matches
+class MapboxProvider:
+    def __init__(self, token=MAPBOX_TOKEN, endpoint="mapbox.places", api_url=MAPBOX_API_URL):
+        self.token = token
+        self.endpoint = endpoint
+        self.api_url = api_url
+
+    def __call__(self, address):
+        response = http_session.get(
+            url=f'{self.api_url}/geocoding/v5/{self.endpoint}/{quote(address)}.json',
+            params={"access_token": self.token, "limit": 1},
+        ).json()
+        if not response.get('features'):
+            return None
+        longitude, latitude = response['features'][0]['center']
+        return latitude, longitude
+
+
+# Offline provider backed by a json file of {"address": [latitude, longitude]}
+class FixtureProvider:
+    def __init__(self, path):
+        with open(path) as f:
+            fixture = json.load(f)
+        self.locations = {normalize_address(k): tuple(v) for k, v in fixture.items()}
+
+    def __call__(self, address):
+        return self.locations.get(normalize_address(address))
+
+
+class Geocoder:
+    def __init__(self, provider, path=DB_PATH, max_workers=MAX_WORKERS):
+        self.provider = provider
+        self.max_workers = max_workers
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def cached(self, address):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT latitude, longitude FROM geocodes WHERE address = ?", (normalize_address(address),)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def _lookup(self, key):
+        with metrics.span("geocode", provider=type(self.provider).__name__):
+            return self.provider(key)
+
+    def _store(self, key, location):
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)", (key, location[0], location[1], time.time())
+            )
+
+    # (latitude, longitude) for `address`, or None if the provider has no match
+    def geocode(self, address):
+        location = self.cached(address)
+        metrics.inc("cache_total", cache="geocode", result="miss" if location is None else "hit")
+        if location is not None:
+            return location
+        key = normalize_address(address)
+        location = self._lookup(key)
+        if location is not None:
+            self._store(key, location)
+        return location
+
+    # Resolves many addresses at once.  Cached addresses are answered locally and
+    # the rest are looked up concurrently, each distinct address only once.
+    # Returns {address: (latitude, longitude) or None}
+    def geocode_many(self, addresses):
+        results = {}
+        pending = {}
+        for address in addresses:
+            location = self.cached(address)
+            metrics.inc("cache_total", cache="geocode", result="miss" if location is None else "hit")
+            if location is not None:
+                results[address] = location
+            else:
+                pending.setdefault(normalize_address(address), []).append(address)
+
+        if pending:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(pending))) as pool:
+                for key, location in zip(pending, pool.map(self._lookup, pending)):
+                    if location is not None:
+                        self._store(key, location)
+                    for address in pending[key]:
+                        results[address] = location
+        return results
+
+
+def _default_provider():
+    fixture = os.getenv("GEOCODE_FIXTURE")
+    if fixture:
+        return FixtureProvider(fixture)
+    return MapboxProvider()
+
+
+geocoder = None
+_geocoder_lock = threading.Lock()
+
+# Process-wide geocoder, created on first use
+def get_geocoder():
+    global geocoder
+    with _geocoder_lock:
+        if geocoder is None:
+            geocoder = Geocoder(_default_provider())
+    return geocoder
+
+
+def geocode(address):
+    return get_geocoder().geocode(address)
+
+
+def geocode_many(addresses):
+    return get_geocoder().geocode_many(addresses)
@@ -0,0 +1,177 @@
+import os
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from dotenv import load_dotenv
+load_dotenv()
+
+# Shared HTTP layer for the node, Pinata, the IPFS gateways and Mapbox.  One
+# pooled keep-alive session is reused by every caller, so repeat requests skip
+# the TCP and TLS handshakes.  Throttling (429) and gateway errors (5xx) are
+# retried with jittered exponential backoff, honouring Retry-After, and every
+# request gets a timeout chosen by host so a stalled service cannot hang a
+# worker.
+
+POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "16"))
+RETRIES = int(os.getenv("HTTP_RETRIES", "3"))
+BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.3"))
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+# (connect, read) timeouts in seconds.  Pinning uploads the ledger and is given
+# the most time, gateway reads are raced so a slow one can be abandoned early
+DEFAULT_TIMEOUT = (5, 30)
+HOST_TIMEOUTS = {
+    "api.pinata.cloud": (5, 60),
+    "gateway.pinata.cloud": (5, 20),
+    "ipfs.io": (5, 20),
+    "cloudflare-ipfs.com": (5, 20),
+    "api.mapbox.com": (3, 10),
+}
+
+# Public gateways tried together by race_get, any of them can serve any CID
+IPFS_GATEWAYS = [
+    gateway.strip()
+    for gateway in os.getenv(
+        "IPFS_GATEWAYS", "https://gateway.pinata.cloud/ipfs/,https://ipfs.io/ipfs/,https://cloudflare-ipfs.com/ipfs/"
+    ).split(",")
+    if gateway.strip()
+]
+
+
+def timeout_for(url):
+    return HOST_TIMEOUTS.get(urlsplit(url).hostname, DEFAULT_TIMEOUT)
+
+
+# Exponential backoff with full jitter, so workers that failed together do not
+# all come back at the same moment
+class JitteredRetry(Retry):
+    def get_backoff_time(self):
+        backoff = super().get_backoff_time()
+        return random.uniform(0, backoff) if backoff else 0
+
+
+# Session that fills in the per-host timeout when the caller does not give one
+class PooledSession(requests.Session):
+    def request(self, method, url, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = timeout_for(url)
+        return super().request(method, url, **kwargs)
+
+
+def make_session(pool_size=POOL_SIZE, retries=RETRIES, backoff=BACKOFF):
+    retry = JitteredRetry(
+        total=retries,
+        connect=retries,
+        # a read error on a POST may mean the request was processed, leave
+        # those to the caller (nonce manager, gateway race) instead
+        read=0,
+        status=retries,
+        status_forcelist=RETRY_STATUSES,
+        # urllib3's default idempotent methods only: the web3 provider shares
+        # this session and a replayed eth_sendTransaction is signed again with
+        # a new nonce.  POSTs that are safe to resend use post_idempotent
+        backoff_factor=backoff,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = PooledSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+session = None
+_session_lock = threading.Lock()
+_race_pool = None
+
+# Process-wide session, created on first use
+def get_session():
+    global session
+    with _session_lock:
+        if session is None:
+            session = make_session()
+    return session
+
+
+def get(url, **kwargs):
+    return get_session().get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return get_session().post(url, **kwargs)
+
+
+# POST that may be sent again when throttled (429) or failed (5xx), for
+# content-addressed uploads such as Pinata pins.  Honours Retry-After and
+# otherwise backs off with full jitter
+def post_idempotent(url, retries=RETRIES, backoff=BACKOFF, **kwargs):
+    for attempt in range(retries + 1):
+        response = post(url, **kwargs)
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        retry_after = response.headers.get("Retry-After", "")
+        time.sleep(float(retry_after) if retry_after.isdigit() else random.uniform(0, backoff * 2 ** attempt))
+
+
+# Web3 HTTP provider that sends its JSON-RPC calls over the shared session
+def web3_provider(endpoint_uri):
+    from web3 import HTTPProvider
+
+    return HTTPProvider(endpoint_uri, request_kwargs={"timeout": timeout_for(endpoint_uri)}, session=get_session())
+
+
+class AllGatewaysFailed(Exception):
+    pass
+
+
+# GETs every url at once and returns parse(response) for the first response that
+# parses, i.e. the fastest gateway wins and slow or broken ones are ignored.
+# `parse` should raise on an invalid body, by default the body must be json
+def race_get(urls, parse=lambda response: response.json(), **kwargs):
+    global _race_pool
+    with _session_lock:
+        if _race_pool is None:
+            _race_pool = ThreadPoolExecutor(max_workers=POOL_SIZE, thread_name_prefix="race_get")
+
+    def fetch(url):
+        response = get(url, **kwargs)
+        response.raise_for_status()
+        return parse(response)
+
+    pending = {_race_pool.submit(fetch, url): url for url in urls}
+    errors = {}
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            url = pending.pop(future)
+            try:
+                result = future.result()
+            except Exception as e:
+                errors[url] = e
+                continue
+            # losers keep running in the pool but nobody waits for them
+            for other in pending:
+                other.cancel()
+            return result
+    raise AllGatewaysFailed(errors)
+
+
+# Reads a CID from whichever IPFS gateway answers first
+def ipfs_get_json(cid, gateways=None):
+    return race_get([f"{gateway}{cid}" for gateway in (gateways or IPFS_GATEWAYS)])
+
+
+# Raw body of `cid` from the fastest gateway, for pinned files that are not json
+def ipfs_get_bytes(cid, gateways=None):
+    def parse(response):
+        if not response.content:
+            raise ValueError("empty response")
+        return response.content
+
+    return race_get([f"{gateway}{cid}" for gateway in (gateways or IPFS_GATEWAYS)], parse=parse)
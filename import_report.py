@@ -0,0 +1,84 @@
+import re
+import sys
+import subprocess
+
+# Import-time report for the Streamlit pages.  Each page module is imported in a
+# fresh interpreter with `-X importtime`, so the numbers are what a cold start of
+# that page costs, and the slowest modules are listed so regressions are easy to
+# pin on a dependency.
+#
+# `--compare` sets every page against the eager layout app.py had before the
+# split, where all pages (and so all their dependencies) were imported up front:
+# the eager column imports every page module in one interpreter, the lazy column
+# only the page being opened.  Only cold imports are measured; on a Streamlit
+# rerun modules are already loaded, so reruns cost the same in both layouts and
+# are not part of this report.
+#
+#   python import_report.py            every page
+#   python import_report.py goods 20   one page, top 20 modules
+#   python import_report.py --compare  eager vs lazy cold import per page
+
+from app_pages import PAGES
+
+LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s*(\S+)")
+
+
+# [(module, self_us, cumulative_us)] for `import <module>` in a new interpreter,
+# `module` may be a comma separated list
+def import_times(module):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        errors = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        raise RuntimeError(f"importing {module} failed:\n" + "\n".join(errors[-10:]))
+    times = []
+    for match in LINE.finditer(result.stderr):
+        self_us, cumulative_us, name = match.groups()
+        times.append((name, int(self_us), int(cumulative_us)))
+    return times
+
+
+def report(page, top=10):
+    module = f"app_pages.{page}"
+    times = import_times(module)
+    total = sum(self_us for _, self_us, _ in times)
+    print(f"{module}: {total / 1000:.1f} ms total, {len(times)} modules")
+    for name, self_us, cumulative_us in sorted(times, key=lambda t: -t[2])[:top]:
+        print(f"    {cumulative_us / 1000:9.1f} ms cumulative  {self_us / 1000:8.1f} ms self  {name}")
+
+
+def total_ms(module):
+    return sum(self_us for _, self_us, _ in import_times(module)) / 1000
+
+
+# Cold start of each page, every page imported up front (before the split)
+# against only that page (after).  The two are run alternately and the best of
+# `repeat` runs is kept, so machine noise hits both columns alike
+def compare(repeat=5):
+    modules = [f"app_pages.{page}" for page in PAGES.values()]
+    print(f"{'page':<28}{'eager ms':>10}{'lazy ms':>10}{'saved':>8}")
+    for label, module in zip(PAGES, modules):
+        eager, lazy = [], []
+        for _ in range(repeat):
+            eager.append(total_ms(", ".join(modules)))
+            lazy.append(total_ms(module))
+        eager, lazy = min(eager), min(lazy)
+        print(f"{label:<28}{eager:>10.1f}{lazy:>10.1f}{1 - lazy / eager:>8.0%}")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["--compare"]:
+        try:
+            compare()
+        except RuntimeError as e:
+            print(e)
+        sys.exit()
+    pages = [sys.argv[1]] if len(sys.argv) > 1 else list(PAGES.values())
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    for page in pages:
+        try:
+            report(page, top)
+        except RuntimeError as e:
+            print(e)
@@ -1,11 +1,18 @@
 # %%
 import pandas as pd
-import requests
+import http_session
+import metrics
 import json
 import os
+import threading
+from io import StringIO
 from dotenv import load_dotenv
 load_dotenv()
 from pathlib import Path
+from ledger_cache import get_cache
+import ledger_codec
+
+PINATA_API_URL = os.getenv("PINATA_API_URL", "https://api.pinata.cloud")
 
 headers = {
     "Content-Type": "application/json",
@@ -13,47 +20,192 @@ headers = {
     "pinata_secret_api_key": os.getenv("PINATA_SECRET_API_KEY"),
 }
 
+# The ledger is stored on IPFS as a chain of segments.  Each segment holds only
+# the rows added by one update plus the CID of the previous segment, so a write
+# costs O(new rows) instead of re-pinning the whole history.  Every
+# LEDGER_COMPACT_EVERY segments the full ledger is pinned again as a checkpoint
+# so readers never have to walk more than that many segments.
+SEGMENT_FORMAT = "cc-ledger-segment"
+SEGMENT_VERSION = 1
+COMPACT_EVERY = int(os.getenv("LEDGER_COMPACT_EVERY", "16"))
+# New segments are pinned as zstd parquet files (see ledger_codec) when pyarrow
+# is installed, otherwise as json.  Readers accept both
+PIN_FORMAT = os.getenv("LEDGER_PIN_FORMAT", "parquet" if ledger_codec.available else "json")
+
+# tx hashes this process has already published, so re-sent session history
+# does not get pinned twice
+_published = set()
+# updates run on background workers, only one may move the ledger head at a time
+_update_lock = threading.Lock()
+# (head CID, DataFrame) of the most recently resolved ledger.  Only the latest
+# head is kept: every head resolves to the full history, so caching each one
+# would store the whole ledger again on every update
+_resolved = (None, None)
+_resolved_lock = threading.Lock()
+
 def convert_df_to_json(dataframe):
     json_data = dataframe.to_json(orient='split')
     data = {"pinataOptions": {"cidVersion": 1}, "pinataContent": json_data}
     return json.dumps(data)
 
+# Header fields of a segment, the rows are stored alongside
+def segment_header(prev, checkpoint, depth):
+    return {"format": SEGMENT_FORMAT, "version": SEGMENT_VERSION, "prev": prev, "checkpoint": checkpoint, "depth": depth}
+
+def convert_segment_to_json(dataframe, prev, checkpoint, depth):
+    segment = dict(segment_header(prev, checkpoint, depth), rows=dataframe.to_json(orient='split'))
+    data = {"pinataOptions": {"cidVersion": 1}, "pinataContent": segment}
+    return json.dumps(data)
+
+def pin_file_to_ipfs(data, name):
+    with metrics.span("ipfs_pin"):
+        # pins are content addressed, a throttled or failed upload is safe to resend
+        r = http_session.post_idempotent(
+            f"{PINATA_API_URL}/pinning/pinFileToIPFS",
+            files={"file": (name, data, "application/octet-stream")},
+            data={"pinataOptions": json.dumps({"cidVersion": 1})},
+            headers={k: v for k, v in headers.items() if k != "Content-Type"},
+        )
+    r.raise_for_status()
+    return r.json()["IpfsHash"]
+
+# Pins one ledger segment in PIN_FORMAT and returns its CID
+def pin_segment(dataframe, prev, checkpoint, depth):
+    if PIN_FORMAT == "parquet":
+        data = ledger_codec.encode(dataframe, segment_header(prev, checkpoint, depth))
+        return pin_file_to_ipfs(data, "ledger-segment.parquet")
+    return pin_json_to_ipfs(convert_segment_to_json(dataframe, prev, checkpoint, depth))
+
 def pin_json_to_ipfs(json):
-    r = requests.post(
-        "https://api.pinata.cloud/pinning/pinJSONToIPFS",
-        data=json,
-        headers=headers
-    )
-    print(r.json())
+    with metrics.span("ipfs_pin"):
+        r = http_session.post_idempotent(
+            f"{PINATA_API_URL}/pinning/pinJSONToIPFS",
+            data=json,
+            headers=headers
+        )
     ipfs_hash = r.json()["IpfsHash"]
     return ipfs_hash
 
+# Legacy json rows.  The balance is read as a string, type inference would turn
+# wei amounts into lossy floats
+def rows_to_df(rows):
+    return pd.read_json(StringIO(rows), typ='frame', orient='split', dtype={'Contract Balance': str})
+
+# Fetches a single segment from whichever gateway answers first and returns
+# (header, rows DataFrame).  Binary segments are detected by their magic bytes,
+# anything else is json.  Ledgers pinned before segmenting are a bare
+# split-json string and are treated as a checkpoint holding the full history
+def retrieve_segment(ipfs_hash):
+    with metrics.span("ipfs_get"):
+        data = http_session.ipfs_get_bytes(ipfs_hash)
+    if ledger_codec.is_binary(data):
+        with metrics.span("ledger_decode", format="parquet"):
+            return ledger_codec.decode(data)
+    with metrics.span("ledger_decode", format="json"):
+        response = json.loads(data)
+        if isinstance(response, dict) and response.get("format") == SEGMENT_FORMAT:
+            segment = response
+        else:
+            segment = dict(segment_header(None, True, 0), version=0, rows=response)
+        return segment, rows_to_df(segment.pop("rows"))
+
+# Segment rows plus metadata, served from the local CID cache when possible
+def load_segment(ipfs_hash):
+    cache = get_cache()
+    cached = cache.get(f"segment-{ipfs_hash}")
+    metrics.inc("cache_total", cache="segment", result="miss" if cached is None else "hit")
+    if cached is not None:
+        return cached[1], cached[0]
+
+    segment, df = retrieve_segment(ipfs_hash)
+    cache.put(f"segment-{ipfs_hash}", df, segment)
+    return segment, df
+
+# Rows added to the ledger since the head `since`, newest first: walks back from
+# `ipfs_hash` until it reaches `since` or the nearest checkpoint, whichever
+# comes first.  A checkpoint holds the full history, so rows older than `since`
+# can still be returned when the chain was compacted in between; with `since`
+# None this is the whole ledger
+def retrieve_ledger_since(ipfs_hash, since=None):
+    frames = []
+    cid = ipfs_hash
+    while cid and cid != since:
+        segment, segment_df = load_segment(cid)
+        frames.append(segment_df)
+        if segment["checkpoint"]:
+            break
+        cid = segment["prev"]
+    if not frames:
+        return pd.DataFrame()
+
+    df = pd.concat(frames)
+    return df[~df.index.duplicated(keep='first')]
+
+# Resolves the full ledger by walking back from the head segment until the
+# nearest checkpoint, newest rows first.  Segments come from the CID cache, so
+# after an update only the new head segment is downloaded; the latest resolved
+# ledger is kept in memory so viewing it again does not fold the chain again.
+# Returns a copy, callers are free to modify it
 def retrieve_block_df(ipfs_hash):
-    response = requests.get(f'https://gateway.pinata.cloud/ipfs/{ipfs_hash}').json()
-    df = pd.read_json(response, typ='frame', orient='split')
+    global _resolved
+    with _resolved_lock:
+        resolved_hash, resolved_df = _resolved
+    metrics.inc("cache_total", cache="ledger", result="hit" if resolved_hash == ipfs_hash else "miss")
+    if resolved_hash == ipfs_hash:
+        return resolved_df.copy()
 
-    return df
+    df = retrieve_ledger_since(ipfs_hash)
+    with _resolved_lock:
+        _resolved = (ipfs_hash, df)
+    return df.copy()
 
 def updateIPFS_df(contract, newBlock_df, sender):
+    with _update_lock:
+        newHash, new_df = pin_ledger_update(contract, newBlock_df)
+        if newHash is not None:
+            tx_hash = anchor_ledger_update(contract, newHash, sender)
+            mark_published(contract, tx_hash, new_df.index)
+        return new_df
+
+# First half of an update: pins a segment holding the rows of `newBlock_df` that
+# are not published yet, chained onto the current head.  Returns the new CID
+# (None when there is nothing new) and the rows it holds.  The caller must hold
+# _update_lock until the CID has been anchored
+def pin_ledger_update(contract, newBlock_df):
+    new_df = newBlock_df[~newBlock_df.index.isin(_published)]
+    new_df = new_df[~new_df.index.duplicated(keep='first')]
+    if new_df.empty:
+        return None, new_df
+
     ipfsHash = contract.functions.getIPFSHash().call()
     if ipfsHash != '':
-        ipfs_df = retrieve_block_df(ipfsHash)
-        ipfs_df['Contract Balance'] = ipfs_df['Contract Balance'].astype('str')
-        new_df = pd.concat([newBlock_df,ipfs_df])
-        new_df = new_df[~new_df.index.duplicated(keep='first')]
-        new_json_df = convert_df_to_json(new_df)
-        newHash = pin_json_to_ipfs(new_json_df)
-        tx_hash2 = contract.functions.updateIPFSHash(newHash).transact({
-            'from': sender,
-        })
-    else:
-        new_json_df = convert_df_to_json(newBlock_df)
-        newHash = pin_json_to_ipfs(new_json_df)
-        new_df = newBlock_df
+        head, _ = load_segment(ipfsHash)
+        depth = head["depth"] + 1
+        if depth >= COMPACT_EVERY:
+            # compaction, fold the chain back into a single checkpoint
+            ipfs_df = retrieve_block_df(ipfsHash)
+            ipfs_df['Contract Balance'] = ipfs_df['Contract Balance'].astype('str')
+            full_df = pd.concat([new_df, ipfs_df])
+            full_df = full_df[~full_df.index.duplicated(keep='first')]
+            return pin_segment(full_df, ipfsHash, True, 0), new_df
+        return pin_segment(new_df, ipfsHash, False, depth), new_df
+    return pin_segment(new_df, None, True, 0), new_df
+
+# Second half: points the contract at the pinned CID.  Returns the tx hash; the
+# rows only count as published once it is mined, see mark_published
+def anchor_ledger_update(contract, newHash, sender):
+    with metrics.span("ledger_anchor"):
         tx_hash2 = contract.functions.updateIPFSHash(newHash).transact({
             'from': sender,
         })
+    return tx_hash2
 
-    return new_df
-
-
+# Waits for an anchor transaction and, once it is mined successfully, records
+# `tx_hashes` as published so they are never pinned again.  Raises when the
+# anchor reverted or was not mined within `timeout`, leaving the rows unpublished
+def mark_published(contract, anchor_tx_hash, tx_hashes, timeout=120):
+    receipt = contract.web3.eth.wait_for_transaction_receipt(anchor_tx_hash, timeout=timeout)
+    if not receipt.get("status", 1):
+        raise RuntimeError(f"ledger anchor {anchor_tx_hash.hex()} reverted")
+    _published.update(tx_hashes)
+    return receipt
@@ -0,0 +1,179 @@
+import bisect
+import threading
+import pandas as pd
+
+# Materialized aggregates over the contract ledger: per-address totals,
+# gas spent per contract function and daily donation / payout series.  Rows
+# are folded in as they arrive (from publish_receipt, or in bulk from the IPFS
+# ledger), so an update costs O(new rows) instead of a recompute over the
+# whole DataFrame.
+#
+# The ledger only records the contract balance after each block, so money in
+# and out is the change in balance from the previous block: a rise counts as
+# a donation by the sender, a fall as a payout triggered by the sender.  Rows
+# are ordered by (timestamp, block number), which needs each row's block from
+# its receipt or the event index (`positions`); timestamps alone cannot order
+# blocks mined within the same second.  A row that lands between two known
+# blocks also corrects the change credited to the block after it.
+#
+# The change of a block with several transactions cannot be split between
+# them, and neither can a row without a known block that shares its timestamp
+# with other rows.  Those changes are credited to UNATTRIBUTED instead of
+# guessing a sender.
+
+WEI_PER_ETHER = 10 ** 18
+UNKNOWN_FUNCTION = "(no event)"
+UNATTRIBUTED = "(unattributed)"
+# block number of rows whose block is not known
+UNKNOWN_BLOCK = -1
+
+
+class LedgerAnalytics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        # (timestamp ns, block number) of every block, sorted
+        self.order = []
+        # (timestamp ns, block number) -> tx hashes of the block
+        self.blocks = {}
+        # (timestamp ns, block number) -> (address, change, day) credited for the block
+        self.credited = {}
+        # tx hash -> (balance in wei, sender, day, position in the block)
+        self.rows = {}
+        self.addresses = {}
+        self.functions = {}
+        self.daily = {}
+        # last IPFS ledger head folded in
+        self.head = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    # Rows of a ledger DataFrame that have not been folded in yet
+    def unseen(self, df):
+        return df[~df.index.isin(self.rows.keys())]
+
+    def _address(self, address):
+        return self.addresses.setdefault(address, {"transactions": 0, "gas": 0, "donated": 0, "paid_out": 0})
+
+    def _credit(self, address, day, change, sign=1):
+        address = self._address(address)
+        daily = self.daily[day]
+        if change > 0:
+            address["donated"] += sign * change
+            daily["donations"] += sign * change
+        elif change < 0:
+            address["paid_out"] -= sign * change
+            daily["payouts"] -= sign * change
+
+    # Balance after the block, i.e. after its last transaction
+    def _balance(self, key):
+        last = max(self.blocks[key], key=lambda tx_hash: (self.rows[tx_hash][3], tx_hash))
+        return self.rows[last][0]
+
+    # Replaces the change credited for the block at `key` with its current one
+    def _recredit(self, key):
+        if key in self.credited:
+            address, change, day = self.credited.pop(key)
+            self._credit(address, day, change, sign=-1)
+        position = bisect.bisect_left(self.order, key)
+        previous = self._balance(self.order[position - 1]) if position > 0 else 0
+        change = self._balance(key) - previous
+        tx_hashes = self.blocks[key]
+        timestamp = key[0]
+        same_time = self.order[bisect.bisect_left(self.order, (timestamp,)):bisect.bisect_left(self.order, (timestamp + 1,))]
+        # blocks sharing a timestamp are only ordered when every one is known
+        ambiguous = len(same_time) > 1 and same_time[0][1] == UNKNOWN_BLOCK
+        if len(tx_hashes) > 1 or ambiguous:
+            address = UNATTRIBUTED
+        else:
+            address = self.rows[tx_hashes[0]][1]
+        day = self.rows[tx_hashes[0]][2]
+        self._credit(address, day, change)
+        self.credited[key] = (address, change, day)
+
+    # Folds the rows of a ledger DataFrame (Tx Hash index, convert_receipt
+    # columns) into the aggregates.  `functions` maps tx hash to the contract
+    # function, or the event it emitted, and `positions` maps tx hash to
+    # (block number, position in the block).  Rows already seen are skipped.
+    # Returns the number of rows added
+    def add(self, df, functions=None, positions=None):
+        functions = functions or {}
+        positions = positions or {}
+        df = df[~df.index.duplicated(keep='first')]
+        timestamps = pd.to_datetime(df['Timestamp'], utc=True)
+        batch = zip(
+            timestamps.values.astype('int64').tolist(),
+            df.index,
+            df['Contract Balance'].tolist(),
+            df['From'].tolist(),
+            df['Gas'].tolist(),
+            timestamps.dt.strftime('%Y-%m-%d').tolist(),
+        )
+        added = 0
+        with self.lock:
+            for timestamp, tx_hash, balance, sender, gas, day in batch:
+                if tx_hash in self.rows:
+                    continue
+                block, index = positions.get(tx_hash, (UNKNOWN_BLOCK, UNKNOWN_BLOCK))
+                self.rows[tx_hash] = (int(balance), sender, day, index)
+                gas = int(gas)
+                added += 1
+
+                address = self._address(sender)
+                address["transactions"] += 1
+                address["gas"] += gas
+                function = self.functions.setdefault(
+                    functions.get(tx_hash) or UNKNOWN_FUNCTION, {"transactions": 0, "gas": 0}
+                )
+                function["transactions"] += 1
+                function["gas"] += gas
+                daily = self.daily.setdefault(day, {"transactions": 0, "gas": 0, "donations": 0, "payouts": 0})
+                daily["transactions"] += 1
+                daily["gas"] += gas
+
+                key = (timestamp, block)
+                if key not in self.blocks:
+                    bisect.insort(self.order, key)
+                    self.blocks[key] = []
+                self.blocks[key].append(tx_hash)
+                # the blocks at this timestamp (whose attribution may change)
+                # and the block after them (whose previous balance may change)
+                start = bisect.bisect_left(self.order, (timestamp,))
+                end = bisect.bisect_left(self.order, (timestamp + 1,))
+                for affected in self.order[start:end + 1]:
+                    self._recredit(affected)
+        return added
+
+    def address_frame(self):
+        with self.lock:
+            df = pd.DataFrame.from_dict(self.addresses, orient='index')
+        if df.empty:
+            return pd.DataFrame(columns=['Transactions', 'Gas', 'Donated (ETH)', 'Paid Out (ETH)'])
+        df = df.rename(columns={'transactions': 'Transactions', 'gas': 'Gas'})
+        df['Donated (ETH)'] = df.pop('donated').astype('float64') / WEI_PER_ETHER
+        df['Paid Out (ETH)'] = df.pop('paid_out').astype('float64') / WEI_PER_ETHER
+        df.index.name = 'Address'
+        return df.sort_values('Transactions', ascending=False)
+
+    def function_frame(self):
+        with self.lock:
+            df = pd.DataFrame.from_dict(self.functions, orient='index')
+        if df.empty:
+            return pd.DataFrame(columns=['Transactions', 'Gas', 'Mean Gas'])
+        df = df.rename(columns={'transactions': 'Transactions', 'gas': 'Gas'})
+        df['Mean Gas'] = df['Gas'] / df['Transactions']
+        df.index.name = 'Function'
+        return df.sort_values('Gas', ascending=False)
+
+    # Daily series indexed by date, donations and payouts in ether
+    def daily_frame(self):
+        with self.lock:
+            df = pd.DataFrame.from_dict(self.daily, orient='index')
+        if df.empty:
+            return pd.DataFrame(columns=['Transactions', 'Gas', 'Donations (ETH)', 'Payouts (ETH)'])
+        df = df.rename(columns={'transactions': 'Transactions', 'gas': 'Gas'})
+        df['Donations (ETH)'] = df.pop('donations').astype('float64') / WEI_PER_ETHER
+        df['Payouts (ETH)'] = df.pop('payouts').astype('float64') / WEI_PER_ETHER
+        df.index = pd.to_datetime(df.index)
+        df.index.name = 'Date'
+        return df.sort_index()
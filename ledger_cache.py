@@ -0,0 +1,132 @@
+import os
+import json
+import pickle
+import threading
+from collections import OrderedDict
+from pathlib import Path
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+# Local cache for ledger segments pulled from IPFS.  CIDs are immutable, so
+# once a segment has been downloaded it never needs to be fetched again.  Entries live in two tiers:
+#   - a small in-memory hot tier holding the most recently used DataFrames
+#   - an on-disk tier of parquet files (pickle when pyarrow is not installed),
+#     evicted least recently used first once it grows past max_bytes
+
+try:
+    import pyarrow  # noqa: F401
+    FILE_SUFFIX = ".parquet"
+except ImportError:
+    FILE_SUFFIX = ".pkl"
+
+CACHE_DIR = os.getenv("LEDGER_CACHE_DIR", ".ledger_cache")
+CACHE_MAX_BYTES = int(os.getenv("LEDGER_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+CACHE_HOT_ITEMS = int(os.getenv("LEDGER_CACHE_HOT_ITEMS", "32"))
+
+
+class LedgerCache:
+    def __init__(self, root=CACHE_DIR, max_bytes=CACHE_MAX_BYTES, hot_items=CACHE_HOT_ITEMS):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.hot_items = hot_items
+        self.hot = OrderedDict()
+        self.lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.disk_bytes = sum(p.stat().st_size for p in self._data_files())
+
+    def _data_files(self):
+        return [p for p in self.root.iterdir() if p.suffix in (".parquet", ".pkl")]
+
+    def _paths(self, key):
+        return self.root / f"{key}{FILE_SUFFIX}", self.root / f"{key}.json"
+
+    def _remember(self, key, entry):
+        self.hot[key] = entry
+        self.hot.move_to_end(key)
+        while len(self.hot) > self.hot_items:
+            self.hot.popitem(last=False)
+
+    # Returns (DataFrame, metadata dict) or None on a miss.  The DataFrame is a
+    # copy so callers are free to modify it
+    def get(self, key):
+        with self.lock:
+            data_path, meta_path = self._paths(key)
+            entry = self.hot.get(key)
+            if entry is not None:
+                self.hot.move_to_end(key)
+                # hot reads count for the on-disk LRU order too, or the most
+                # used entries would be the first evicted from disk
+                try:
+                    os.utime(data_path)
+                except OSError:
+                    pass
+                return entry[0].copy(), dict(entry[1])
+
+            if not data_path.exists():
+                return None
+            try:
+                if FILE_SUFFIX == ".parquet":
+                    df = pd.read_parquet(data_path)
+                else:
+                    df = pd.read_pickle(data_path)
+                with open(meta_path) as f:
+                    meta = json.load(f)
+            except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+                # a truncated or foreign file counts as a miss and is rewritten
+                return None
+            # touch the file so the on-disk LRU order follows reads too
+            os.utime(data_path)
+            self._remember(key, (df, meta))
+            return df.copy(), dict(meta)
+
+    def put(self, key, df, meta=None):
+        meta = meta or {}
+        with self.lock:
+            data_path, meta_path = self._paths(key)
+            if data_path.exists():
+                self.disk_bytes -= data_path.stat().st_size
+            tmp_path = data_path.with_name(data_path.name + ".tmp")
+            if FILE_SUFFIX == ".parquet":
+                df.to_parquet(tmp_path)
+            else:
+                df.to_pickle(tmp_path)
+            with open(meta_path, "w") as f:
+                json.dump(meta, f)
+            os.replace(tmp_path, data_path)
+            self.disk_bytes += data_path.stat().st_size
+            self._remember(key, (df.copy(), dict(meta)))
+            self._evict()
+
+    def _evict(self):
+        if self.disk_bytes <= self.max_bytes:
+            return
+        files = sorted(self._data_files(), key=lambda p: p.stat().st_mtime)
+        for data_path in files:
+            if self.disk_bytes <= self.max_bytes:
+                break
+            self.disk_bytes -= data_path.stat().st_size
+            data_path.unlink()
+            data_path.with_suffix(".json").unlink(missing_ok=True)
+            self.hot.pop(data_path.stem, None)
+
+    def clear(self):
+        with self.lock:
+            for data_path in self._data_files():
+                data_path.unlink()
+                data_path.with_suffix(".json").unlink(missing_ok=True)
+            self.hot.clear()
+            self.disk_bytes = 0
+
+
+cache = None
+_cache_lock = threading.Lock()
+
+# Process-wide cache, created on first use so importing this module never
+# touches the filesystem
+def get_cache():
+    global cache
+    with _cache_lock:
+        if cache is None:
+            cache = LedgerCache()
+    return cache
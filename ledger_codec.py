@@ -0,0 +1,77 @@
+import io
+import json
+import pandas as pd
+
+# Binary encoding for pinned ledger segments.  A segment is a single parquet
+# file with a fixed, typed schema (wei balances as 38 digit decimals, gas as
+# int64, timestamps as timestamp[s], addresses dictionary-encoded) compressed
+# with zstd.  The segment header (format, version, prev, checkpoint, depth)
+# travels in the parquet schema metadata, so one pinned file holds it all.
+# Readers tell the two formats apart by the parquet magic bytes, anything
+# else is decoded as the legacy json segment.
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+    available = True
+except ImportError:
+    available = False
+
+MAGIC = b"PAR1"
+CODEC_VERSION = 1
+METADATA_KEY = b"cc-ledger-segment"
+COMPRESSION = "zstd"
+
+
+def _schema():
+    return pa.schema([
+        ("Tx Hash", pa.string()),
+        ("Contract Balance", pa.decimal128(38, 0)),
+        ("From", pa.string()),
+        ("To", pa.string()),
+        ("Gas", pa.int64()),
+        ("Timestamp", pa.timestamp("s")),
+    ])
+
+
+def is_binary(data):
+    return data[:4] == MAGIC
+
+
+# Parquet bytes for the rows of a ledger DataFrame (Tx Hash index) and the
+# segment header fields in `segment`
+def encode(df, segment):
+    if not available:
+        raise RuntimeError("pyarrow is required to write binary ledger segments")
+    timestamps = pd.to_datetime(df["Timestamp"], utc=True).dt.tz_localize(None)
+    table = pa.table({
+        "Tx Hash": pa.array(df.index.astype(str), pa.string()),
+        # the balance is kept as a decimal string in the DataFrame, parse it once here
+        "Contract Balance": pc.cast(pa.array(df["Contract Balance"].astype(str), pa.string()), pa.decimal128(38, 0)),
+        "From": pa.array(df["From"], pa.string()),
+        "To": pa.array(df["To"], pa.string()),
+        "Gas": pa.array(df["Gas"].astype("int64"), pa.int64()),
+        "Timestamp": pa.array(timestamps.values.astype("datetime64[s]"), pa.timestamp("s")),
+    }, schema=_schema())
+    header = dict(segment, codec_version=CODEC_VERSION)
+    table = table.replace_schema_metadata({METADATA_KEY: json.dumps(header).encode()})
+    sink = io.BytesIO()
+    pq.write_table(table, sink, compression=COMPRESSION, use_dictionary=["From", "To"])
+    return sink.getvalue()
+
+
+# (segment header dict, ledger DataFrame) from parquet bytes written by encode
+def decode(data):
+    if not available:
+        raise RuntimeError("pyarrow is required to read binary ledger segments")
+    table = pq.read_table(io.BytesIO(data))
+    header = json.loads(table.schema.metadata[METADATA_KEY])
+    if header.pop("codec_version", None) != CODEC_VERSION:
+        raise ValueError("unsupported ledger segment codec version")
+    # back to the layout the rest of the app uses, balance as a decimal string
+    balances = pc.cast(table.column("Contract Balance"), pa.string())
+    table = table.set_column(table.schema.get_field_index("Contract Balance"), "Contract Balance", balances)
+    df = table.to_pandas()
+    df["Timestamp"] = df["Timestamp"].astype("datetime64[ns]")
+    return header, df.set_index("Tx Hash")
@@ -0,0 +1,260 @@
+import os
+import json
+import time
+import atexit
+import datetime
+import threading
+from collections import OrderedDict
+from dotenv import load_dotenv
+load_dotenv()
+
+import ipfs
+import metrics
+import tx_pipeline
+from tx_pipeline import LedgerRow
+
+# Write-behind publisher for the IPFS ledger.  Workflows hand their new ledger
+# rows to the publisher and return; rows are buffered and flushed on a
+# background thread once LEDGER_FLUSH_ROWS have gathered or the oldest one has
+# waited LEDGER_FLUSH_SECONDS.  A flush pins one segment for the whole batch and
+# anchors it with a single updateIPFSHash transaction, instead of one pin and
+# one transaction per user action.
+#
+# Every buffered row is first appended to a local journal (fsynced), so rows
+# accepted before a crash are published on the next start.  Before anchoring,
+# the pinned CID is journaled too, along with the head it chains onto.  A pinned
+# segment whose anchor never landed (a crash, or a failed anchor transaction)
+# is anchored as is by the next flush instead of being pinned again, as long
+# as the contract still points at that previous head; if the contract already
+# points at the CID itself, its rows are known to be published and are dropped.
+# Any other leftover row is pinned again, which is harmless since the ledger
+# de-duplicates by tx hash.
+
+JOURNAL_PATH = os.getenv("LEDGER_JOURNAL_PATH", "ledger_journal.jsonl")
+FLUSH_ROWS = int(os.getenv("LEDGER_FLUSH_ROWS", "20"))
+FLUSH_SECONDS = float(os.getenv("LEDGER_FLUSH_SECONDS", "30"))
+
+
+def _encode_row(row):
+    record = row._asdict()
+    record["timestamp"] = row.timestamp.isoformat()
+    return record
+
+
+def _decode_row(record):
+    record = dict(record)
+    record["timestamp"] = datetime.datetime.fromisoformat(record["timestamp"])
+    return LedgerRow(**record)
+
+
+class LedgerPublisher:
+    def __init__(self, contract, sender, path=JOURNAL_PATH, max_rows=FLUSH_ROWS, max_delay=FLUSH_SECONDS,
+                 receipt_timeout=120, autoflush=True):
+        self.contract = contract
+        self.sender = sender
+        self.path = str(path)
+        self.max_rows = max_rows
+        self.max_delay = max_delay
+        self.receipt_timeout = receipt_timeout
+        self.cond = threading.Condition()
+        self.flush_lock = threading.Lock()
+        # tx hash -> LedgerRow, in arrival order
+        self.buffer = OrderedDict()
+        self.first_at = None
+        self.closed = False
+        self.last_error = None
+        self.flushes = 0
+        # journaled {"pinned": cid, "prev": head, "rows": [...]} not anchored yet
+        self.unanchored = None
+
+        self._recover()
+        self.journal = open(self.path, "a")
+        # without autoflush the owner calls flush() itself (benchmark.py)
+        self.thread = None
+        if autoflush:
+            self.thread = threading.Thread(target=self._run, name="ledger_publisher", daemon=True)
+            self.thread.start()
+        atexit.register(self.close)
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return
+        pinned = None
+        with open(self.path) as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn final line from a crash mid-write, nothing after it
+                    break
+                if "row" in entry:
+                    row = _decode_row(entry["row"])
+                    self.buffer[row.tx_hash] = row
+                elif "pinned" in entry:
+                    pinned = entry
+        if pinned is not None:
+            if self.contract.functions.getIPFSHash().call() == pinned["pinned"]:
+                for tx_hash in pinned["rows"]:
+                    self.buffer.pop(tx_hash, None)
+                ipfs._published.update(pinned["rows"])
+            else:
+                self.unanchored = pinned
+        if self.buffer:
+            self.first_at = time.monotonic()
+        self._rewrite()
+
+    def _append(self, entries):
+        self.journal.write("".join(json.dumps(entry) + "\n" for entry in entries))
+        self.journal.flush()
+        os.fsync(self.journal.fileno())
+
+    # Replaces the journal with just the rows still buffered, and the pinned
+    # segment waiting for its anchor.  Called with self.cond held (or before
+    # the worker starts)
+    def _rewrite(self):
+        tmp = self.path + ".tmp"
+        entries = [{"row": _encode_row(row)} for row in self.buffer.values()]
+        if self.unanchored is not None:
+            entries.append(self.unanchored)
+        with open(tmp, "w") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+            f.flush()
+            os.fsync(f.fileno())
+        journal = getattr(self, "journal", None)
+        if journal is not None:
+            journal.close()
+        os.replace(tmp, self.path)
+        if journal is not None:
+            self.journal = open(self.path, "a")
+
+    # Queues LedgerRows for publishing, returns once they are journaled
+    def add(self, rows):
+        rows = [row for row in rows if row.tx_hash not in ipfs._published]
+        with self.cond:
+            rows = [row for row in rows if row.tx_hash not in self.buffer]
+            if not rows:
+                return
+            self._append([{"row": _encode_row(row)} for row in rows])
+            for row in rows:
+                self.buffer[row.tx_hash] = row
+            if self.first_at is None:
+                self.first_at = time.monotonic()
+            self.cond.notify_all()
+
+    # Rows accepted but not on IPFS yet, in the ledger DataFrame layout
+    def pending(self):
+        with self.cond:
+            rows = list(self.buffer.values())
+        return tx_pipeline.ledger_frame(reversed(rows))
+
+    def _due(self):
+        if not self.buffer:
+            return False
+        return len(self.buffer) >= self.max_rows or time.monotonic() - self.first_at >= self.max_delay
+
+    def _drop(self, tx_hashes):
+        with self.cond:
+            for tx_hash in tx_hashes:
+                self.buffer.pop(tx_hash, None)
+
+    # Points the contract at the journaled, pinned segment and waits for it to
+    # be mined.  Returns the updateIPFSHash tx hash
+    def _anchor(self):
+        pinned = self.unanchored
+        tx_hash = ipfs.anchor_ledger_update(self.contract, pinned["pinned"], self.sender)
+        # the next pin chains onto this head, so it must be mined first.
+        # Rows are only marked published once the anchor is confirmed
+        ipfs.mark_published(self.contract, tx_hash, pinned["rows"], timeout=self.receipt_timeout)
+        self.unanchored = None
+        self._drop(pinned["rows"])
+        metrics.inc("ledger_rows_published_total", len(pinned["rows"]))
+        self.flushes += 1
+        return tx_hash
+
+    # Finishes a segment pinned by an earlier flush (or before a crash) whose
+    # anchor did not land.  Returns the anchor tx hash, or None when nothing
+    # had to be sent
+    def _settle(self):
+        head = self.contract.functions.getIPFSHash().call()
+        if head == self.unanchored["pinned"]:
+            # the anchor was mined after all, e.g. after its receipt wait timed out
+            ipfs._published.update(self.unanchored["rows"])
+            self._drop(self.unanchored["rows"])
+            self.unanchored = None
+            return None
+        if head == self.unanchored.get("prev"):
+            return self._anchor()
+        # the head moved on, the segment no longer chains onto it and its rows
+        # are pinned again with the rest
+        self.unanchored = None
+        return None
+
+    # Publishes everything buffered now.  Returns the last updateIPFSHash tx
+    # hash, or None if there was nothing to publish
+    def flush(self):
+        with self.flush_lock:
+            tx_hash = None
+            try:
+                with metrics.span("ledger_flush"), ipfs._update_lock:
+                    if self.unanchored is not None:
+                        tx_hash = self._settle()
+                    with self.cond:
+                        rows = list(self.buffer.values())
+                    if rows:
+                        # newest first, like the rest of the ledger
+                        frame = tx_pipeline.ledger_frame(reversed(rows))
+                        prev = self.contract.functions.getIPFSHash().call()
+                        cid, new_df = ipfs.pin_ledger_update(self.contract, frame)
+                        if cid is not None:
+                            self.unanchored = {"pinned": cid, "prev": prev, "rows": list(new_df.index)}
+                            with self.cond:
+                                self._append([self.unanchored])
+                            tx_hash = self._anchor()
+                        # rows left out of the segment were already published
+                        self._drop([row.tx_hash for row in rows])
+            finally:
+                # on failure the rows stay buffered, and a pinned segment stays
+                # journaled for the next flush to anchor
+                with self.cond:
+                    self.first_at = time.monotonic() if self.buffer else None
+                    self._rewrite()
+            return tx_hash
+
+    def _failed(self, error):
+        self.last_error = error
+        metrics.inc("ledger_flush_errors_total")
+
+    def _run(self):
+        while True:
+            with self.cond:
+                while not self.closed and not self._due():
+                    remaining = None
+                    if self.buffer:
+                        remaining = max(self.max_delay - (time.monotonic() - self.first_at), 0)
+                    self.cond.wait(remaining)
+                if self.closed:
+                    return
+            try:
+                self.flush()
+                self.last_error = None
+            except Exception as e:
+                # keep the rows and try again after another delay
+                self._failed(e)
+                with self.cond:
+                    self.cond.wait(self.max_delay)
+
+    # Stops the worker and publishes whatever is left.  A failed final flush
+    # leaves the rows in the journal and is reported through last_error
+    def close(self):
+        with self.cond:
+            if self.closed:
+                return
+            self.closed = True
+            self.cond.notify_all()
+        if self.thread is not None:
+            self.thread.join()
+        try:
+            self.flush()
+        except Exception as e:
+            self._failed(e)
+        self.journal.close()
@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+from dotenv import load_dotenv
+load_dotenv()
+
+# Lightweight in-process instrumentation for the hot paths: RPC calls, IPFS
+# pins and reads, price lookups, geocoding and the ledger publisher.  Stages are
+# timed with `span`, which feeds a latency histogram per stage and label set and
+# counts failures; caches report hits and misses through `inc`.  Everything is
+# kept in memory behind one lock, so a span costs two clock reads and a dict
+# update.  The numbers can be read from the Streamlit debug panel, scraped as
+# Prometheus text (METRICS_PORT) or appended to a JSON lines file
+# (METRICS_JSONL_PATH) every METRICS_EXPORT_SECONDS.
+
+PREFIX = "cc"
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+RECENT_SPANS = 200
+
+METRICS_PORT = os.getenv("METRICS_PORT")
+JSONL_PATH = os.getenv("METRICS_JSONL_PATH")
+EXPORT_SECONDS = float(os.getenv("METRICS_EXPORT_SECONDS", "60"))
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        # one slot per bucket plus the +Inf overflow
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    # Upper bound of the bucket holding the q-th quantile, None past the last bucket
+    def quantile(self, q):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return None
+
+
+class Registry:
+    def __init__(self, recent=RECENT_SPANS):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+        self.recent = deque(maxlen=recent)
+        self.started_at = time.time()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    # Times the enclosed block as stage `name`.  Failures are timed too and
+    # counted in stage_errors_total with the exception type
+    @contextmanager
+    def span(self, name, **labels):
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = type(e).__name__
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe("stage_seconds", seconds, stage=name, **labels)
+            if error is not None:
+                self.inc("stage_errors_total", stage=name, error=error, **labels)
+            with self.lock:
+                self.recent.append((time.time(), name, labels, seconds, error))
+
+    # Decorator form of span
+    def timed(self, name, **labels):
+        def decorator(fn):
+            @wraps(fn)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return fn(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # One dict per counter and histogram, the shape used by the debug panel
+    # and the JSON lines export
+    def snapshot(self):
+        rows = []
+        with self.lock:
+            for (name, labels), value in sorted(self.counters.items()):
+                rows.append({"metric": f"{PREFIX}_{name}", "type": "counter", "labels": dict(labels), "value": value})
+            for (name, labels), h in sorted(self.histograms.items()):
+                rows.append({
+                    "metric": f"{PREFIX}_{name}",
+                    "type": "histogram",
+                    "labels": dict(labels),
+                    "count": h.count,
+                    "sum": h.sum,
+                    "mean": h.sum / h.count,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "p99": h.quantile(0.99),
+                })
+        return rows
+
+    # Most recent spans, newest first
+    def recent_spans(self, limit=50):
+        with self.lock:
+            spans = list(self.recent)[-limit:]
+        return [
+            {"at": at, "stage": name, "labels": labels, "seconds": seconds, "error": error}
+            for at, name, labels, seconds, error in reversed(spans)
+        ]
+
+    # Prometheus text exposition format
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (h.buckets, list(h.counts), h.count, h.sum)) for key, h in self.histograms.items())
+        typed = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, count, total) in histograms:
+            metric = f"{PREFIX}_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, bucket in zip(tuple(buckets) + (float("inf"),), counts):
+                cumulative += bucket
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{metric}_bucket{_labels(labels + (('le', le),))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {total}")
+            lines.append(f"{metric}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    # Appends the current snapshot to `path`, one json object per metric
+    def write_jsonl(self, path):
+        at = time.time()
+        with open(path, "a") as f:
+            for row in self.snapshot():
+                f.write(json.dumps({"at": at, **row}) + "\n")
+
+    def reset(self):
+        with self.lock:
+            self.counters.clear()
+            self.histograms.clear()
+            self.recent.clear()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+registry = Registry()
+span = registry.span
+timed = registry.timed
+inc = registry.inc
+
+
+# web3 middleware timing every JSON-RPC call by method, add with
+# w3.middleware_onion.add(metrics.web3_middleware, 'metrics')
+def web3_middleware(make_request, w3):
+    def middleware(method, params):
+        with span("rpc", method=method):
+            response = make_request(method, params)
+        if "error" in response:
+            inc("rpc_errors_total", method=method)
+        return response
+    return middleware
+
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+# Starts the optional exporters configured in the environment, once per process
+def start_exporters(port=METRICS_PORT, jsonl_path=JSONL_PATH, interval=EXPORT_SECONDS):
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if port:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        server = ThreadingHTTPServer(("0.0.0.0", int(port)), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics_http", daemon=True).start()
+
+    if jsonl_path:
+        def export():
+            while True:
+                time.sleep(interval)
+                registry.write_jsonl(jsonl_path)
+
+        threading.Thread(target=export, name="metrics_jsonl", daemon=True).start()
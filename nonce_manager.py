@@ -0,0 +1,105 @@
+import time
+import threading
+
+# Local nonce tracking for accounts that send several transactions without
+# waiting for each to be mined (the supplier account in app.py, bulk product
+# imports).  Nonces are handed out from a local counter, so several
+# transactions can be in flight at once instead of each one reading the
+# 'latest' nonce and colliding with the previous, still pending, one.  The
+# counter is resynced from the node's pending count only when the node reports
+# a gap, a reused nonce or a replaced transaction; a nonce whose transaction
+# never reached the node is handed back only if no later one was reserved, so
+# a nonce another thread is about to use is never handed out twice.
+
+GAS_PRICE_TTL = 15
+
+# node error messages that mean our local counter no longer matches the chain
+NONCE_ERRORS = ("nonce too low", "nonce too high", "replacement transaction underpriced")
+# node error messages for a transaction that is already in the pool, i.e. this
+# exact signed transaction was sent before (a resend after a dropped response)
+KNOWN_TX_ERRORS = ("already known", "known transaction")
+
+
+class NonceManager:
+    def __init__(self, w3, gas_price_ttl=GAS_PRICE_TTL):
+        self.w3 = w3
+        self.gas_price_ttl = gas_price_ttl
+        self.next_nonce = {}
+        self.locks = {}
+        self.locks_lock = threading.Lock()
+        self.gas_price = None
+        self.gas_price_at = 0
+
+    def _lock(self, address):
+        with self.locks_lock:
+            return self.locks.setdefault(address, threading.Lock())
+
+    # Pending transaction count from the node, includes our own in-flight txs
+    def resync(self, address):
+        with self._lock(address):
+            self.next_nonce[address] = self.w3.eth.get_transaction_count(address, 'pending')
+            return self.next_nonce[address]
+
+    def reserve(self, address):
+        with self._lock(address):
+            if address not in self.next_nonce:
+                self.next_nonce[address] = self.w3.eth.get_transaction_count(address, 'pending')
+            nonce = self.next_nonce[address]
+            self.next_nonce[address] = nonce + 1
+            return nonce
+
+    # Gas price shared by every transaction sent within the TTL
+    def current_gas_price(self):
+        if self.gas_price is None or time.time() - self.gas_price_at > self.gas_price_ttl:
+            self.gas_price = self.w3.eth.gas_price
+            self.gas_price_at = time.time()
+        return self.gas_price
+
+    # Hands back `nonce` after a transaction using it failed before reaching the
+    # node.  Only the most recent reservation can be undone; when another
+    # thread has reserved a later nonce meanwhile, `nonce` is left as a gap
+    # (the node then reports "nonce too high" and the counter is resynced)
+    def release(self, address, nonce):
+        with self._lock(address):
+            if self.next_nonce.get(address) == nonce + 1:
+                self.next_nonce[address] = nonce
+                return True
+            return False
+
+    # Builds, signs and sends `contract_function` (e.g. contract.functions.fillRequest(...))
+    # from `address` without waiting for earlier transactions to be mined.
+    # Without a private key the transaction is signed by the node (an unlocked
+    # account).  Returns the tx hash
+    def send_transaction(self, contract_function, address, private_key=None, tx_params=None, retries=1):
+        for attempt in range(retries + 1):
+            nonce = self.reserve(address)
+            payload = dict(tx_params or {})
+            payload.update({'from': address, 'nonce': nonce})
+            signed_tx = None
+            try:
+                payload.setdefault('gasPrice', self.current_gas_price())
+                if private_key is None:
+                    return contract_function.transact(payload)
+                tx = contract_function.buildTransaction(payload)
+                signed_tx = self.w3.eth.account.signTransaction(tx, private_key)
+                return self.w3.eth.sendRawTransaction(signed_tx.rawTransaction)
+            except ValueError as e:
+                message = str(e).lower()
+                if any(err in message for err in KNOWN_TX_ERRORS):
+                    # the node already holds this transaction, the nonce is used
+                    if signed_tx is not None:
+                        return signed_tx.hash
+                    # signed by the node, there is no local hash to return
+                    raise
+                if any(err in message for err in NONCE_ERRORS):
+                    # the local counter no longer matches the chain
+                    self.resync(address)
+                    if attempt < retries:
+                        continue
+                    raise
+                self.release(address, nonce)
+                raise
+            except Exception:
+                # build, sign or send failed, the nonce was never used
+                self.release(address, nonce)
+                raise
@@ -0,0 +1,167 @@
+import os
+import time
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+import metrics
+
+# Historical ETH-USD closes for valuing the ledger as of each transaction.
+# Daily closes are kept in a local SQLite table and refreshed incrementally:
+# only the days after the last stored one (plus that day, whose close may
+# still have been moving) are downloaded.  The series is held in memory as
+# two sorted numpy arrays, so valuing a ledger is one searchsorted over its
+# Timestamp column rather than a lookup per row.
+
+DB_PATH = os.getenv("PRICE_HISTORY_DB_PATH", "price_history.db")
+# Seconds between checks for new closes
+REFRESH_SECONDS = float(os.getenv("PRICE_HISTORY_REFRESH_SECONDS", "3600"))
+# First day downloaded into an empty cache
+START_DATE = os.getenv("PRICE_HISTORY_START", "2017-01-01")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS closes (
+    day TEXT PRIMARY KEY,
+    close REAL NOT NULL
+);
+"""
+
+WEI_PER_ETHER = 10 ** 18
+
+
+# Default source, daily closes from yahoo finance as {"YYYY-MM-DD": close}
+# for every day from `start` on
+def yahoo_history(start):
+    import yfinance as yf
+    eth_df = yf.download(tickers="ETH-USD", start=start, interval="1d", progress=False)
+    close = eth_df["Close"]
+    # newer yfinance versions return one column per ticker
+    if isinstance(close, pd.DataFrame):
+        close = close.iloc[:, 0]
+    close = close.dropna()
+    return {day.strftime("%Y-%m-%d"): float(price) for day, price in close.items()}
+
+
+# Local stand-in for yahoo finance, a csv file with `date` and `close` columns
+class FixtureHistory:
+    def __init__(self, path):
+        self.path = path
+
+    def __call__(self, start):
+        df = pd.read_csv(self.path, parse_dates=["date"])
+        df = df[df["date"] >= pd.Timestamp(start)]
+        return {day.strftime("%Y-%m-%d"): float(price) for day, price in zip(df["date"], df["close"])}
+
+
+# Timestamp column as naive UTC datetime64, whatever form the ledger stored it in
+def _utc_naive(timestamps):
+    return pd.to_datetime(timestamps, utc=True).dt.tz_localize(None)
+
+
+class PriceHistory:
+    def __init__(self, source=yahoo_history, path=DB_PATH, refresh_seconds=REFRESH_SECONDS, clock=time.monotonic):
+        self.source = source
+        self.refresh_seconds = refresh_seconds
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(str(path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.checked_at = None
+        self._days = None
+        self._closes = None
+
+    def last_day(self):
+        row = self.conn.execute("SELECT MAX(day) FROM closes").fetchone()
+        return row[0]
+
+    # Downloads the closes after the last stored day and stores them.  Returns
+    # the number of days written
+    def refresh(self):
+        with self.lock:
+            start = self.last_day() or START_DATE
+            with metrics.span("price_history_fetch"):
+                closes = self.source(start)
+            with self.conn:
+                self.conn.executemany("INSERT OR REPLACE INTO closes VALUES (?, ?)", sorted(closes.items()))
+            self.checked_at = self.clock()
+            self._days = None
+            return len(closes)
+
+    def _maybe_refresh(self):
+        if self.checked_at is not None and self.clock() - self.checked_at < self.refresh_seconds:
+            return
+        try:
+            self.refresh()
+        except Exception:
+            # keep valuing with the cached closes, retry after the next interval
+            self.checked_at = self.clock()
+            if self.last_day() is None:
+                raise
+
+    # (days as datetime64[ns], closes) sorted by day
+    def arrays(self):
+        self._maybe_refresh()
+        with self.lock:
+            if self._days is None:
+                rows = self.conn.execute("SELECT day, close FROM closes ORDER BY day").fetchall()
+                self._days = pd.to_datetime([day for day, _ in rows]).values
+                self._closes = np.array([close for _, close in rows], dtype="float64")
+            return self._days, self._closes
+
+    def series(self):
+        days, closes = self.arrays()
+        return pd.Series(closes, index=pd.DatetimeIndex(days, name="Date"), name="ETH-USD")
+
+    # Latest ETH-USD close known at each timestamp.  A day's close is only
+    # final at midnight UTC, so a transaction during day D is valued at the
+    # close of D - 1 (or the last stored day before it), never at D's own
+    # close.  NaN for timestamps before the first stored close is known
+    def as_of(self, timestamps):
+        days, closes = self.arrays()
+        moments = _utc_naive(pd.Series(timestamps)).values
+        known_at = days + np.timedelta64(1, "D")
+        positions = np.searchsorted(known_at, moments, side="right") - 1
+        prices = closes[np.clip(positions, 0, None)] if len(closes) else np.full(len(moments), np.nan)
+        return np.where(positions >= 0, prices, np.nan)
+
+    # Copy of a ledger DataFrame with the ETH-USD price as of each row's
+    # Timestamp and the contract balance valued at that price
+    def value_ledger(self, df):
+        with metrics.span("price_history_value"):
+            valued = df.copy()
+            if valued.empty:
+                valued["ETH-USD"] = pd.Series(dtype="float64")
+                valued["Contract Balance (USD)"] = pd.Series(dtype="float64")
+                return valued
+            eth_usd = self.as_of(valued["Timestamp"])
+            balance_ether = valued["Contract Balance"].astype("float64").values / WEI_PER_ETHER
+            valued["ETH-USD"] = eth_usd
+            valued["Contract Balance (USD)"] = balance_ether * eth_usd
+            return valued
+
+
+def _default_source():
+    fixture = os.getenv("PRICE_HISTORY_FIXTURE")
+    if fixture:
+        return FixtureHistory(fixture)
+    return yahoo_history
+
+
+history = None
+_history_lock = threading.Lock()
+
+# Process-wide price history, created on first use
+def get_history():
+    global history
+    with _history_lock:
+        if history is None:
+            history = PriceHistory(_default_source())
+    return history
+
+
+def value_ledger(df):
+    return get_history().value_ledger(df)
@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from dotenv import load_dotenv
+load_dotenv()
+
+import metrics
+
+# Process-wide ETH-USD price oracle.  Every Streamlit session shares the same
+# oracle so a page render costs at most one price download per TTL window,
+# no matter how many conversions it makes or how many users are connected.
+
+# Seconds a fetched price is considered fresh
+DEFAULT_TTL = float(os.getenv("PRICE_TTL_SECONDS", "60"))
+# Seconds past the TTL that a stale price may still be served while a
+# background refresh runs (stale-while-revalidate)
+DEFAULT_STALE = float(os.getenv("PRICE_STALE_SECONDS", "300"))
+
+
+# Default source, pulls the latest close from yahoo finance.  yfinance is
+# imported here so that processes using a fixture never pay for the import
+def yahoo_source():
+    import yfinance as yf
+    eth_df = yf.download(tickers="ETH-USD", period="today")
+    return float(eth_df.iloc[0]["Close"])
+
+
+# Local stand-in for yahoo finance.  The fixture file is either a bare number
+# or a json object such as {"ETH-USD": 1234.56}
+class FixtureSource:
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def __call__(self):
+        with open(self.path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data["ETH-USD"]
+        return float(data)
+
+
+class PriceOracle:
+    def __init__(self, source=yahoo_source, ttl=DEFAULT_TTL, stale=DEFAULT_STALE, clock=time.monotonic):
+        self.source = source
+        self.ttl = ttl
+        self.stale = stale
+        self.clock = clock
+        self.price = None
+        self.fetched_at = None
+        # single-flight lock, only one thread ever talks to the source at a time
+        self._refresh_lock = threading.Lock()
+
+    def _age(self):
+        if self.fetched_at is None:
+            return None
+        return self.clock() - self.fetched_at
+
+    def _fetch(self):
+        with metrics.span("price_fetch"):
+            price = self.source()
+        self.price = price
+        self.fetched_at = self.clock()
+        return price
+
+    def _background_refresh(self):
+        try:
+            self._fetch()
+        except Exception:
+            # keep serving the stale price, the next caller will retry
+            pass
+        finally:
+            self._refresh_lock.release()
+
+    def refresh(self):
+        # Blocking refresh shared by all waiting callers: whoever gets the lock
+        # first downloads, everybody queued behind it reuses that result
+        with self._refresh_lock:
+            age = self._age()
+            if age is not None and age < self.ttl:
+                return self.price
+            try:
+                return self._fetch()
+            except Exception:
+                if self.price is None:
+                    raise
+                return self.price
+
+    def get_price(self):
+        age = self._age()
+        if age is not None and age < self.ttl:
+            metrics.inc("cache_total", cache="price", result="hit")
+            return self.price
+        if age is not None and age < self.ttl + self.stale:
+            metrics.inc("cache_total", cache="price", result="stale")
+            # serve the stale value now and revalidate in the background,
+            # unless a refresh is already in flight
+            if self._refresh_lock.acquire(blocking=False):
+                threading.Thread(target=self._background_refresh, daemon=True).start()
+            return self.price
+        metrics.inc("cache_total", cache="price", result="miss")
+        return self.refresh()
+
+    def set_source(self, source):
+        with self._refresh_lock:
+            self.source = source
+            self.price = None
+            self.fetched_at = None
+
+
+def _default_source():
+    fixture = os.getenv("ETH_USD_FIXTURE")
+    if fixture:
+        return FixtureSource(fixture)
+    return yahoo_source
+
+
+oracle = PriceOracle(source=_default_source())
+
+
+# Current ETH-USD price, served from the shared oracle
+def get_eth_usd():
+    return oracle.get_price()
+
+
+def usd_to_ether(dollars):
+    return float(dollars) / get_eth_usd()
+
+
+def ether_to_usd(ether):
+    return float(ether) * get_eth_usd()
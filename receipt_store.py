@@ -0,0 +1,203 @@
+import os
+import sqlite3
+import datetime
+import threading
+import pandas as pd
+from dotenv import load_dotenv
+load_dotenv()
+
+# Persistent local store for ledger receipts.  Every receipt recorded through
+# singleton_requests lands here as well, so history survives restarts and
+# lookups by tx hash, address or time range are index seeks instead of a scan
+# of the whole IPFS ledger.
+
+DB_PATH = os.getenv("RECEIPT_DB_PATH", "receipts.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS receipts (
+    tx_hash TEXT PRIMARY KEY,
+    contract_balance TEXT NOT NULL,
+    sender TEXT NOT NULL,
+    recipient TEXT,
+    gas INTEGER NOT NULL,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS receipts_sender ON receipts (sender COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS receipts_recipient ON receipts (recipient COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS receipts_timestamp ON receipts (timestamp, tx_hash);
+CREATE INDEX IF NOT EXISTS receipts_gas ON receipts (gas, tx_hash);
+"""
+
+COLUMNS = ["tx_hash", "contract_balance", "sender", "recipient", "gas", "timestamp"]
+# columns a page can be sorted by, each backed by an index ending in tx_hash
+SORT_COLUMNS = ["timestamp", "gas"]
+
+
+def _epoch(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = pd.Timestamp(value)
+    if value.tzinfo is None:
+        value = value.tz_localize("UTC")
+    return value.timestamp()
+
+
+class ReceiptStore:
+    def __init__(self, path=DB_PATH):
+        self.path = str(path)
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    # Bulk insert of convert_receipt style dicts, one transaction for the batch.
+    # Rows already stored (same tx hash) are left untouched
+    def add_many(self, receipts):
+        rows = [
+            (
+                r["transactionHash"],
+                str(r["contract_balance"]),
+                r["from"],
+                r["to"],
+                int(r["gasUsed"]),
+                _epoch(r["timestamp"]),
+            )
+            for r in receipts
+        ]
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO receipts VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def add(self, dict_receipt):
+        return self.add_many([dict_receipt])
+
+    # Bulk insert of a ledger DataFrame (Tx Hash index, as pulled from IPFS)
+    def import_frame(self, ledger_df):
+        receipts = (
+            {
+                "transactionHash": tx_hash,
+                "contract_balance": balance,
+                "from": sender,
+                "to": recipient,
+                "gasUsed": gas,
+                "timestamp": timestamp,
+            }
+            for tx_hash, balance, sender, recipient, gas, timestamp in zip(
+                ledger_df.index, ledger_df["Contract Balance"], ledger_df["From"],
+                ledger_df["To"], ledger_df["Gas"], ledger_df["Timestamp"],
+            )
+        )
+        return self.add_many(receipts)
+
+    # `exclude` is a collection of tx hashes to leave out, e.g. rows shown
+    # elsewhere on the page
+    def _where(self, tx_hash=None, sender=None, recipient=None, address=None, start=None, end=None, exclude=None):
+        clauses, params = [], []
+        if tx_hash is not None:
+            clauses.append("tx_hash = ?")
+            params.append(tx_hash)
+        if exclude:
+            exclude = list(exclude)
+            clauses.append(f"tx_hash NOT IN ({', '.join('?' * len(exclude))})")
+            params.extend(exclude)
+        if sender is not None:
+            clauses.append("sender = ? COLLATE NOCASE")
+            params.append(sender)
+        if recipient is not None:
+            clauses.append("recipient = ? COLLATE NOCASE")
+            params.append(recipient)
+        if address is not None:
+            clauses.append("(sender = ? COLLATE NOCASE OR recipient = ? COLLATE NOCASE)")
+            params.extend([address, address])
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(_epoch(start))
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(_epoch(end))
+        return clauses, params
+
+    # One page of receipts ordered by `sort` (one of SORT_COLUMNS), newest /
+    # largest first unless `descending` is False.  Pass the `cursor` returned
+    # with a page to get the next one; it is a keyset cursor so deep pages cost
+    # the same as the first.  Returns (DataFrame, next cursor or None)
+    def query(self, limit=50, cursor=None, sort="timestamp", descending=True, **filters):
+        if sort not in SORT_COLUMNS:
+            raise ValueError(f"cannot sort receipts by {sort!r}")
+        clauses, params = self._where(**filters)
+        if cursor is not None:
+            clauses.append(f"({sort}, tx_hash) {'<' if descending else '>'} (?, ?)")
+            params.extend(cursor)
+        sql = "SELECT * FROM receipts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        direction = "DESC" if descending else "ASC"
+        sql += f" ORDER BY {sort} {direction}, tx_hash {direction} LIMIT ?"
+        params.append(limit + 1)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = (rows[-1][COLUMNS.index(sort)], rows[-1][0])
+        return self.to_frame(rows), next_cursor
+
+    def count(self, **filters):
+        clauses, params = self._where(**filters)
+        sql = "SELECT COUNT(*) FROM receipts"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        with self.lock:
+            return self.conn.execute(sql, params).fetchone()[0]
+
+    # Newest `limit` receipts as convert_receipt style dicts, newest first
+    def latest(self, limit):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT * FROM receipts ORDER BY timestamp DESC, tx_hash DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [
+            {
+                "contract_balance": balance,
+                "transactionHash": tx_hash,
+                "from": sender,
+                "to": recipient,
+                "gasUsed": gas,
+                "timestamp": datetime.datetime.utcfromtimestamp(timestamp),
+            }
+            for tx_hash, balance, sender, recipient, gas, timestamp in rows
+        ]
+
+    @staticmethod
+    def to_frame(rows):
+        df = pd.DataFrame.from_records(rows, columns=COLUMNS)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], unit="s")
+        df = df.rename(columns={
+            "tx_hash": "Tx Hash",
+            "contract_balance": "Contract Balance",
+            "sender": "From",
+            "recipient": "To",
+            "gas": "Gas",
+            "timestamp": "Timestamp",
+        })
+        return df.set_index("Tx Hash")
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+store = None
+_store_lock = threading.Lock()
+
+# Process-wide store, opened on first use
+def get_store():
+    global store
+    with _store_lock:
+        if store is None:
+            store = ReceiptStore()
+    return store
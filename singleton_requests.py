@@ -1,5 +1,25 @@
+import os
 import datetime
-singleton = None
+import threading
+from array import array
+import pandas as pd
+from receipt_store import get_store
+
+# Receipts recorded by this process, shared by every Streamlit session.  Every
+# receipt is persisted to the local receipt store; the newest ones are also
+# kept in memory in a fixed-size ring buffer with one preallocated column per
+# field, so an insert is O(1) and memory stays bounded.  Readers only take the
+# ring bounds under the lock and then copy just the newest-first rows they
+# asked for, never the whole buffer; a write generation check tells them when
+# an append overwrote a slot they were reading, and they read again.
+
+BUFFER_SIZE = int(os.getenv("RECEIPT_BUFFER_SIZE", "10000"))
+# lock-free read attempts before a reader that keeps being lapped by appends
+# reads under the lock instead
+READ_RETRIES = 3
+
+RECEIPT_KEYS = ["contract_balance", "transactionHash", "from", "to", "gasUsed", "timestamp"]
+LEDGER_COLUMNS = ['Contract Balance', "Tx Hash", "From", "To", "Gas", "Timestamp"]
 
 def convert_receipt(receipt, contract_balance, block_info):
     dict_receipt = dict(receipt)
@@ -20,18 +40,156 @@ def convert_receipt(receipt, contract_balance, block_info):
 
     return new_dict
 
+
+# Read-only newest-first window over one column of the ring buffer.  It reads
+# the live column, see ReceiptBuffer.read for how readers detect overwrites
+class NewestFirst:
+    def __init__(self, column, head, count, capacity):
+        self.column = column
+        self.head = head
+        self.count = count
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self.count))]
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError(i)
+        return self.column[(self.head - 1 - i) % self.capacity]
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+
+class ReceiptBuffer:
+    def __init__(self, capacity=BUFFER_SIZE):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        # strings in preallocated lists, numbers in typed arrays
+        self.balances = [None] * capacity
+        self.tx_hashes = [None] * capacity
+        self.senders = [None] * capacity
+        self.recipients = [None] * capacity
+        self.gas = array('q', bytes(8 * capacity))
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.head = 0
+        self.count = 0
+        # total rows ever appended, used as the row sequence number
+        self.seq = 0
+
+    def append(self, dict_receipt):
+        with self.lock:
+            i = self.head
+            self.balances[i] = dict_receipt["contract_balance"]
+            self.tx_hashes[i] = dict_receipt["transactionHash"]
+            self.senders[i] = dict_receipt["from"]
+            self.recipients[i] = dict_receipt["to"]
+            self.gas[i] = dict_receipt["gasUsed"]
+            self.timestamps[i] = dict_receipt["timestamp"].replace(tzinfo=datetime.timezone.utc).timestamp()
+            self.head = (i + 1) % self.capacity
+            self.count = min(self.count + 1, self.capacity)
+            self.seq += 1
+            return self.seq
+
+    def __len__(self):
+        return self.count
+
+    def _columns(self):
+        return [self.balances, self.tx_hashes, self.senders, self.recipients, self.gas, self.timestamps]
+
+    # (head, rows to read, sequence number) for the newest `limit` rows
+    # appended after sequence number `since`.  Called with the lock held
+    def _bounds(self, limit, since):
+        count = self.count
+        if since is not None:
+            count = min(count, max(self.seq - since, 0))
+        if limit is not None:
+            count = min(count, limit)
+        return self.head, count, self.seq
+
+    # Newest-first copies of the requested rows of every column, consistent
+    # with each other, and the sequence number of the newest buffered row.
+    # Writers are only blocked while the bounds are taken: the rows are read
+    # after the lock is released, and read again if an append reused one of
+    # their slots in the meantime
+    def read(self, limit=None, since=None):
+        for _ in range(READ_RETRIES):
+            with self.lock:
+                head, count, seq = self._bounds(limit, since)
+            columns = [NewestFirst(column, head, count, self.capacity)[:] for column in self._columns()]
+            with self.lock:
+                # appends fill the free slots first, the oldest slot read is
+                # only reused by the (capacity - count + 1)th append
+                if self.seq - seq <= self.capacity - count:
+                    return columns, seq
+        with self.lock:
+            head, count, seq = self._bounds(limit, since)
+            return [NewestFirst(column, head, count, self.capacity)[:] for column in self._columns()], seq
+
+    # Newest-first copies of the newest `limit` rows of every column
+    def views(self, limit=None):
+        return self.read(limit=limit)[0]
+
+    # Rows appended after sequence number `since` (all buffered rows when None),
+    # newest first, in the ledger DataFrame layout.  Returns the DataFrame and
+    # the sequence number to pass as `since` next time
+    def frame(self, since=None, limit=None):
+        (balances, tx_hashes, senders, recipients, gas, timestamps), seq = self.read(limit=limit, since=since)
+        df = pd.DataFrame({
+            'Contract Balance': balances,
+            'From': senders,
+            'To': recipients,
+            'Gas': gas,
+            'Timestamp': pd.to_datetime(timestamps, unit='s'),
+        }, index=pd.Index(tx_hashes, name='Tx Hash'), columns=[c for c in LEDGER_COLUMNS if c != 'Tx Hash'])
+        df['Contract Balance'] = df['Contract Balance'].astype('str')
+        return df, seq
+
+
+singleton = ReceiptBuffer()
+_loaded = False
+_load_lock = threading.Lock()
+
+# Refills the in-memory buffer from the receipt store the first time receipts
+# are touched after a restart
+def _load():
+    global _loaded
+    with _load_lock:
+        if _loaded:
+            return
+        for dict_receipt in reversed(get_store().latest(singleton.capacity)):
+            singleton.append(dict_receipt)
+        _loaded = True
+
+# Records a receipt and returns its sequence number
 def add_block(receipt, contract_balance, block_info):
-    global singleton
+    _load()
     dict_receipt = convert_receipt(receipt, contract_balance, block_info)
-    if not singleton:
-        singleton = {}
-        for key in dict_receipt.keys():
-            singleton[key] = []
-    for key, value in dict_receipt.items():
-        singleton[key].insert(0, value)
-    return singleton
+    get_store().add(dict_receipt)
+    return singleton.append(dict_receipt)
 
 def get_receipts():
-    if not singleton:
+    _load()
+    if not len(singleton):
         return "There are no receipts to display."
-    return singleton
\ No newline at end of file
+    receipts = dict(zip(RECEIPT_KEYS, singleton.views()))
+    receipts["timestamp"] = [datetime.datetime.utcfromtimestamp(t) for t in receipts["timestamp"]]
+    return receipts
+
+# Buffered receipts as a ledger DataFrame, only rows newer than sequence number
+# `since` and at most `limit` of them when given.  Returns the DataFrame and
+# the sequence number to pass as `since` to get only the rows after it
+def get_receipts_df(since=None, limit=None):
+    _load()
+    return singleton.frame(since, limit)
+
+# Indexed lookup over the full persisted history, see ReceiptStore.query for the
+# filters.  Returns (DataFrame page, cursor for the next page)
+def query_receipts(limit=50, cursor=None, sort="timestamp", descending=True, **filters):
+    return get_store().query(limit=limit, cursor=cursor, sort=sort, descending=descending, **filters)
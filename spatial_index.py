@@ -0,0 +1,170 @@
+import math
+import heapq
+import threading
+from typing import NamedTuple
+
+# In-memory spatial index for geocoded supply sites (inventory products and
+# suppliers).  Sites are bucketed by product type into a uniform lat/lon grid
+# of roughly `cell_km` square cells, so adding or moving a site is O(1) and a
+# query only looks at the cells around the point: within-radius scans the
+# cells covering the radius, nearest-k walks rings of cells outwards and stops
+# once no unvisited cell can hold anything closer.
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+class Site(NamedTuple):
+    key: str
+    kind: str
+    owner: str
+    product_type: str
+    name: str
+    latitude: float
+    longitude: float
+    count: int = 0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class SpatialIndex:
+    def __init__(self, cell_km=5.0):
+        self.cell_deg = cell_km / KM_PER_DEGREE
+        self.cell_km = cell_km
+        self.lock = threading.Lock()
+        # (product_type, row, col) -> {key: Site}
+        self.cells = {}
+        self.sites = {}
+        # sites per product type, and the grid extent (only ever grows, so it
+        # stays a safe bound for the ring search after removals)
+        self.type_counts = {}
+        self.bounds = None
+
+    def _cell(self, latitude, longitude):
+        return math.floor(latitude / self.cell_deg), math.floor(longitude / self.cell_deg)
+
+    # Adds a site, or moves/updates it if its key is already indexed
+    def add(self, site):
+        with self.lock:
+            self._remove(site.key)
+            row, col = self._cell(site.latitude, site.longitude)
+            self.cells.setdefault((site.product_type, row, col), {})[site.key] = site
+            self.sites[site.key] = site
+            self.type_counts[site.product_type] = self.type_counts.get(site.product_type, 0) + 1
+            if self.bounds is None:
+                self.bounds = (row, row, col, col)
+            else:
+                min_row, max_row, min_col, max_col = self.bounds
+                self.bounds = (min(min_row, row), max(max_row, row), min(min_col, col), max(max_col, col))
+
+    def remove(self, key):
+        with self.lock:
+            self._remove(key)
+
+    def _remove(self, key):
+        old = self.sites.pop(key, None)
+        if old is None:
+            return
+        cell = (old.product_type,) + self._cell(old.latitude, old.longitude)
+        bucket = self.cells.get(cell)
+        if bucket is not None:
+            bucket.pop(key, None)
+            if not bucket:
+                del self.cells[cell]
+        self.type_counts[old.product_type] -= 1
+        if not self.type_counts[old.product_type]:
+            del self.type_counts[old.product_type]
+
+    def __len__(self):
+        return len(self.sites)
+
+    def _types(self, product_type):
+        if product_type is not None:
+            return [product_type]
+        return list(self.type_counts)
+
+    def _ring(self, product_types, row, col, radius):
+        # cells at Chebyshev distance `radius` from (row, col), perimeter only
+        if radius == 0:
+            cells = [(row, col)]
+        else:
+            cells = [(r, c) for c in range(col - radius, col + radius + 1) for r in (row - radius, row + radius)]
+            cells += [(r, c) for r in range(row - radius + 1, row + radius) for c in (col - radius, col + radius)]
+        for r, c in cells:
+            for product_type in product_types:
+                bucket = self.cells.get((product_type, r, c))
+                if bucket:
+                    yield from bucket.values()
+
+    def _beyond(self, product_types, row, col, radius):
+        # every site in cells at Chebyshev distance >= `radius`
+        for (product_type, r, c), bucket in self.cells.items():
+            if product_type in product_types and max(abs(r - row), abs(c - col)) >= radius:
+                yield from bucket.values()
+
+    # [(distance_km, Site)] within `radius_km` of the point, nearest first
+    def within(self, latitude, longitude, radius_km, product_type=None, predicate=None):
+        row, col = self._cell(latitude, longitude)
+        # longitude cells shrink towards the poles, widen the column span to match
+        rows = math.ceil(radius_km / self.cell_km)
+        cols = math.ceil(radius_km / (self.cell_km * max(math.cos(math.radians(latitude)), 0.01)))
+        found = []
+        with self.lock:
+            for product_type_ in self._types(product_type):
+                for r in range(row - rows, row + rows + 1):
+                    for c in range(col - cols, col + cols + 1):
+                        for site in self.cells.get((product_type_, r, c), {}).values():
+                            if predicate is not None and not predicate(site):
+                                continue
+                            distance = haversine_km(latitude, longitude, site.latitude, site.longitude)
+                            if distance <= radius_km:
+                                found.append((distance, site))
+        found.sort(key=lambda pair: pair[0])
+        return found
+
+    # The k nearest sites to the point as [(distance_km, Site)], nearest first.
+    # `predicate` filters sites (e.g. in stock), `max_km` bounds the search
+    def nearest(self, latitude, longitude, k=5, product_type=None, predicate=None, max_km=None):
+        row, col = self._cell(latitude, longitude)
+        # every site in ring n is at least (n - 1) cells of latitude away; in
+        # longitude a cell can be narrower, scale by the cosine to stay safe
+        shrink = max(math.cos(math.radians(min(abs(latitude) + self.cell_deg * 4, 89.0))), 0.01)
+        best = []
+        with self.lock:
+            product_types = self._types(product_type)
+            if not self.sites:
+                return []
+            max_radius = self._max_radius(row, col)
+            radius = 0
+            while radius <= max_radius:
+                # far out the rings are mostly empty, visiting the occupied
+                # cells directly is cheaper and ends the search
+                last = 8 * radius > len(self.cells)
+                sites = self._beyond(product_types, row, col, radius) if last else self._ring(product_types, row, col, radius)
+                for site in sites:
+                    if predicate is not None and not predicate(site):
+                        continue
+                    distance = haversine_km(latitude, longitude, site.latitude, site.longitude)
+                    if max_km is not None and distance > max_km:
+                        continue
+                    heapq.heappush(best, (-distance, site.key, site))
+                    if len(best) > k:
+                        heapq.heappop(best)
+                if last:
+                    break
+                closest_unvisited = radius * self.cell_km * shrink
+                if max_km is not None and closest_unvisited > max_km:
+                    break
+                if len(best) == k and closest_unvisited >= -best[0][0]:
+                    break
+                radius += 1
+        return sorted(((-negative, site) for negative, _, site in best), key=lambda pair: pair[0])
+
+    # Ring radius beyond which no indexed cell exists
+    def _max_radius(self, row, col):
+        min_row, max_row, min_col, max_col = self.bounds
+        return max(abs(min_row - row), abs(max_row - row), abs(min_col - col), abs(max_col - col))
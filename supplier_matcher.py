@@ -0,0 +1,139 @@
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from web3 import Web3
+from dotenv import load_dotenv
+load_dotenv()
+
+import geocoder
+import metrics
+from spatial_index import Site, SpatialIndex
+
+# Matches goods requests with nearby stock.  Products registered on the
+# inventory contract (Inventory/inventory_app.py) and the suppliers listed in
+# SUPPLIER_LOCATIONS are geocoded once and kept in a SpatialIndex.  The index
+# is updated incrementally: every sync reads only the Transfer logs since the
+# last synced block, so newly minted products (and products that changed
+# owner) are re-read and re-indexed while everything else stays in place.
+#
+# SUPPLIER_LOCATIONS is a json file of
+#   {"0xSupplier...": {"location": "street city state zip", "product_types": ["Food", "Supplies"]}}
+
+INVENTORY_CONTRACT_ADDRESS = os.getenv("INVENTORY_CONTRACT_ADDRESS", "0x279BFDdB38c74b6b16d87C1f3c519fc6883d8A8c")
+INVENTORY_ABI_PATH = os.getenv("INVENTORY_ABI_PATH", "Inventory/product_abi.json")
+SUPPLIER_LOCATIONS = os.getenv("SUPPLIER_LOCATIONS")
+SYNC_SECONDS = float(os.getenv("SUPPLIER_SYNC_SECONDS", "10"))
+CELL_KM = float(os.getenv("SUPPLIER_INDEX_CELL_KM", "5"))
+
+
+def load_inventory_contract(w3, address=INVENTORY_CONTRACT_ADDRESS, abi_path=INVENTORY_ABI_PATH):
+    with open(Path(abi_path)) as f:
+        abi = json.load(f)
+    return w3.eth.contract(address=Web3.toChecksumAddress(address), abi=abi)
+
+
+def in_stock(site):
+    return site.kind == "supplier" or site.count > 0
+
+
+class SupplierMatcher:
+    def __init__(self, w3, inventory_contract=None, index=None, sync_seconds=SYNC_SECONDS, range_size=5000):
+        self.w3 = w3
+        self.inventory = inventory_contract
+        self.index = index if index is not None else SpatialIndex(CELL_KM)
+        self.sync_seconds = sync_seconds
+        self.range_size = range_size
+        self.sync_lock = threading.Lock()
+        self.last_block = -1
+        self.synced_at = 0.0
+
+    def add_supplier(self, address, location, product_types):
+        found = geocoder.geocode(location)
+        if found is None:
+            return False
+        for product_type in product_types:
+            self.index.add(Site(
+                f"supplier:{address}:{product_type}", "supplier", address, product_type, location, found[0], found[1]
+            ))
+        return True
+
+    # Indexes every supplier in a SUPPLIER_LOCATIONS style json file
+    def load_suppliers(self, path=SUPPLIER_LOCATIONS):
+        if not path:
+            return 0
+        with open(path) as f:
+            suppliers = json.load(f)
+        return sum(
+            self.add_supplier(address, entry["location"], entry.get("product_types", []))
+            for address, entry in suppliers.items()
+        )
+
+    # token ids touched by a Transfer (mint or change of owner) in the block range
+    def _touched(self, from_block, to_block):
+        event = self.inventory.events.Transfer()
+        logs = self.w3.eth.get_logs({
+            "address": self.inventory.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [Web3.keccak(text="Transfer(address,address,uint256)").hex()],
+        })
+        return {event.processLog(log)["args"]["tokenId"] for log in logs}
+
+    def _index_products(self, token_ids):
+        products = {}
+        for token_id in token_ids:
+            name, product_type, _, location, count, _ = self.inventory.functions.inventory(token_id).call()
+            owner = self.inventory.functions.ownerOf(token_id).call()
+            products[token_id] = (name, product_type, location, count, owner)
+        # new locations are geocoded concurrently, known ones come from the cache
+        locations = geocoder.geocode_many({product[2] for product in products.values()})
+        for token_id, (name, product_type, location, count, owner) in products.items():
+            found = locations.get(location)
+            if found is None:
+                self.index.remove(f"product:{token_id}")
+                continue
+            self.index.add(Site(f"product:{token_id}", "product", owner, product_type, name, found[0], found[1], count))
+
+    # Indexes products minted or transferred since the last sync, at most once
+    # every `sync_seconds` unless forced.  Returns the number of products re-read
+    def sync(self, force=False):
+        if self.inventory is None:
+            return 0
+        with self.sync_lock:
+            if not force and time.monotonic() - self.synced_at < self.sync_seconds:
+                return 0
+            with metrics.span("supplier_sync"):
+                head = self.w3.eth.block_number
+                touched = set()
+                from_block = self.last_block + 1
+                while from_block <= head:
+                    to_block = min(from_block + self.range_size - 1, head)
+                    touched |= self._touched(from_block, to_block)
+                    from_block = to_block + 1
+                self._index_products(sorted(touched))
+                self.last_block = head
+            self.synced_at = time.monotonic()
+            return len(touched)
+
+    # Up to `k` suggestions for a request, the nearest in-stock site of each
+    # owner, as [{"supplier", "kind", "product", "count", "distance_km"}]
+    def best_suppliers(self, request_location, product_type, k=3, radius_km=None):
+        self.sync()
+        found = geocoder.geocode(request_location)
+        if found is None:
+            return []
+        with metrics.span("supplier_match"):
+            # ask for extra sites, one owner can hold several nearby products
+            nearest = self.index.nearest(
+                found[0], found[1], k=k * 4, product_type=product_type, predicate=in_stock, max_km=radius_km
+            )
+        suggestions = {}
+        for distance, site in nearest:
+            if site.owner not in suggestions:
+                suggestions[site.owner] = {
+                    "supplier": site.owner, "kind": site.kind, "product": site.name,
+                    "count": site.count if site.kind == "product" else None, "distance_km": round(distance, 2),
+                }
+        return list(suggestions.values())[:k]
@@ -0,0 +1,31 @@
+import pytest
+
+
+# Manually advanced stand-in for time.monotonic
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+# Wraps a one-argument source and records every argument it was called with
+class Counting:
+    def __init__(self, source):
+        self.source = source
+        self.calls = []
+
+    def __call__(self, arg):
+        self.calls.append(arg)
+        return self.source(arg)
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def counting():
+    return Counting
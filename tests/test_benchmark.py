@@ -0,0 +1,61 @@
+import sys
+import json
+import subprocess
+import importlib.util
+from pathlib import Path
+import pytest
+import requests
+import benchmark
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def services():
+    services = benchmark.FakeServices().start()
+    yield services
+    services.stop()
+
+
+def test_fake_pinata_serves_what_was_pinned(services):
+    r = requests.post(f"{services.url}/pinning/pinJSONToIPFS", data=json.dumps({"pinataContent": {"rows": "[]"}}))
+    cid = r.json()["IpfsHash"]
+    assert requests.get(f"{services.url}/ipfs/{cid}").json() == {"rows": "[]"}
+
+    data = b"PAR1\x00\r\n--binary\r\nPAR1"
+    r = requests.post(f"{services.url}/pinning/pinFileToIPFS", files={"file": ("segment.parquet", data)},
+                      data={"pinataOptions": "{}"})
+    assert requests.get(f"{services.url}/ipfs/{r.json()['IpfsHash']}").content == data
+    assert requests.get(f"{services.url}/ipfs/bafkmissing").status_code == 404
+    assert dict(services.requests) == {"pin": 2, "gateway": 3}
+
+
+def test_summarize():
+    summary = benchmark.summarize([0.3, 0.1, 0.2])
+    assert (summary["n"], summary["p50"], summary["max"]) == (3, 0.2, 0.3)
+    assert summary["mean"] == pytest.approx(0.2)
+    assert benchmark.summarize([0.5])["p95"] == 0.5
+
+
+def test_hard_coded_addresses_are_retargeted():
+    nonprofit = "6A11B707EcAE548501Ba9ab92a114C4b98378A08".lower()
+    bytecode = f"6080{nonprofit}00"
+    for source in ("contracts/CC.sol", "contracts/CC_optimized.sol"):
+        retargeted = benchmark.retarget_bytecode(bytecode, "0x" + "1" * 40, "0x" + "2" * 40, str(ROOT / source))
+        assert retargeted == "6080" + "1" * 40 + "00"
+
+
+# One run of every workflow against the in-process chain.  Runs in its own
+# interpreter: the app modules read the fake service urls at import time
+@pytest.mark.skipif(
+    not all(importlib.util.find_spec(module) for module in ("eth_tester", "eth", "solcx")),
+    reason="needs eth-tester[py-evm] and py-solc-x",
+)
+def test_smoke(tmp_path):
+    out = tmp_path / "results.json"
+    subprocess.run([sys.executable, "benchmark.py", "--runs", "1", "--ledger-sizes", "", "--json", str(out)],
+                   cwd=ROOT, check=True, timeout=600)
+    results = json.loads(out.read_text())
+    assert set(results["workflows"]) >= {"donate", "request", "fill", "approve", "pay", "cash", "ledger"}
+    assert results["gas"]["deposit"]["n"] == 1
+    assert results["requests"]["pin"] >= 1
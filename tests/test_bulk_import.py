@@ -0,0 +1,125 @@
+import io
+import sys
+import time
+import threading
+from pathlib import Path
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "Inventory"))
+import bulk_import  # noqa: E402
+
+ROW = {
+    "product_name": "Canned Beans", "product_type": "Food", "product_cost": "2",
+    "product_location": "1200 W Washington St Phoenix AZ", "product_count": "120",
+    "upload_date": "11/21/2022", "token_uri": "ipfs://beans",
+}
+
+
+def row(**changes):
+    return dict(ROW, **changes)
+
+
+# Stub web3 and inventory contract: node-signed sends return a hash right away,
+# receipts take `mine_delay` seconds.  Tracks how many are sent but not mined
+class StubChain:
+    gas_price = 10
+
+    def __init__(self, mine_delay=0.01):
+        self.mine_delay = mine_delay
+        self.lock = threading.Lock()
+        self.sent = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.eth = self
+        self.functions = self
+
+    def get_transaction_count(self, address, block):
+        return 0
+
+    def registerProduct(self, owner, *args):
+        chain = self
+
+        class Function:
+            def transact(self, payload):
+                with chain.lock:
+                    chain.sent.append((payload["nonce"], args))
+                    chain.in_flight += 1
+                    chain.max_in_flight = max(chain.max_in_flight, chain.in_flight)
+                return bytes([payload["nonce"]]) * 32
+        return Function()
+
+    def wait_for_transaction_receipt(self, tx_hash, timeout):
+        time.sleep(self.mine_delay)
+        with self.lock:
+            self.in_flight -= 1
+        return {"status": 1, "blockNumber": 1, "gasUsed": 21000}
+
+
+def test_parse_row():
+    assert bulk_import.parse_row(ROW) == (
+        "Canned Beans", "Food", 2, "1200 W Washington St Phoenix AZ", 120, "11/21/2022", "ipfs://beans")
+
+
+def test_missing_upload_date_defaults_to_today():
+    assert bulk_import.parse_row(row(upload_date=""))[5] == bulk_import.today()
+    undated = row()
+    del undated["upload_date"]
+    assert bulk_import.parse_row(undated)[5] == bulk_import.today()
+
+
+@pytest.mark.parametrize("changes", [
+    {"product_name": " "},
+    {"product_type": "Toys"},
+    {"product_location": ""},
+    {"product_cost": "two"},
+    {"product_cost": ""},
+    {"product_cost": None},
+    {"product_cost": "-1"},
+    {"product_count": "0"},
+    {"product_count": "nan"},
+    {"product_count": "inf"},
+])
+def test_bad_rows_are_rejected(changes):
+    with pytest.raises(ValueError):
+        bulk_import.parse_row(row(**changes))
+
+
+def test_decimal_prices():
+    assert bulk_import.parse_row(row(product_cost="12.0", product_count="3.00"))[2:5:2] == (12, 3)
+    assert bulk_import.parse_row(row(product_cost=" 1e3 "))[2] == 1000
+    with pytest.raises(ValueError, match="whole numbers"):
+        bulk_import.parse_row(row(product_cost="12.5"))
+    with pytest.raises(ValueError, match="whole numbers"):
+        bulk_import.parse_row(row(product_count="0.5"))
+
+
+def test_missing_columns():
+    with pytest.raises(ValueError, match="product_cost, product_count"):
+        list(bulk_import.read_rows(io.StringIO("product_name,product_type,product_location,token_uri\n")))
+    # a short row leaves the trailing columns empty
+    stream = io.StringIO("product_name,product_type,product_cost,product_location,product_count,token_uri\n"
+                         "Canned Beans,Food,2\n")
+    [(line, short)] = bulk_import.read_rows(stream)
+    assert line == 2
+    with pytest.raises(ValueError):
+        bulk_import.parse_row(short)
+
+
+def test_in_flight_window():
+    chain = StubChain()
+    importer = bulk_import.BulkImporter(chain, chain, "0xsender", window=3)
+    rows = [(line, row(product_name=f"item {line}")) for line in range(2, 22)]
+    results = importer.run(rows)
+    assert [result["status"] for result in results] == [bulk_import.MINED] * 20
+    assert chain.max_in_flight == 3
+    # one nonce per row, in row order
+    assert [nonce for nonce, _ in chain.sent] == list(range(20))
+
+
+def test_invalid_rows_do_not_take_a_nonce():
+    chain = StubChain(mine_delay=0)
+    importer = bulk_import.BulkImporter(chain, chain, "0xsender")
+    results = importer.run([(2, row()), (3, row(product_type="Toys")), (4, row())])
+    assert [result["status"] for result in results] == [bulk_import.MINED, bulk_import.INVALID, bulk_import.MINED]
+    assert results[1]["tx_hash"] is None
+    assert [nonce for nonce, _ in chain.sent] == [0, 1]
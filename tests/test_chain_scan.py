@@ -0,0 +1,126 @@
+import datetime
+from types import SimpleNamespace
+import pytest
+from eth_utils import function_abi_to_4byte_selector
+from hexbytes import HexBytes
+from chain_scan import ChainScanner, diff_ledgers
+from tx_pipeline import LedgerRow, ledger_frame
+
+CONTRACT = "0x00000000000000000000000000000000000000cc"
+UPDATE_IPFS_HASH = {"type": "function", "name": "updateIPFSHash", "inputs": [{"name": "newHash", "type": "string"}]}
+DEPOSIT = {"type": "function", "name": "deposit", "inputs": [{"name": "donation", "type": "uint256"}]}
+
+
+def row(i, balance=None, sender="0xAlice"):
+    return LedgerRow(str(balance if balance is not None else i * 10 ** 18), f"0x{i:064x}", sender, "0xCC", 21000,
+                     datetime.datetime(2022, 1, 1) + datetime.timedelta(seconds=i))
+
+
+def test_identical_ledgers_have_no_differences():
+    chain_df = ledger_frame([row(1), row(2)])
+    # the IPFS round trip turns hashes, addresses and balances into other types
+    ipfs_df = chain_df.copy()
+    ipfs_df.index = ipfs_df.index.str.upper().str.replace("0X", "0x")
+    ipfs_df["From"] = ipfs_df["From"].str.upper()
+    ipfs_df["Contract Balance"] = ipfs_df["Contract Balance"].astype(object).map(int)
+    ipfs_df["Timestamp"] = ipfs_df["Timestamp"].astype(str)
+    assert diff_ledgers(chain_df, ipfs_df).empty
+
+
+def test_missing_extra_and_mismatched_rows():
+    chain_df = ledger_frame([row(1), row(2), row(3)])
+    ipfs_df = ledger_frame([row(1, balance=7), row(3, sender="0xBob"), row(4)])
+    problems = diff_ledgers(chain_df, ipfs_df).set_index(["Tx Hash", "Problem", "Column"], drop=False)
+    assert sorted(zip(problems["Tx Hash"], problems["Problem"], problems["Column"].fillna("-"))) == [
+        (f"0x{1:064x}", "mismatch", "Contract Balance"),
+        (f"0x{2:064x}", "missing from IPFS ledger", "-"),
+        (f"0x{3:064x}", "mismatch", "From"),
+        (f"0x{4:064x}", "not found on chain", "-"),
+    ]
+    balance = problems.loc[(f"0x{1:064x}", "mismatch", "Contract Balance")]
+    assert (balance["Chain"], balance["IPFS"]) == (str(10 ** 18), "7")
+
+
+# Stub chain for the non-batched code path: block n holds one deposit to the
+# contract (every third block also an anchor, which the scan skips) and a
+# transfer elsewhere.  Blocks in `fail_blocks` raise once
+class StubEth:
+    def __init__(self, head, fail_blocks=()):
+        self.block_number = head
+        self.fail_blocks = set(fail_blocks)
+        self.fetched = []
+        deposit = "0x" + function_abi_to_4byte_selector(DEPOSIT).hex().replace("0x", "")
+        anchor = "0x" + function_abi_to_4byte_selector(UPDATE_IPFS_HASH).hex().replace("0x", "")
+        self.selectors = (deposit, anchor)
+
+    def get_block(self, n, full_transactions=True):
+        self.fetched.append(n)
+        if n in self.fail_blocks:
+            self.fail_blocks.discard(n)
+            raise ConnectionError(f"block {n} timed out")
+        deposit, anchor = self.selectors
+        txs = [
+            {"to": "0x00000000000000000000000000000000000000ee", "input": deposit + "00", "hash": HexBytes(bytes([n, 9]) * 16),
+             "transactionIndex": 0},
+            {"to": CONTRACT.upper().replace("0X", "0x"), "input": deposit + "00", "hash": HexBytes(bytes([n, 1]) * 16),
+             "transactionIndex": 1},
+        ]
+        if n % 3 == 0:
+            txs.append({"to": CONTRACT, "input": anchor + "00", "hash": HexBytes(bytes([n, 2]) * 16), "transactionIndex": 2})
+        return {"number": n, "timestamp": 1640995200 + 15 * n, "transactions": txs}
+
+    def get_transaction_receipt(self, tx_hash):
+        return {"transactionHash": HexBytes(tx_hash), "from": "0xAlice", "to": CONTRACT, "gasUsed": 21000,
+                "status": 1}
+
+    def get_balance(self, address, block_identifier):
+        return block_identifier * 10 ** 18
+
+
+def scanner(tmp_path, eth, **kwargs):
+    w3 = SimpleNamespace(eth=eth, provider=object())
+    contract = SimpleNamespace(address=CONTRACT, abi=[DEPOSIT, UPDATE_IPFS_HASH])
+    return ChainScanner(w3, contract, path=tmp_path / "scan.db", **kwargs)
+
+
+def test_scan_rebuilds_contract_rows(tmp_path):
+    eth = StubEth(head=9)
+    found = scanner(tmp_path, eth, workers=2, range_size=4, batch_size=3).scan(from_block=1)
+    ledger = scanner(tmp_path, eth).ledger()
+    assert found == len(ledger) == 9
+    # newest first, anchors and other contracts left out
+    assert list(ledger.index) == [HexBytes(bytes([n, 1]) * 16).hex() for n in range(9, 0, -1)]
+    assert ledger["Contract Balance"].tolist() == [str(n * 10 ** 18) for n in range(9, 0, -1)]
+
+
+def test_interrupted_scan_resumes_with_the_unfinished_ranges(tmp_path):
+    eth = StubEth(head=12, fail_blocks={6})
+    interrupted = scanner(tmp_path, eth, workers=1, range_size=4)
+    with pytest.raises(ConnectionError):
+        interrupted.scan(from_block=1)
+    # blocks 1-4 were committed before the failure
+    assert len(interrupted.ledger()) == 4
+
+    eth.fetched.clear()
+    resumed = scanner(tmp_path, eth, workers=1, range_size=4)
+    assert resumed.scan(from_block=1) == 8
+    assert sorted(eth.fetched) == list(range(5, 13))
+    ledger = resumed.ledger()
+    assert len(ledger) == 12 and ledger.index.is_unique
+
+    # nothing left to do, and a higher head only scans the new blocks
+    eth.fetched.clear()
+    assert resumed.scan(from_block=1) == 0
+    assert eth.fetched == []
+    eth.block_number = 14
+    assert resumed.scan(from_block=1) == 2
+    assert eth.fetched == [13, 14]
+
+
+def test_reset_forgets_progress(tmp_path):
+    eth = StubEth(head=4)
+    scan = scanner(tmp_path, eth)
+    scan.scan(from_block=1)
+    scan.reset()
+    assert scan.ledger().empty
+    assert scan.scan(from_block=1) == 4
@@ -0,0 +1,154 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+import pytest
+from eth_abi import encode_abi
+from eth_utils import event_abi_to_log_topic
+from hexbytes import HexBytes
+from web3 import Web3
+from event_indexer import EventIndexer
+
+ROOT = Path(__file__).resolve().parent.parent
+ABI = json.loads((ROOT / "contracts/compiled/CC_abi.json").read_text())
+EVENTS = {abi["name"]: abi for abi in ABI if abi["type"] == "event"}
+CONTRACT = Web3.toChecksumAddress("0x" + "cc" * 20)
+
+
+def address(n):
+    return Web3.toChecksumAddress(f"0x{n:040x}")
+
+
+def deposit_log(block, log_index, tx, donor=1, amount=5):
+    return {
+        "address": CONTRACT,
+        "topics": [HexBytes(event_abi_to_log_topic(EVENTS["Deposit"])), HexBytes(bytes(12) + bytes.fromhex(address(donor)[2:]))],
+        "data": "0x" + encode_abi(["uint256", "uint256"], [amount, amount * 10]).hex(),
+        "blockNumber": block,
+        "logIndex": log_index,
+        "transactionIndex": 0,
+        "transactionHash": HexBytes(tx.to_bytes(32, "big")),
+        "blockHash": HexBytes(block.to_bytes(32, "big")),
+        "removed": False,
+    }
+
+
+def cash_sent_log(block, log_index, tx, cash_request_id=1):
+    return {
+        "address": CONTRACT,
+        "topics": [
+            HexBytes(event_abi_to_log_topic(EVENTS["CashSent"])),
+            HexBytes(cash_request_id.to_bytes(32, "big")),
+            HexBytes(bytes(12) + bytes.fromhex(address(2)[2:])),
+        ],
+        "data": "0x" + encode_abi(["uint256"], [7]).hex(),
+        "blockNumber": block,
+        "logIndex": log_index,
+        "transactionIndex": 0,
+        "transactionHash": HexBytes(tx.to_bytes(32, "big")),
+        "blockHash": HexBytes(block.to_bytes(32, "big")),
+        "removed": False,
+    }
+
+
+def tx_hash(tx):
+    return HexBytes(tx.to_bytes(32, "big")).hex()
+
+
+# Stub node answering eth_getLogs from a list of logs.  Like Infura it refuses
+# ranges matching more than `max_results` logs
+class StubEth:
+    def __init__(self, logs, head, max_results=None):
+        self.logs = logs
+        self.head = head
+        self.max_results = max_results
+        self.requests = []
+        self.head_calls = 0
+
+    @property
+    def block_number(self):
+        self.head_calls += 1
+        return self.head
+
+    def get_logs(self, params):
+        assert params["address"] == CONTRACT
+        matching = [log for log in self.logs if params["fromBlock"] <= log["blockNumber"] <= params["toBlock"]]
+        ok = self.max_results is None or len(matching) <= self.max_results
+        self.requests.append((params["fromBlock"], params["toBlock"], ok))
+        if not ok:
+            raise ValueError({"code": -32005, "message": "query returned more than 10000 results"})
+        return matching
+
+
+def indexer(tmp_path, eth, **kwargs):
+    w3 = Web3()
+    contract = w3.eth.contract(address=CONTRACT, abi=ABI)
+    return EventIndexer(SimpleNamespace(eth=eth), contract, path=tmp_path / "events.db", **kwargs)
+
+
+def test_ranges_shrink_on_too_many_results_and_grow_back(tmp_path):
+    # one deposit every 10 blocks, the node allows 5 logs per request
+    logs = [deposit_log(block, 0, block) for block in range(0, 3000, 10)]
+    eth = StubEth(logs, head=2999, max_results=5)
+    events = indexer(tmp_path, eth)
+    assert events.sync() == 300
+    assert events.last_block() == 2999
+
+    # every block is covered once by a successful request
+    answered = sorted((start, end) for start, end, ok in eth.requests if ok)
+    assert answered[0][0] == 0 and answered[-1][1] == 2999
+    assert all(end + 1 == next_start for (_, end), (next_start, _) in zip(answered, answered[1:]))
+    # the first request was refused and halved until it fit, later ranges are
+    # widened after a success and halved again when refused
+    assert eth.requests[0] == (0, 1999, False)
+    refused = [end - start + 1 for start, end, ok in eth.requests if not ok]
+    assert len(refused) > 1
+    sizes = [end - start + 1 for start, end in answered]
+    assert any(later > earlier for earlier, later in zip(sizes, sizes[1:]))
+    assert len(events.query(limit=1000)) == 300
+
+
+def test_a_range_that_fails_at_min_range_raises(tmp_path):
+    logs = [deposit_log(5, i, 100 + i) for i in range(3)]
+    eth = StubEth(logs, head=10, max_results=2)
+    events = indexer(tmp_path, eth, min_range=1)
+    with pytest.raises(ValueError):
+        events.sync()
+    # blocks before the crowded one are kept
+    assert events.last_block() == 4
+
+
+def test_checkpoint_resume(tmp_path):
+    logs = [deposit_log(block, 0, block) for block in range(1, 40)]
+    eth = StubEth(logs, head=20)
+    assert indexer(tmp_path, eth).sync() == 20
+
+    eth.head = 39
+    eth.requests.clear()
+    restarted = indexer(tmp_path, eth)
+    assert restarted.last_block() == 20
+    assert restarted.sync() == 19
+    assert eth.requests[0][0] == 21
+    assert len(restarted.query(limit=100)) == 39
+
+    # a known head skips the eth_blockNumber call, and nothing new means no getLogs
+    eth.head_calls = 0
+    eth.requests.clear()
+    assert restarted.sync(block_number=39) == 0
+    assert (eth.head_calls, eth.requests) == (0, [])
+
+
+def test_positions_and_events_for(tmp_path):
+    logs = [
+        deposit_log(3, 0, 1),
+        # one transaction emitting two events: its first log orders it
+        cash_sent_log(3, 4, 2),
+        deposit_log(3, 5, 2),
+        deposit_log(7, 1, 3),
+    ]
+    events = indexer(tmp_path, StubEth(logs, head=10))
+    events.sync()
+    hashes = [tx_hash(tx) for tx in (1, 2, 3, 4)]
+    assert events.positions_for(hashes) == {hashes[0]: (3, 0), hashes[1]: (3, 4), hashes[2]: (7, 1)}
+    assert events.events_for(hashes) == {hashes[0]: "Deposit", hashes[1]: "CashSent", hashes[2]: "Deposit"}
+    assert events.latest("Deposit")["donor"] == address(1)
+    assert events.query(actor=address(2).lower())["Event"].tolist() == ["CashSent"]
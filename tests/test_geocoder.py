@@ -0,0 +1,53 @@
+import json
+import pytest
+from geocoder import FixtureProvider, Geocoder
+
+
+@pytest.fixture
+def fixture_path(tmp_path):
+    path = tmp_path / "geocodes.json"
+    path.write_text(json.dumps({
+        "1 Main St, Springfield IL 62701": [39.8, -89.65],
+        "20 Oak Ave Springfield IL 62702": [39.79, -89.62],
+    }))
+    return path
+
+
+def test_fixture_provider_matches_normalized_addresses(fixture_path):
+    provider = FixtureProvider(fixture_path)
+    assert provider("1 MAIN ST Springfield, IL 62701") == (39.8, -89.65)
+    assert provider("unknown address") is None
+
+
+def test_geocoder_looks_each_address_up_once(fixture_path, tmp_path, counting):
+    provider = counting(FixtureProvider(fixture_path))
+    geocoder = Geocoder(provider, path=tmp_path / "geocode.db")
+    assert geocoder.geocode("1 Main St Springfield IL 62701") == (39.8, -89.65)
+    assert geocoder.geocode("1 main st, springfield, il 62701") == (39.8, -89.65)
+    assert len(provider.calls) == 1
+
+    # the cache outlives the process
+    reopened = Geocoder(counting(FixtureProvider(fixture_path)), path=tmp_path / "geocode.db")
+    assert reopened.cached("1 MAIN ST SPRINGFIELD IL 62701") == (39.8, -89.65)
+
+
+def test_unknown_addresses_are_none_and_not_cached(fixture_path, tmp_path, counting):
+    provider = counting(FixtureProvider(fixture_path))
+    geocoder = Geocoder(provider, path=tmp_path / "geocode.db")
+    assert geocoder.geocode("nowhere") is None
+    assert geocoder.geocode("nowhere") is None
+    assert len(provider.calls) == 2
+
+
+def test_geocode_many_looks_up_each_distinct_address_once(fixture_path, tmp_path, counting):
+    provider = counting(FixtureProvider(fixture_path))
+    geocoder = Geocoder(provider, path=tmp_path / "geocode.db", max_workers=4)
+    geocoder.geocode("20 Oak Ave Springfield IL 62702")
+    addresses = ["1 Main St Springfield IL 62701", "1 MAIN ST, Springfield IL 62701", "20 Oak Ave Springfield IL 62702", "nowhere"]
+    assert geocoder.geocode_many(addresses) == {
+        "1 Main St Springfield IL 62701": (39.8, -89.65),
+        "1 MAIN ST, Springfield IL 62701": (39.8, -89.65),
+        "20 Oak Ave Springfield IL 62702": (39.79, -89.62),
+        "nowhere": None,
+    }
+    assert sorted(provider.calls) == ["1 main st springfield il 62701", "20 oak ave springfield il 62702", "nowhere"]
@@ -0,0 +1,129 @@
+import json
+import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+import pytest
+import http_session
+
+
+# Local server answering each path from a script of (status, headers, body),
+# the last entry repeats.  Counts requests per (method, path)
+class ScriptedServer:
+    def __init__(self):
+        self.scripts = {}
+        self.delays = {}
+        self.hits = Counter()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def respond(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                server.hits[(self.command, self.path)] += 1
+                time.sleep(server.delays.get(self.path, 0))
+                script = server.scripts[self.path]
+                status, headers, body = script.pop(0) if len(script) > 1 else script[0]
+                data = body if isinstance(body, bytes) else json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = respond
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        threading.Thread(target=self.httpd.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True).start()
+
+    def script(self, path, *responses, delay=0):
+        self.scripts[path] = list(responses)
+        self.delays[path] = delay
+        return self.url + path
+
+
+OK = (200, {}, {"ok": True})
+UNAVAILABLE = (503, {}, {"error": "unavailable"})
+
+
+@pytest.fixture
+def server(monkeypatch):
+    server = ScriptedServer()
+    # no backoff, so retried requests do not slow the tests down
+    monkeypatch.setattr(http_session, "session", http_session.make_session(retries=3, backoff=0))
+    yield server
+    server.httpd.shutdown()
+
+
+def test_session_retries_get(server):
+    url = server.script("/block", UNAVAILABLE, UNAVAILABLE, OK)
+    assert http_session.get(url).json() == {"ok": True}
+    assert server.hits[("GET", "/block")] == 3
+
+
+def test_session_does_not_retry_post(server):
+    # a replayed JSON-RPC POST could send a transaction twice
+    url = server.script("/rpc", UNAVAILABLE, OK)
+    assert http_session.post(url, json={"method": "eth_sendRawTransaction"}).status_code == 503
+    assert server.hits[("POST", "/rpc")] == 1
+
+
+def test_post_idempotent_retries(server, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(http_session, "time", SimpleNamespace(sleep=sleeps.append))
+    url = server.script("/pin", (429, {"Retry-After": "2"}, {}), UNAVAILABLE, OK)
+    response = http_session.post_idempotent(url, backoff=0.5, data="{}")
+    assert response.json() == {"ok": True}
+    assert server.hits[("POST", "/pin")] == 3
+    # Retry-After is honoured, otherwise the backoff is jittered below backoff * 2 ** attempt
+    assert sleeps[0] == 2.0
+    assert 0 <= sleeps[1] <= 1.0
+
+
+def test_post_idempotent_gives_up(server, monkeypatch):
+    monkeypatch.setattr(http_session, "time", SimpleNamespace(sleep=lambda seconds: None))
+    url = server.script("/pin", UNAVAILABLE)
+    assert http_session.post_idempotent(url, retries=2, data="{}").status_code == 503
+    assert server.hits[("POST", "/pin")] == 3
+
+
+def test_race_get_returns_the_first_success(server):
+    broken = server.script("/broken/cid", (500, {}, {"error": "boom"}))
+    invalid = server.script("/invalid/cid", (200, {}, b"not json"))
+    slow = server.script("/slow/cid", (200, {}, {"gateway": "slow"}), delay=1.0)
+    fast = server.script("/fast/cid", (200, {}, {"gateway": "fast"}), delay=0.05)
+    started = time.monotonic()
+    assert http_session.race_get([broken, invalid, slow, fast]) == {"gateway": "fast"}
+    assert time.monotonic() - started < 0.9
+
+
+def test_race_get_cancels_the_rest(server, monkeypatch):
+    # one worker: once the first gateway answers the worker moves on to the
+    # second (slow) one, and the third is still queued when the race is decided
+    monkeypatch.setattr(http_session, "_race_pool", ThreadPoolExecutor(max_workers=1))
+    urls = [server.script("/gateway0/cid", OK), server.script("/gateway1/cid", OK, delay=0.3),
+            server.script("/gateway2/cid", OK)]
+    assert http_session.race_get(urls) == {"ok": True}
+    http_session._race_pool.shutdown(wait=True)
+    assert server.hits[("GET", "/gateway0/cid")] == 1
+    assert server.hits[("GET", "/gateway2/cid")] == 0
+
+
+def test_race_get_reports_every_failure(server):
+    urls = [server.script("/a/cid", (404, {}, {})), server.script("/b/cid", (200, {}, b""))]
+    with pytest.raises(http_session.AllGatewaysFailed) as failed:
+        http_session.race_get(urls, parse=lambda response: response.content or int("empty"))
+    assert set(failed.value.args[0]) == set(urls)
+
+
+def test_timeouts_by_host():
+    assert http_session.timeout_for("https://api.pinata.cloud/pinning/pinJSONToIPFS") == (5, 60)
+    assert http_session.timeout_for("http://127.0.0.1:8545") == http_session.DEFAULT_TIMEOUT
@@ -0,0 +1,177 @@
+import json
+import datetime
+from types import SimpleNamespace
+import pytest
+import http_session
+import ipfs
+import ledger_codec
+from ledger_cache import LedgerCache
+from tx_pipeline import LedgerRow, ledger_frame
+
+PIN_FORMATS = ["json", "parquet"] if ledger_codec.available else ["json"]
+
+
+class Response:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+# Stand-in for the Pinata API and the IPFS gateways: pins are stored under a
+# made up CID and every gateway read is recorded
+class FakePinata:
+    def __init__(self):
+        self.store = {}
+        self.gets = []
+
+    def post_idempotent(self, url, data=None, files=None, headers=None, **kwargs):
+        if files is not None:
+            content = files["file"][1]
+        else:
+            content = json.dumps(json.loads(data)["pinataContent"]).encode()
+        cid = f"cid{len(self.store) + 1}"
+        self.store[cid] = content
+        return Response({"IpfsHash": cid})
+
+    def ipfs_get_bytes(self, cid, gateways=None):
+        self.gets.append(cid)
+        return self.store[cid]
+
+    def segment(self, cid):
+        return ipfs.retrieve_segment(cid)
+
+
+class FakeContract:
+    def __init__(self):
+        self.head = ''
+        self.functions = SimpleNamespace(getIPFSHash=lambda: SimpleNamespace(call=lambda: self.head))
+
+
+@pytest.fixture(params=PIN_FORMATS)
+def pinata(request, tmp_path, monkeypatch):
+    fake = FakePinata()
+    cache = LedgerCache(tmp_path / "cache")
+    monkeypatch.setattr(http_session, "post_idempotent", fake.post_idempotent)
+    monkeypatch.setattr(http_session, "ipfs_get_bytes", fake.ipfs_get_bytes)
+    monkeypatch.setattr(ipfs, "get_cache", lambda: cache)
+    monkeypatch.setattr(ipfs, "PIN_FORMAT", request.param)
+    monkeypatch.setattr(ipfs, "_published", set())
+    monkeypatch.setattr(ipfs, "_resolved", (None, None))
+    fake.cache = cache
+    return fake
+
+
+def rows(*ids):
+    return ledger_frame(
+        LedgerRow(str(i * 10 ** 18), f"0x{i:04x}", "0xAlice", "0xCC", 21000, datetime.datetime(2022, 1, 1, 0, 0, i))
+        for i in ids
+    )
+
+
+# Pins and anchors an update the way updateIPFS_df does, returns the new head
+def update(contract, frame):
+    cid, new_df = ipfs.pin_ledger_update(contract, frame)
+    if cid is not None:
+        contract.head = cid
+        ipfs._published.update(new_df.index)
+    return cid
+
+
+def test_first_update_pins_a_checkpoint(pinata):
+    contract = FakeContract()
+    cid = update(contract, rows(1, 2))
+    header, df = pinata.segment(cid)
+    assert (header["prev"], header["checkpoint"], header["depth"]) == (None, True, 0)
+    assert list(df.index) == ["0x0001", "0x0002"]
+    assert df["Contract Balance"].tolist() == [str(10 ** 18), str(2 * 10 ** 18)]
+
+
+def test_updates_pin_only_new_rows_chained_onto_the_head(pinata):
+    contract = FakeContract()
+    first = update(contract, rows(1, 2))
+    # the session history is sent again with one new row
+    second = update(contract, rows(1, 2, 3))
+    header, df = pinata.segment(second)
+    assert (header["prev"], header["checkpoint"], header["depth"]) == (first, False, 1)
+    assert list(df.index) == ["0x0003"]
+
+
+def test_nothing_new_pins_nothing(pinata):
+    contract = FakeContract()
+    update(contract, rows(1, 2))
+    cid, new_df = ipfs.pin_ledger_update(contract, rows(2, 1))
+    assert cid is None and new_df.empty
+    assert len(pinata.store) == 1
+
+
+def test_compaction_every_compact_every_segments(pinata, monkeypatch):
+    monkeypatch.setattr(ipfs, "COMPACT_EVERY", 3)
+    contract = FakeContract()
+    heads = [update(contract, rows(i)) for i in range(1, 5)]
+    depths = [pinata.segment(cid)[0]["depth"] for cid in heads]
+    assert depths == [0, 1, 2, 0]
+    header, df = pinata.segment(heads[-1])
+    # the checkpoint holds the whole ledger, newest first, and still points back
+    assert (header["prev"], header["checkpoint"]) == (heads[-2], True)
+    assert list(df.index) == ["0x0004", "0x0003", "0x0002", "0x0001"]
+    # the next update chains onto the checkpoint
+    header, _ = pinata.segment(update(contract, rows(5)))
+    assert (header["prev"], header["checkpoint"], header["depth"]) == (heads[-1], False, 1)
+
+
+def test_walk_back_stops_at_the_checkpoint(pinata, monkeypatch):
+    monkeypatch.setattr(ipfs, "COMPACT_EVERY", 3)
+    contract = FakeContract()
+    heads = [update(contract, rows(i)) for i in range(1, 7)]
+    pinata.cache.clear()
+    pinata.gets.clear()
+    df = ipfs.retrieve_block_df(contract.head)
+    assert list(df.index) == [f"0x{i:04x}" for i in range(6, 0, -1)]
+    # head, its parent and the checkpoint pinned by the fourth update
+    assert pinata.gets == [heads[5], heads[4], heads[3]]
+
+
+def test_only_the_latest_resolved_ledger_is_kept(pinata):
+    contract = FakeContract()
+    first = update(contract, rows(1))
+    ipfs.retrieve_block_df(first).drop(index="0x0001", inplace=True)
+    gets = len(pinata.gets)
+    assert list(ipfs.retrieve_block_df(first).index) == ["0x0001"]
+    assert len(pinata.gets) == gets
+
+    second = update(contract, rows(2))
+    pinata.gets.clear()
+    assert list(ipfs.retrieve_block_df(second).index) == ["0x0002", "0x0001"]
+    # the older segment comes from the cache, only the new head is downloaded
+    assert pinata.gets == [second]
+    # segments are cached by CID, resolved ledgers are not
+    assert not any(path.name.startswith("ledger-") for path in pinata.cache.root.iterdir())
+
+
+def test_rows_since_read_only_the_newer_segments(pinata, monkeypatch):
+    monkeypatch.setattr(ipfs, "COMPACT_EVERY", 4)
+    contract = FakeContract()
+    heads = [update(contract, rows(i)) for i in range(1, 4)]
+    pinata.cache.clear()
+    pinata.gets.clear()
+    assert list(ipfs.retrieve_ledger_since(heads[2], heads[0]).index) == ["0x0003", "0x0002"]
+    assert pinata.gets == [heads[2], heads[1]]
+    assert ipfs.retrieve_ledger_since(heads[2], heads[2]).empty
+    assert list(ipfs.retrieve_ledger_since(heads[2]).index) == ["0x0003", "0x0002", "0x0001"]
+
+
+def test_rows_since_stop_at_a_checkpoint(pinata, monkeypatch):
+    monkeypatch.setattr(ipfs, "COMPACT_EVERY", 2)
+    contract = FakeContract()
+    heads = [update(contract, rows(i)) for i in range(1, 4)]
+    pinata.cache.clear()
+    pinata.gets.clear()
+    # the third update compacted the chain, its checkpoint holds every row
+    df = ipfs.retrieve_ledger_since(heads[2], heads[0])
+    assert list(df.index) == ["0x0003", "0x0002", "0x0001"]
+    assert pinata.gets == [heads[2]]
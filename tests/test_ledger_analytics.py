@@ -0,0 +1,124 @@
+import random
+import pandas as pd
+from ledger_analytics import LedgerAnalytics, UNATTRIBUTED
+
+ETHER = 10 ** 18
+
+
+def ledger(rows):
+    df = pd.DataFrame(rows, columns=['Tx Hash', 'Contract Balance', 'From', 'To', 'Gas', 'Timestamp'])
+    df['Contract Balance'] = df['Contract Balance'].astype(str)
+    return df.set_index('Tx Hash')
+
+
+def totals(analytics):
+    return {
+        address: (totals["donated"], totals["paid_out"])
+        for address, totals in analytics.addresses.items()
+        if totals["donated"] or totals["paid_out"]
+    }
+
+
+def test_balance_changes_credit_the_sender():
+    analytics = LedgerAnalytics()
+    analytics.add(ledger([
+        ('0x01', 5 * ETHER, 'alice', 'cc', 21000, pd.Timestamp('2022-01-01 10:00')),
+        ('0x02', 3 * ETHER, 'bob', 'cc', 30000, pd.Timestamp('2022-01-01 11:00')),
+        ('0x03', 4 * ETHER, 'carol', 'cc', 25000, pd.Timestamp('2022-01-02 09:00')),
+    ]))
+    assert totals(analytics) == {'alice': (5 * ETHER, 0), 'bob': (0, 2 * ETHER), 'carol': (ETHER, 0)}
+    daily = analytics.daily_frame()
+    assert daily['Donations (ETH)'].tolist() == [5.0, 1.0]
+    assert daily['Payouts (ETH)'].tolist() == [2.0, 0.0]
+    assert daily['Gas'].tolist() == [51000, 25000]
+
+
+def test_out_of_order_row_corrects_the_next_row():
+    rows = [
+        ('0x01', 5 * ETHER, 'alice', 'cc', 21000, pd.Timestamp('2022-01-01 10:00')),
+        ('0x02', 3 * ETHER, 'bob', 'cc', 30000, pd.Timestamp('2022-01-01 11:00')),
+        ('0x03', 4 * ETHER, 'carol', 'cc', 25000, pd.Timestamp('2022-01-01 12:00')),
+    ]
+    analytics = LedgerAnalytics()
+    assert analytics.add(ledger([rows[0], rows[2]])) == 2
+    # carol is credited against alice's balance until bob's row arrives
+    assert totals(analytics) == {'alice': (5 * ETHER, 0), 'carol': (0, ETHER)}
+    assert analytics.add(ledger([rows[1]])) == 1
+    assert totals(analytics) == {'alice': (5 * ETHER, 0), 'bob': (0, 2 * ETHER), 'carol': (ETHER, 0)}
+
+
+def test_rows_already_seen_are_skipped():
+    analytics = LedgerAnalytics()
+    df = ledger([('0x01', ETHER, 'alice', 'cc', 21000, pd.Timestamp('2022-01-01'))])
+    assert analytics.add(df) == 1
+    assert analytics.add(df) == 0
+    assert analytics.unseen(df).empty
+    assert analytics.address_frame().loc['alice', 'Transactions'] == 1
+
+
+def test_blocks_in_the_same_second_follow_block_order():
+    second = pd.Timestamp('2022-01-01 10:00')
+    # bob's block comes first although alice's tx hash sorts first
+    df = ledger([
+        ('0xaa', 3 * ETHER, 'alice', 'cc', 21000, second),
+        ('0xbb', 5 * ETHER, 'bob', 'cc', 21000, second),
+    ])
+    analytics = LedgerAnalytics()
+    analytics.add(df, positions={'0xbb': (7, 0), '0xaa': (8, 0)})
+    assert totals(analytics) == {'bob': (5 * ETHER, 0), 'alice': (0, 2 * ETHER)}
+
+
+def test_shared_block_is_unattributed():
+    df = ledger([
+        ('0x01', 2 * ETHER, 'alice', 'cc', 21000, pd.Timestamp('2022-01-01 10:00')),
+        ('0x02', 5 * ETHER, 'bob', 'cc', 21000, pd.Timestamp('2022-01-01 10:01')),
+        ('0x03', 5 * ETHER, 'carol', 'cc', 21000, pd.Timestamp('2022-01-01 10:01')),
+    ])
+    analytics = LedgerAnalytics()
+    analytics.add(df, positions={'0x01': (1, 0), '0x02': (2, 0), '0x03': (2, 1)})
+    assert totals(analytics) == {'alice': (2 * ETHER, 0), UNATTRIBUTED: (3 * ETHER, 0)}
+
+
+def test_same_second_without_blocks_is_unattributed():
+    second = pd.Timestamp('2022-01-01 10:00')
+    analytics = LedgerAnalytics()
+    analytics.add(ledger([
+        ('0xaa', 3 * ETHER, 'alice', 'cc', 21000, second),
+        ('0xbb', 5 * ETHER, 'bob', 'cc', 21000, second),
+    ]))
+    assert set(totals(analytics)) == {UNATTRIBUTED}
+
+
+def test_shuffled_batches_match_a_full_recompute():
+    rng = random.Random(7)
+    rows, positions, blocks = [], {}, []
+    balance = 0
+    for block in range(120):
+        balance += rng.randint(-5, 10) * ETHER
+        # three blocks a second, so timestamps alone cannot order them
+        timestamp = pd.Timestamp('2022-01-01') + pd.Timedelta(seconds=block // 3)
+        tx_hashes = []
+        for index in range(1 if rng.random() < 0.8 else 2):
+            tx_hash = f'0x{rng.getrandbits(64):016x}'
+            rows.append((tx_hash, balance, f'addr{rng.randint(0, 3)}', 'cc', 21000, timestamp))
+            positions[tx_hash] = (block, index)
+            tx_hashes.append(tx_hash)
+        blocks.append((balance, tx_hashes))
+
+    expected, previous = {}, 0
+    senders = {row[0]: row[2] for row in rows}
+    for balance, tx_hashes in blocks:
+        change, previous = balance - previous, balance
+        address = senders[tx_hashes[0]] if len(tx_hashes) == 1 else UNATTRIBUTED
+        donated, paid_out = expected.get(address, (0, 0))
+        expected[address] = (donated + max(change, 0), paid_out + max(-change, 0))
+    expected = {address: pair for address, pair in expected.items() if pair != (0, 0)}
+
+    df = ledger(rows)
+    shuffled = list(df.index)
+    rng.shuffle(shuffled)
+    analytics = LedgerAnalytics()
+    for start in range(0, len(shuffled), 9):
+        analytics.add(df.loc[shuffled[start:start + 9]], positions=positions)
+    assert len(analytics) == len(rows)
+    assert totals(analytics) == expected
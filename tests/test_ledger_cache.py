@@ -0,0 +1,110 @@
+import os
+import pandas as pd
+import pytest
+import ledger_cache
+from ledger_cache import LedgerCache
+
+SUFFIXES = [".parquet", ".pkl"] if ledger_cache.FILE_SUFFIX == ".parquet" else [".pkl"]
+
+
+@pytest.fixture(params=SUFFIXES)
+def suffix(request, monkeypatch):
+    monkeypatch.setattr(ledger_cache, "FILE_SUFFIX", request.param)
+    return request.param
+
+
+def frame(n):
+    return pd.DataFrame({"Contract Balance": [str(10 ** 30 + i) for i in range(n)], "Gas": range(n)},
+                        index=pd.Index([f"0x{i:04x}" for i in range(n)], name="Tx Hash"))
+
+
+# Backdates an entry's file, entries are evicted from disk oldest mtime first
+def age(cache, key, mtime):
+    os.utime(cache._paths(key)[0], (mtime, mtime))
+
+
+def test_round_trip(tmp_path, suffix):
+    cache = LedgerCache(tmp_path)
+    cache.put("segment-a", frame(3), {"prev": None, "depth": 0})
+    assert (tmp_path / f"segment-a{suffix}").exists()
+    df, meta = LedgerCache(tmp_path).get("segment-a")
+    pd.testing.assert_frame_equal(df, frame(3))
+    assert meta == {"prev": None, "depth": 0}
+    assert cache.get("segment-b") is None
+
+
+def test_entries_are_copies(tmp_path, suffix):
+    cache = LedgerCache(tmp_path)
+    df = frame(2)
+    cache.put("a", df)
+    df.loc["0x0000", "Gas"] = -1
+    cached, meta = cache.get("a")
+    cached.drop(index="0x0001", inplace=True)
+    meta["x"] = 1
+    assert cache.get("a")[0].equals(frame(2))
+    assert cache.get("a")[1] == {}
+
+
+def test_hot_tier_evicts_least_recently_used(tmp_path, suffix):
+    cache = LedgerCache(tmp_path, hot_items=2)
+    for key in "abc":
+        cache.put(key, frame(1))
+    assert list(cache.hot) == ["b", "c"]
+    cache.get("b")
+    cache.put("d", frame(1))
+    assert list(cache.hot) == ["b", "d"]
+    # evicted from memory only, still on disk
+    assert cache.get("a") is not None
+
+
+def test_disk_reads_are_promoted_to_the_hot_tier(tmp_path, suffix):
+    LedgerCache(tmp_path).put("a", frame(2))
+    cache = LedgerCache(tmp_path, hot_items=1)
+    assert not cache.hot
+    assert cache.get("a") is not None
+    assert list(cache.hot) == ["a"]
+    # served from memory from now on
+    os.remove(cache._paths("a")[0])
+    assert cache.get("a")[0].equals(frame(2))
+
+
+def test_disk_tier_evicts_least_recently_used(tmp_path, suffix):
+    cache = LedgerCache(tmp_path)
+    cache.put("a", frame(50))
+    size = cache.disk_bytes
+    cache.max_bytes = int(size * 3.5)
+    cache.put("b", frame(50))
+    cache.put("c", frame(50))
+    age(cache, "a", 1)
+    age(cache, "b", 2)
+    age(cache, "c", 3)
+    # reading "a" makes "b" the least recently used
+    cache.get("a")
+    cache.put("d", frame(50))
+    assert cache.get("b") is None
+    assert "b" not in cache.hot
+    assert not cache._paths("b")[1].exists()
+    assert all(cache.get(key) is not None for key in "acd")
+    assert cache.disk_bytes <= cache.max_bytes
+    assert cache.disk_bytes == LedgerCache(tmp_path).disk_bytes
+
+
+def test_unreadable_file_is_a_miss(tmp_path, suffix):
+    cache = LedgerCache(tmp_path)
+    cache.put("a", frame(2))
+    cache._paths("a")[0].write_bytes(b"not a frame")
+    assert LedgerCache(tmp_path).get("a") is None
+
+
+def test_files_of_the_other_format_are_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(ledger_cache, "FILE_SUFFIX", ".pkl")
+    LedgerCache(tmp_path).put("a", frame(2))
+    if ".parquet" in SUFFIXES:
+        monkeypatch.setattr(ledger_cache, "FILE_SUFFIX", ".parquet")
+        cache = LedgerCache(tmp_path)
+        assert cache.get("a") is None
+        # but still count towards the size limit and are cleared
+        assert cache.disk_bytes > 0
+        cache.clear()
+        assert cache.disk_bytes == 0
+        assert not list(tmp_path.iterdir())
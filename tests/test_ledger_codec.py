@@ -0,0 +1,56 @@
+import io
+import json
+import pandas as pd
+import pytest
+
+ledger_codec = pytest.importorskip("ledger_codec")
+if not ledger_codec.available:
+    pytest.skip("pyarrow is not installed", allow_module_level=True)
+import pyarrow.parquet as pq
+
+SEGMENT = {"format": "cc-ledger-segment", "version": 1, "prev": "QmPrev", "checkpoint": None, "depth": 3}
+
+
+def ledger():
+    df = pd.DataFrame({
+        "Tx Hash": ["0x01", "0x02", "0x03"],
+        # balances beyond float and int64 precision, as the app stores them
+        "Contract Balance": ["0", "123456789012345678901234567", str(10 ** 38 - 1)],
+        "From": ["0xAlice", "0xBob", "0xAlice"],
+        "To": ["0xCC", "0xCC", "0xCC"],
+        "Gas": [21000, 2 ** 40, 53000],
+        "Timestamp": pd.to_datetime(["2022-01-01 10:00:00", "2022-01-01 10:00:01", "2022-03-05 23:59:59"]),
+    })
+    return df.set_index("Tx Hash")
+
+
+def test_round_trip_keeps_every_digit():
+    df = ledger()
+    data = ledger_codec.encode(df, SEGMENT)
+    assert ledger_codec.is_binary(data)
+    header, decoded = ledger_codec.decode(data)
+    assert header == SEGMENT
+    assert decoded["Contract Balance"].tolist() == df["Contract Balance"].tolist()
+    pd.testing.assert_frame_equal(decoded, df, check_dtype=False)
+    assert str(decoded["Timestamp"].dtype) == "datetime64[ns]"
+
+
+def test_timezone_aware_timestamps_are_stored_as_utc():
+    df = ledger()
+    df["Timestamp"] = df["Timestamp"].dt.tz_localize("UTC").dt.tz_convert("America/New_York")
+    _, decoded = ledger_codec.decode(ledger_codec.encode(df, SEGMENT))
+    assert decoded["Timestamp"].tolist() == ledger()["Timestamp"].tolist()
+
+
+def test_json_segments_are_not_binary():
+    assert not ledger_codec.is_binary(json.dumps({"format": "cc-ledger-segment"}).encode())
+
+
+def test_unknown_codec_version_is_rejected():
+    table = pq.read_table(io.BytesIO(ledger_codec.encode(ledger(), SEGMENT)))
+    header = dict(SEGMENT, codec_version=ledger_codec.CODEC_VERSION + 1)
+    table = table.replace_schema_metadata({ledger_codec.METADATA_KEY: json.dumps(header).encode()})
+    sink = io.BytesIO()
+    pq.write_table(table, sink)
+    with pytest.raises(ValueError):
+        ledger_codec.decode(sink.getvalue())
@@ -0,0 +1,203 @@
+import json
+import datetime
+from types import SimpleNamespace
+import pytest
+import ipfs
+from ledger_publisher import LedgerPublisher
+from tx_pipeline import LedgerRow
+
+
+class Call:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def call(self):
+        return self.fn()
+
+    def transact(self, params):
+        return self.fn()
+
+
+# Stand-in for the CommunityConnect contract: getIPFSHash / updateIPFSHash, and
+# anchors that are mined when their receipt is awaited
+class FakeContract:
+    def __init__(self):
+        self.head = ''
+        self.anchors = []
+        self.sent = {}
+        # set to make the next receipt wait raise
+        self.fail_next_receipt = None
+        self.functions = SimpleNamespace(getIPFSHash=lambda: Call(lambda: self.head), updateIPFSHash=self._update)
+        self.web3 = SimpleNamespace(eth=SimpleNamespace(wait_for_transaction_receipt=self._receipt))
+
+    def _update(self, cid):
+        def send():
+            tx_hash = bytes([len(self.sent)]) * 32
+            self.sent[tx_hash] = cid
+            self.anchors.append(cid)
+            return tx_hash
+        return Call(send)
+
+    def _receipt(self, tx_hash, timeout):
+        if self.fail_next_receipt is not None:
+            error, self.fail_next_receipt = self.fail_next_receipt, None
+            raise error
+        self.head = self.sent[tx_hash]
+        return {"status": 1}
+
+
+@pytest.fixture
+def pins(monkeypatch):
+    monkeypatch.setattr(ipfs, "_published", set())
+    pinned = []
+
+    # pins a segment of the unpublished rows chained onto the current head
+    def pin_ledger_update(contract, frame):
+        new_df = frame[~frame.index.isin(ipfs._published)]
+        if new_df.empty:
+            return None, new_df
+        pinned.append((contract.head, list(new_df.index)))
+        return f"cid{len(pinned)}", new_df
+
+    monkeypatch.setattr(ipfs, "pin_ledger_update", pin_ledger_update)
+    return pinned
+
+
+def row(i):
+    return LedgerRow(str(i * 10 ** 18), f"0x{i:04x}", "0xAlice", "0xCC", 21000, datetime.datetime(2022, 1, 1, 0, 0, i))
+
+
+def publisher(contract, path):
+    return LedgerPublisher(contract, "0xNonprofit", path=path, autoflush=False)
+
+
+# Simulates the process dying: nothing is flushed and the journal is left as is
+def crash(publisher):
+    publisher.closed = True
+    publisher.journal.close()
+
+
+def test_flush_pins_once_and_anchors_once(tmp_path, pins):
+    contract = FakeContract()
+    first = publisher(contract, tmp_path / "journal.jsonl")
+    first.add([row(1), row(2)])
+    assert first.flush() is not None
+    assert pins == [('', ['0x0002', '0x0001'])]
+    assert contract.anchors == ["cid1"] and contract.head == "cid1"
+    assert first.flushes == 1 and not first.buffer
+    assert first.flush() is None
+    assert len(pins) == 1 and first.flushes == 1
+    first.close()
+
+
+def test_crash_after_pin_before_anchor_does_not_pin_again(tmp_path, pins, monkeypatch):
+    contract = FakeContract()
+    path = tmp_path / "journal.jsonl"
+    first = publisher(contract, path)
+    first.add([row(1), row(2)])
+
+    def die(*args):
+        raise SystemExit("killed")
+
+    monkeypatch.setattr(ipfs, "anchor_ledger_update", die)
+    with pytest.raises(SystemExit):
+        first.flush()
+    crash(first)
+    monkeypatch.undo()
+    monkeypatch.setattr(ipfs, "_published", set())
+    monkeypatch.setattr(ipfs, "pin_ledger_update", lambda *args: pytest.fail("pinned twice"))
+
+    second = publisher(contract, path)
+    assert list(second.buffer) == ['0x0001', '0x0002']
+    assert second.flush() is not None
+    assert contract.anchors == ["cid1"] and contract.head == "cid1"
+    assert not second.buffer and second.flushes == 1
+    assert {'0x0001', '0x0002'} <= ipfs._published
+    second.close()
+
+
+def test_crash_after_the_anchor_was_mined_drops_the_rows(tmp_path, pins):
+    contract = FakeContract()
+    path = tmp_path / "journal.jsonl"
+    first = publisher(contract, path)
+    first.add([row(1)])
+    contract.fail_next_receipt = TimeoutError("receipt wait timed out")
+    with pytest.raises(TimeoutError):
+        first.flush()
+    crash(first)
+    # the anchor is mined while the process is down
+    contract.head = "cid1"
+
+    second = publisher(contract, path)
+    assert not second.buffer
+    assert second.flush() is None
+    assert contract.anchors == ["cid1"] and len(pins) == 1
+    second.close()
+
+
+def test_failed_anchor_is_retried_by_the_next_flush(tmp_path, pins):
+    contract = FakeContract()
+    first = publisher(contract, tmp_path / "journal.jsonl")
+    first.add([row(1), row(2)])
+    contract.fail_next_receipt = RuntimeError("ledger anchor reverted")
+    with pytest.raises(RuntimeError):
+        first.flush()
+    assert list(first.buffer) == ['0x0001', '0x0002']
+    assert first.flushes == 0 and contract.head == ''
+
+    first.add([row(3)])
+    assert first.flush() is not None
+    # cid1 is anchored again as pinned, only the new row gets a new segment
+    assert pins == [('', ['0x0002', '0x0001']), ('cid1', ['0x0003'])]
+    assert contract.anchors == ["cid1", "cid1", "cid2"] and contract.head == "cid2"
+    assert not first.buffer and first.flushes == 2
+    first.close()
+
+
+def test_pinned_segment_is_dropped_when_the_head_moved_on(tmp_path, pins):
+    contract = FakeContract()
+    first = publisher(contract, tmp_path / "journal.jsonl")
+    first.add([row(1)])
+    contract.fail_next_receipt = RuntimeError("ledger anchor reverted")
+    with pytest.raises(RuntimeError):
+        first.flush()
+    # another writer moved the head, cid1 no longer chains onto it
+    contract.head = "cidOther"
+    first.flush()
+    assert pins == [('', ['0x0001']), ('cidOther', ['0x0001'])]
+    assert contract.head == "cid2" and not first.buffer
+    first.close()
+
+
+def test_truncated_last_journal_line_is_ignored(tmp_path, pins):
+    contract = FakeContract()
+    path = tmp_path / "journal.jsonl"
+    first = publisher(contract, path)
+    first.add([row(1), row(2)])
+    crash(first)
+    with open(path, "a") as f:
+        f.write(json.dumps({"row": {"contract_balance": "3"}})[:15])
+
+    second = publisher(contract, path)
+    assert list(second.buffer) == ['0x0001', '0x0002']
+    # the torn line is gone from the rewritten journal
+    with open(path) as f:
+        assert [json.loads(line)["row"]["tx_hash"] for line in f] == ['0x0001', '0x0002']
+    assert second.flush() is not None
+    assert pins == [('', ['0x0002', '0x0001'])]
+    second.close()
+
+
+def test_close_reports_a_failed_final_flush(tmp_path, pins):
+    contract = FakeContract()
+    path = tmp_path / "journal.jsonl"
+    first = publisher(contract, path)
+    first.add([row(1)])
+    contract.fail_next_receipt = RuntimeError("ledger anchor reverted")
+    first.close()
+    assert isinstance(first.last_error, RuntimeError)
+    # the rows and the pinned segment are still journaled for the next start
+    with open(path) as f:
+        entries = [json.loads(line) for line in f]
+    assert entries[0]["row"]["tx_hash"] == '0x0001'
+    assert entries[1] == {"pinned": "cid1", "prev": "", "rows": ['0x0001']}
@@ -0,0 +1,96 @@
+import json
+import pytest
+from metrics import Histogram, Registry, web3_middleware
+
+
+def test_histogram_buckets_are_upper_bounds():
+    h = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 1.0, 3.0):
+        h.observe(value)
+    # a value equal to a bound falls in that bucket (Prometheus "le")
+    assert h.counts == [2, 2, 1]
+    assert (h.count, h.sum) == (5, pytest.approx(4.65))
+
+
+def test_histogram_quantiles():
+    h = Histogram(buckets=(0.1, 1.0))
+    assert h.quantile(0.5) is None
+    for value in [0.05] * 6 + [0.5] * 3 + [5.0]:
+        h.observe(value)
+    assert h.quantile(0.5) == 0.1
+    assert h.quantile(0.9) == 1.0
+    # past the last bucket there is no upper bound to report
+    assert h.quantile(0.99) is None
+
+
+def test_span_times_and_counts_failures():
+    registry = Registry()
+    with registry.span("ipfs_pin", format="json"):
+        pass
+    with pytest.raises(KeyError):
+        with registry.span("ipfs_pin", format="json"):
+            raise KeyError("IpfsHash")
+    rows = {(row["metric"], tuple(sorted(row["labels"].items()))): row for row in registry.snapshot()}
+    stage = rows[("cc_stage_seconds", (("format", "json"), ("stage", "ipfs_pin")))]
+    assert stage["type"] == "histogram" and stage["count"] == 2
+    errors = rows[("cc_stage_errors_total", (("error", "KeyError"), ("format", "json"), ("stage", "ipfs_pin")))]
+    assert errors["value"] == 1
+    recent = registry.recent_spans()
+    assert [span["error"] for span in recent] == ["KeyError", None]
+
+
+def test_prometheus_text():
+    registry = Registry()
+    registry.inc("cache_total", cache="ledger", result="hit")
+    registry.inc("cache_total", 2, cache="ledger", result="miss")
+    registry.inc("rpc_errors_total", method='eth_"call"\n')
+    registry.observe("stage_seconds", 0.003, stage="rpc")
+    registry.observe("stage_seconds", 0.2, stage="rpc")
+    registry.observe("stage_seconds", 100, stage="rpc")
+    lines = registry.prometheus_text().splitlines()
+    assert lines[:5] == [
+        "# TYPE cc_cache_total counter",
+        'cc_cache_total{cache="ledger",result="hit"} 1',
+        'cc_cache_total{cache="ledger",result="miss"} 2',
+        "# TYPE cc_rpc_errors_total counter",
+        'cc_rpc_errors_total{method="eth_\\"call\\"\\n"} 1',
+    ]
+    assert lines[5] == "# TYPE cc_stage_seconds histogram"
+    buckets = [line for line in lines if line.startswith("cc_stage_seconds_bucket")]
+    # cumulative counts, one line per bound plus +Inf
+    assert buckets[0] == 'cc_stage_seconds_bucket{stage="rpc",le="0.005"} 1'
+    assert 'cc_stage_seconds_bucket{stage="rpc",le="0.25"} 2' in buckets
+    assert buckets[-2] == 'cc_stage_seconds_bucket{stage="rpc",le="60.0"} 2'
+    assert buckets[-1] == 'cc_stage_seconds_bucket{stage="rpc",le="+Inf"} 3'
+    assert lines[-2:] == ['cc_stage_seconds_sum{stage="rpc"} 100.203', 'cc_stage_seconds_count{stage="rpc"} 3']
+
+
+def test_jsonl_export_appends_a_snapshot(tmp_path):
+    registry = Registry()
+    path = tmp_path / "metrics.jsonl"
+    registry.inc("ledger_rows_published_total", 3)
+    registry.observe("stage_seconds", 0.02, stage="ledger_flush")
+    registry.write_jsonl(path)
+    registry.inc("ledger_rows_published_total", 2)
+    registry.write_jsonl(path)
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    assert len(rows) == 4
+    counters = [row for row in rows if row["type"] == "counter"]
+    assert [row["value"] for row in counters] == [3, 5]
+    histogram = rows[1]
+    assert (histogram["metric"], histogram["labels"], histogram["count"]) == ("cc_stage_seconds", {"stage": "ledger_flush"}, 1)
+    assert histogram["p50"] == 0.025
+    assert counters[0]["at"] <= counters[1]["at"]
+
+
+def test_web3_middleware_counts_rpc_errors(monkeypatch):
+    registry = Registry()
+    monkeypatch.setattr("metrics.span", registry.span)
+    monkeypatch.setattr("metrics.inc", registry.inc)
+    responses = iter([{"result": "0x1"}, {"error": {"message": "execution reverted"}}])
+    middleware = web3_middleware(lambda method, params: next(responses), None)
+    middleware("eth_call", [])
+    middleware("eth_call", [])
+    rows = registry.snapshot()
+    assert [row["value"] for row in rows if row["metric"] == "cc_rpc_errors_total"] == [1]
+    assert [row["count"] for row in rows if row["metric"] == "cc_stage_seconds"] == [2]
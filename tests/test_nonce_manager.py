@@ -0,0 +1,136 @@
+import threading
+from types import SimpleNamespace
+import pytest
+from nonce_manager import NonceManager
+
+
+# Stub web3: a pending transaction count and a node that accepts or rejects
+# raw transactions as told
+class StubEth:
+    gas_price = 10
+
+    def __init__(self, pending=5):
+        self.pending = pending
+        self.count_calls = 0
+        self.sent = []
+        # exceptions raised by the next sendRawTransaction calls, in order
+        self.errors = []
+        self.account = SimpleNamespace(signTransaction=self._sign)
+
+    def get_transaction_count(self, address, block):
+        self.count_calls += 1
+        return self.pending
+
+    def _sign(self, tx, private_key):
+        raw = f"{tx['from']}:{tx['nonce']}".encode()
+        return SimpleNamespace(rawTransaction=raw, hash=b"hash:" + raw)
+
+    def sendRawTransaction(self, raw):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(raw)
+        return b"hash:" + raw
+
+
+class StubFunction:
+    def __init__(self, fail_build=None):
+        self.fail_build = fail_build
+
+    def buildTransaction(self, payload):
+        if self.fail_build is not None:
+            raise self.fail_build
+        return dict(payload)
+
+
+@pytest.fixture
+def eth():
+    return StubEth()
+
+
+@pytest.fixture
+def nonces(eth):
+    return NonceManager(SimpleNamespace(eth=eth))
+
+
+def test_concurrent_reserve_hands_out_each_nonce_once(nonces, eth):
+    reserved = []
+    lock = threading.Lock()
+
+    def reserve():
+        for _ in range(200):
+            nonce = nonces.reserve("0xSupplier")
+            with lock:
+                reserved.append(nonce)
+
+    threads = [threading.Thread(target=reserve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(reserved) == list(range(5, 5 + 1600))
+    assert eth.count_calls == 1
+
+
+def test_send_uses_consecutive_nonces(nonces, eth):
+    assert nonces.send_transaction(StubFunction(), "0xSupplier", "key") == b"hash:0xSupplier:5"
+    assert nonces.send_transaction(StubFunction(), "0xSupplier", "key") == b"hash:0xSupplier:6"
+    assert eth.sent == [b"0xSupplier:5", b"0xSupplier:6"]
+
+
+def test_already_known_returns_the_hash_without_a_new_nonce(nonces, eth):
+    eth.errors = [ValueError({"message": "already known"})]
+    assert nonces.send_transaction(StubFunction(), "0xSupplier", "key") == b"hash:0xSupplier:5"
+    assert nonces.next_nonce["0xSupplier"] == 6
+    assert eth.count_calls == 1
+
+
+def test_nonce_error_resyncs_and_retries(nonces, eth):
+    nonces.reserve("0xSupplier")
+    # another wallet used nonces 5 to 8 meanwhile
+    eth.pending = 9
+    eth.errors = [ValueError({"message": "nonce too low"})]
+    assert nonces.send_transaction(StubFunction(), "0xSupplier", "key") == b"hash:0xSupplier:9"
+    assert eth.sent == [b"0xSupplier:9"]
+    assert nonces.next_nonce["0xSupplier"] == 10
+
+
+def test_nonce_error_on_the_last_attempt_is_raised(nonces, eth):
+    eth.errors = [ValueError({"message": "nonce too low"})] * 2
+    with pytest.raises(ValueError):
+        nonces.send_transaction(StubFunction(), "0xSupplier", "key", retries=1)
+    assert eth.count_calls == 3
+
+
+def test_failed_build_hands_back_only_the_latest_nonce(nonces, eth):
+    with pytest.raises(ValueError):
+        nonces.send_transaction(StubFunction(ValueError("execution reverted")), "0xSupplier", "key")
+    # nothing else was reserved, the next transaction reuses nonce 5
+    assert nonces.next_nonce["0xSupplier"] == 5
+    assert eth.count_calls == 1
+
+    held = nonces.reserve("0xSupplier")
+    failing = nonces.reserve("0xSupplier")
+    later = nonces.reserve("0xSupplier")
+    assert (held, failing, later) == (5, 6, 7)
+    # a failure on 6 cannot give it back, 7 is already handed out
+    assert not nonces.release("0xSupplier", failing)
+    assert nonces.release("0xSupplier", later)
+    assert nonces.reserve("0xSupplier") == 7
+
+
+def test_other_send_errors_do_not_resync(nonces, eth):
+    other = nonces.reserve("0xSupplier")
+    eth.errors = [ValueError({"message": "insufficient funds for gas * price + value"})]
+    with pytest.raises(ValueError):
+        nonces.send_transaction(StubFunction(), "0xSupplier", "key")
+    assert eth.count_calls == 1
+    # the failed nonce (6) is handed back, the one reserved before it stays taken
+    assert other == 5
+    assert nonces.reserve("0xSupplier") == 6
+
+
+def test_node_signed_transactions(nonces, eth):
+    sent = []
+    function = SimpleNamespace(transact=lambda payload: sent.append(payload) or f"tx{payload['nonce']}")
+    assert nonces.send_transaction(function, "0xOwner") == "tx5"
+    assert sent == [{"from": "0xOwner", "nonce": 5, "gasPrice": 10}]
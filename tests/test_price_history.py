@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+import pytest
+from price_history import FixtureHistory, PriceHistory
+
+
+@pytest.fixture
+def closes_csv(tmp_path):
+    path = tmp_path / "closes.csv"
+    path.write_text("date,close\n2022-01-01,3700\n2022-01-02,3800\n2022-01-04,3750\n")
+    return path
+
+
+def test_fixture_history_returns_closes_from_start(closes_csv):
+    assert FixtureHistory(closes_csv)("2022-01-02") == {"2022-01-02": 3800.0, "2022-01-04": 3750.0}
+
+
+def test_as_of_uses_the_last_close_known_at_the_time(closes_csv, tmp_path, clock):
+    history = PriceHistory(FixtureHistory(closes_csv), path=tmp_path / "history.db", clock=clock)
+    timestamps = pd.to_datetime([
+        # during the first stored day its close is not known yet
+        "2021-12-31 23:00", "2022-01-01 00:00", "2022-01-01 23:59",
+        "2022-01-02 00:00", "2022-01-02 12:00", "2022-01-03 18:00", "2022-01-04 10:00", "2022-01-05 00:00",
+    ])
+    prices = history.as_of(timestamps)
+    assert np.isnan(prices[:3]).all()
+    # 2022-01-03 has no close, the 4th is still valued at the 2nd's
+    assert prices[3:].tolist() == [3700.0, 3700.0, 3800.0, 3800.0, 3750.0]
+
+
+def test_as_of_never_uses_a_close_from_later_the_same_day(closes_csv, tmp_path, clock):
+    history = PriceHistory(FixtureHistory(closes_csv), path=tmp_path / "history.db", clock=clock)
+    moments = pd.date_range("2022-01-01", "2022-01-06", freq="37min")
+    days, _ = history.arrays()
+    prices = history.as_of(moments)
+    for moment, price in zip(moments, prices):
+        known = [day for day in days if day + np.timedelta64(1, "D") <= moment.to_datetime64()]
+        assert np.isnan(price) if not known else price == history.series()[known[-1]]
+
+
+def test_value_ledger_prices_the_balance(closes_csv, tmp_path, clock):
+    history = PriceHistory(FixtureHistory(closes_csv), path=tmp_path / "history.db", clock=clock)
+    df = pd.DataFrame({
+        "Contract Balance": [str(2 * 10 ** 18), str(10 ** 17)],
+        "Timestamp": pd.to_datetime(["2022-01-02 10:00", "2022-01-05 10:00"]),
+    }, index=pd.Index(["0x01", "0x02"], name="Tx Hash"))
+    valued = history.value_ledger(df)
+    assert valued["ETH-USD"].tolist() == [3700.0, 3750.0]
+    assert valued["Contract Balance (USD)"].tolist() == pytest.approx([7400.0, 375.0])
+
+
+def test_refresh_only_downloads_from_the_last_stored_day(closes_csv, tmp_path, clock, counting):
+    source = counting(FixtureHistory(closes_csv))
+    history = PriceHistory(source, path=tmp_path / "history.db", refresh_seconds=60, clock=clock)
+    history.arrays()
+    history.arrays()
+    assert len(source.calls) == 1
+
+    closes_csv.write_text(closes_csv.read_text() + "2022-01-05,3900\n")
+    clock.now = 61
+    days, closes = history.arrays()
+    assert source.calls[-1] == "2022-01-04"
+    assert closes.tolist() == [3700.0, 3800.0, 3750.0, 3900.0]
@@ -0,0 +1,33 @@
+import json
+from price_oracle import FixtureSource, PriceOracle
+
+
+def test_fixture_source_reads_a_bare_number_or_an_object(tmp_path):
+    bare = tmp_path / "bare.json"
+    bare.write_text("1234.5")
+    keyed = tmp_path / "keyed.json"
+    keyed.write_text(json.dumps({"ETH-USD": 2000}))
+    assert FixtureSource(bare)() == 1234.5
+    assert FixtureSource(keyed)() == 2000.0
+
+
+def test_oracle_serves_the_fixture_within_the_ttl(tmp_path, clock):
+    path = tmp_path / "price.json"
+    path.write_text("1000")
+    oracle = PriceOracle(FixtureSource(path), ttl=60, stale=0, clock=clock)
+    assert oracle.get_price() == 1000.0
+    path.write_text("1100")
+    clock.now = 59
+    assert oracle.get_price() == 1000.0
+    clock.now = 61
+    assert oracle.get_price() == 1100.0
+
+
+def test_oracle_keeps_the_last_price_when_the_fixture_breaks(tmp_path, clock):
+    path = tmp_path / "price.json"
+    path.write_text("1000")
+    oracle = PriceOracle(FixtureSource(path), ttl=60, stale=0, clock=clock)
+    assert oracle.get_price() == 1000.0
+    path.unlink()
+    clock.now = 120
+    assert oracle.get_price() == 1000.0
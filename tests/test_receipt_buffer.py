@@ -0,0 +1,117 @@
+import time
+import datetime
+import threading
+from singleton_requests import ReceiptBuffer
+
+
+def receipt(i):
+    return {
+        "contract_balance": str(i * 10 ** 18),
+        "transactionHash": f"0x{i:04x}",
+        "from": f"0xSender{i}",
+        "to": "0xCC",
+        "gasUsed": 21000 + i,
+        "timestamp": datetime.datetime(2022, 1, 1) + datetime.timedelta(seconds=i),
+    }
+
+
+def fill(buffer, rows):
+    for i in rows:
+        buffer.append(receipt(i))
+
+
+def test_wraparound_keeps_the_newest_rows_newest_first():
+    buffer = ReceiptBuffer(capacity=4)
+    fill(buffer, range(10))
+    assert len(buffer) == 4
+    balances, tx_hashes, senders, recipients, gas, timestamps = buffer.views()
+    assert tx_hashes == ["0x0009", "0x0008", "0x0007", "0x0006"]
+    assert gas == [21009, 21008, 21007, 21006]
+    assert senders == [f"0xSender{i}" for i in (9, 8, 7, 6)]
+    assert buffer.views(limit=2)[1] == ["0x0009", "0x0008"]
+
+
+def test_frame_since_returns_only_newer_rows():
+    buffer = ReceiptBuffer(capacity=4)
+    fill(buffer, range(3))
+    df, seq = buffer.frame()
+    assert list(df.index) == ["0x0002", "0x0001", "0x0000"]
+    assert seq == 3
+
+    fill(buffer, range(3, 5))
+    df, seq = buffer.frame(since=seq)
+    assert list(df.index) == ["0x0004", "0x0003"]
+    assert df["Contract Balance"].tolist() == [str(4 * 10 ** 18), str(3 * 10 ** 18)]
+    assert df["Timestamp"].tolist() == [datetime.datetime(2022, 1, 1, 0, 0, 4), datetime.datetime(2022, 1, 1, 0, 0, 3)]
+    assert seq == 5
+
+    df, seq = buffer.frame(since=seq)
+    assert df.empty and seq == 5
+
+
+def test_frame_since_further_back_than_the_buffer():
+    buffer = ReceiptBuffer(capacity=4)
+    fill(buffer, range(10))
+    df, _ = buffer.frame(since=2)
+    assert list(df.index) == ["0x0009", "0x0008", "0x0007", "0x0006"]
+    df, _ = buffer.frame(since=2, limit=3)
+    assert list(df.index) == ["0x0009", "0x0008", "0x0007"]
+
+
+def test_reads_while_writing_are_consistent():
+    # rows are written column by column, a torn read would mix two rows
+    buffer = ReceiptBuffer(capacity=8)
+    fill(buffer, range(8))
+    done = threading.Event()
+
+    # hand the GIL to the writer in the middle of every read
+    class Yielding(list):
+        def __getitem__(self, i):
+            time.sleep(0)
+            return list.__getitem__(self, i)
+
+    buffer.tx_hashes = Yielding(buffer.tx_hashes)
+
+    def write():
+        i = 8
+        while not done.is_set():
+            buffer.append(receipt(i))
+            i += 1
+            time.sleep(0)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(200):
+            balances, tx_hashes, senders, recipients, gas, timestamps = buffer.views()
+            numbers = [int(tx_hash, 16) for tx_hash in tx_hashes]
+            assert len(numbers) == 8
+            assert numbers == list(range(numbers[0], numbers[0] - 8, -1))
+            assert gas == [21000 + n for n in numbers]
+            assert senders == [f"0xSender{n}" for n in numbers]
+            assert balances == [str(n * 10 ** 18) for n in numbers]
+    finally:
+        done.set()
+        writer.join()
+
+
+def test_read_falls_back_to_the_lock_when_lapped():
+    buffer = ReceiptBuffer(capacity=4)
+    fill(buffer, range(4))
+    column = buffer.tx_hashes
+    appended = []
+
+    # every lock-free read of the full buffer is lapped by an append
+    class Lapping(list):
+        def __getitem__(self, i):
+            if buffer.lock.acquire(blocking=False):
+                buffer.lock.release()
+                if len(appended) < 10:
+                    appended.append(len(appended))
+                    buffer.append(receipt(100 + len(appended)))
+            return list.__getitem__(self, i)
+
+    buffer.tx_hashes = Lapping(column)
+    tx_hashes = buffer.views()[1]
+    assert len(tx_hashes) == 4
+    assert [int(tx_hash, 16) for tx_hash in tx_hashes] == list(range(int(tx_hashes[0], 16), int(tx_hashes[0], 16) - 4, -1))
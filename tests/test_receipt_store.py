@@ -0,0 +1,75 @@
+import datetime
+import pytest
+from receipt_store import ReceiptStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReceiptStore(tmp_path / "receipts.db")
+    store.add_many(
+        {
+            "transactionHash": f"0x{i:04x}",
+            "contract_balance": str(i * 10 ** 18),
+            "from": "0xAlice" if i % 2 else "0xBob",
+            "to": "0xCC",
+            # repeated gas values and timestamps, so ties are broken by tx hash
+            "gasUsed": 21000 + (i % 5) * 1000,
+            "timestamp": datetime.datetime(2022, 1, 1) + datetime.timedelta(minutes=i // 3),
+        }
+        for i in range(47)
+    )
+    yield store
+    store.close()
+
+
+def pages(store, limit, **kwargs):
+    cursor, result = None, []
+    while True:
+        df, cursor = store.query(limit=limit, cursor=cursor, **kwargs)
+        assert len(df) <= limit
+        result.append(df)
+        if cursor is None:
+            return result
+
+
+@pytest.mark.parametrize("sort", ["timestamp", "gas"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_cursor_walks_every_row_once_in_order(store, sort, descending):
+    walked = pages(store, 10, sort=sort, descending=descending)
+    assert [len(df) for df in walked] == [10, 10, 10, 10, 7]
+    tx_hashes = [tx_hash for df in walked for tx_hash in df.index]
+    assert len(set(tx_hashes)) == 47
+
+    everything, cursor = store.query(limit=100, sort=sort, descending=descending)
+    assert cursor is None
+    assert tx_hashes == list(everything.index)
+    column = {"timestamp": "Timestamp", "gas": "Gas"}[sort]
+    keys = list(zip(everything[column], everything.index))
+    assert keys == sorted(keys, reverse=descending)
+
+
+def test_last_full_page_has_no_cursor(store):
+    df, cursor = store.query(limit=47)
+    assert len(df) == 47
+    assert cursor is None
+
+
+def test_cursor_with_filters(store):
+    walked = pages(store, 4, sort="gas", sender="0xalice")
+    rows = [row for df in walked for row in df.itertuples()]
+    assert len(rows) == store.count(sender="0xALICE") == 23
+    assert {row.From for row in rows} == {"0xAlice"}
+
+
+def test_unknown_sort_column(store):
+    with pytest.raises(ValueError):
+        store.query(sort="sender")
+
+
+def test_excluded_tx_hashes_are_left_out(store):
+    exclude = {f"0x{i:04x}" for i in range(0, 47, 2)}
+    walked = pages(store, 10, exclude=exclude)
+    tx_hashes = [tx_hash for df in walked for tx_hash in df.index]
+    assert sorted(tx_hashes) == [f"0x{i:04x}" for i in range(1, 47, 2)]
+    assert store.count(exclude=exclude, sender="0xAlice") == 23
+    assert store.count(exclude=[]) == 47
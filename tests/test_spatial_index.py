@@ -0,0 +1,75 @@
+import random
+import pytest
+from spatial_index import Site, SpatialIndex, haversine_km
+
+
+def brute_force(sites, latitude, longitude, k, product_type=None, max_km=None):
+    found = sorted(
+        (haversine_km(latitude, longitude, site.latitude, site.longitude), site.key)
+        for site in sites
+        if product_type is None or site.product_type == product_type
+    )
+    if max_km is not None:
+        found = [pair for pair in found if pair[0] <= max_km]
+    return found[:k]
+
+
+@pytest.fixture
+def sites():
+    rng = random.Random(3)
+    return [
+        Site(f"site:{i}", "product", f"owner{i}", rng.choice(["Food", "Diapers"]), f"site {i}",
+             40 + rng.uniform(-1, 1), -74 + rng.uniform(-1, 1), rng.randint(0, 3))
+        for i in range(400)
+    ]
+
+
+@pytest.fixture
+def index(sites):
+    index = SpatialIndex(cell_km=5)
+    for site in sites:
+        index.add(site)
+    return index
+
+
+@pytest.mark.parametrize("product_type", [None, "Food"])
+def test_nearest_matches_brute_force(index, sites, product_type):
+    rng = random.Random(11)
+    for _ in range(25):
+        latitude, longitude = 40 + rng.uniform(-1.5, 1.5), -74 + rng.uniform(-1.5, 1.5)
+        nearest = index.nearest(latitude, longitude, k=5, product_type=product_type)
+        expected = brute_force(sites, latitude, longitude, 5, product_type)
+        assert [(round(d, 9), site.key) for d, site in nearest] == [(round(d, 9), key) for d, key in expected]
+
+
+def test_nearest_far_from_every_site_terminates(index, sites):
+    # the query point lies thousands of rings away from the occupied cells
+    nearest = index.nearest(-33.9, 151.2, k=3)
+    assert [site.key for _, site in nearest] == [key for _, key in brute_force(sites, -33.9, 151.2, 3)]
+
+
+def test_nearest_returns_every_site_when_k_exceeds_the_index(index, sites):
+    assert len(index.nearest(40, -74, k=1000)) == len(sites)
+
+
+def test_nearest_stops_at_max_km(index, sites):
+    nearest = index.nearest(40, -74, k=50, max_km=10)
+    assert [site.key for _, site in nearest] == [key for _, key in brute_force(sites, 40, -74, 50, max_km=10)]
+    assert index.nearest(0, 0, k=5, max_km=100) == []
+
+
+def test_nearest_with_predicate_and_removals(index, sites):
+    for site in sites[:200]:
+        index.remove(site.key)
+    remaining = [site for site in sites[200:] if site.count > 0]
+    nearest = index.nearest(40.2, -73.9, k=4, predicate=lambda site: site.count > 0)
+    assert [site.key for _, site in nearest] == [key for _, key in brute_force(remaining, 40.2, -73.9, 4)]
+
+
+def test_nearest_on_an_empty_index():
+    assert SpatialIndex().nearest(40, -74) == []
+
+
+def test_within_matches_brute_force(index, sites):
+    found = index.within(40.1, -74.1, 15)
+    assert [site.key for _, site in found] == [key for _, key in brute_force(sites, 40.1, -74.1, len(sites), max_km=15)]
@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+import pytest
+from web3.exceptions import TransactionNotFound
+import tx_manager
+from tx_manager import TransactionManager, MINED, REVERTED, FAILED
+
+
+# Stand-in for the time module: sleeping advances the clock instantly
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+# Receipt source: a transaction is mined once `mined_after` seconds have passed
+# since it was first polled for
+class StubEth:
+    def __init__(self, clock, mined_after, status=1):
+        self.clock = clock
+        self.mined_after = mined_after
+        self.status = status
+        self.first_poll = {}
+        self.polls = 0
+
+    def get_transaction_receipt(self, tx_hash):
+        self.polls += 1
+        first = self.first_poll.setdefault(tx_hash, self.clock.now)
+        if self.clock.now - first < self.mined_after:
+            raise TransactionNotFound(f"{tx_hash} not mined")
+        return {"transactionHash": tx_hash, "status": self.status}
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(tx_manager, "time", fake)
+    return fake
+
+
+def manager(eth, **kwargs):
+    # one worker, so the shared fake clock moves for one transaction at a time
+    return TransactionManager(SimpleNamespace(eth=eth), max_workers=1, **kwargs)
+
+
+def test_track_runs_on_mined(fake_time):
+    eth = StubEth(fake_time, mined_after=0)
+    transactions = manager(eth)
+    handle = transactions.track("0x01", label="deposit", on_mined=lambda receipt: receipt["transactionHash"])
+    transactions.shutdown()
+    assert (handle.status, handle.tx_hash, handle.result) == (MINED, "0x01", "0x01")
+    assert transactions.statuses([handle.id, "unknown"]) == [handle]
+
+
+def test_poll_interval_backs_off_up_to_poll_max(fake_time):
+    eth = StubEth(fake_time, mined_after=10)
+    transactions = manager(eth, poll_min=0.2, poll_max=2.0)
+    handle = transactions.track("0x01")
+    transactions.shutdown()
+    assert handle.status == MINED
+    assert fake_time.sleeps[:4] == pytest.approx([0.2, 0.3, 0.45, 0.675])
+    assert max(fake_time.sleeps) == 2.0
+    assert sum(fake_time.sleeps) >= 10
+
+
+def test_first_poll_interval_follows_the_expected_wait(fake_time):
+    eth = StubEth(fake_time, mined_after=12)
+    transactions = manager(eth, poll_min=0.2, poll_max=5.0)
+    # the estimate from earlier, slow transactions
+    transactions.expected_wait = 8.0
+    handle = transactions.track("0x01")
+    transactions.shutdown()
+    assert handle.status == MINED
+    # the first poll is immediate, the next one half the expected wait later
+    assert fake_time.sleeps[:3] == pytest.approx([4.0, 5.0, 5.0])
+    assert eth.polls == len(fake_time.sleeps) + 1
+    # and the estimate moves towards this transaction's wait
+    assert transactions.expected_wait == pytest.approx(0.8 * 8.0 + 0.2 * sum(fake_time.sleeps))
+
+
+def test_timeout(fake_time):
+    eth = StubEth(fake_time, mined_after=float("inf"))
+    transactions = manager(eth, poll_max=1.0, timeout=30)
+    handle = transactions.track("0x01")
+    transactions.shutdown()
+    assert handle.status == FAILED
+    assert isinstance(handle.error, TimeoutError)
+    assert 30 < fake_time.now - 1000 <= 32
+
+
+def test_reverted_transactions_skip_on_mined(fake_time):
+    eth = StubEth(fake_time, mined_after=0, status=0)
+    transactions = manager(eth)
+    called = []
+    handle = transactions.track("0x01", on_mined=called.append)
+    transactions.shutdown()
+    assert handle.status == REVERTED
+    assert not called
+
+
+def test_submit_sends_on_a_worker(fake_time):
+    eth = StubEth(fake_time, mined_after=0)
+    transactions = manager(eth)
+
+    def fail():
+        raise ValueError("insufficient funds")
+
+    sent = transactions.submit(lambda: "0x02", label="fillRequest")
+    failed = transactions.submit(fail, label="fillRequest")
+    on_mined_fails = transactions.submit(lambda: "0x03", on_mined=lambda receipt: 1 / 0)
+    transactions.shutdown()
+    assert (sent.status, sent.tx_hash) == (MINED, "0x02")
+    assert failed.status == FAILED and str(failed.error) == "insufficient funds"
+    assert failed.tx_hash is None
+    assert on_mined_fails.status == FAILED and isinstance(on_mined_fails.error, ZeroDivisionError)
+    assert all(handle.finished_at is not None for handle in (sent, failed, on_mined_fails))
+
+
+def test_only_the_newest_handles_are_kept(fake_time):
+    eth = StubEth(fake_time, mined_after=0)
+    transactions = manager(eth, keep=2)
+    handles = [transactions.track(f"0x{i:02x}") for i in range(3)]
+    transactions.shutdown()
+    assert transactions.get(handles[0].id) is None
+    assert transactions.statuses([handle.id for handle in handles]) == handles[1:]
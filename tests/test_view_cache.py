@@ -0,0 +1,131 @@
+from types import SimpleNamespace
+from view_cache import ViewCache
+
+
+# Stub w3 whose chain head and balances are set by the test, counting RPCs
+class StubEth:
+    def __init__(self):
+        self.block_number_value = 100
+        self.balances = {}
+        self.rpcs = []
+
+    @property
+    def block_number(self):
+        self.rpcs.append("eth_blockNumber")
+        return self.block_number_value
+
+    def get_balance(self, address, block):
+        self.rpcs.append(("eth_getBalance", address, block))
+        return self.balances[address]
+
+
+# Stub bound contract function; `state` maps block number to the value a view
+# returns at that block
+class StubFunction:
+    def __init__(self, eth, state, fn_name="viewRequest", *args, **kwargs):
+        self.eth = eth
+        self.state = state
+        self.address = "0xCC"
+        self.fn_name = fn_name
+        self.args = args
+        self.kwargs = kwargs
+
+    def call(self, block_identifier):
+        self.eth.rpcs.append(("eth_call", self.fn_name, self.args, block_identifier))
+        return self.state[block_identifier]
+
+
+def make_views(clock, monkeypatch, **kwargs):
+    monkeypatch.setattr("view_cache.time.monotonic", clock)
+    eth = StubEth()
+    return ViewCache(SimpleNamespace(eth=eth), **kwargs), eth
+
+
+def test_balances_are_cached_per_block(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch, block_check_interval=1.0)
+    eth.balances = {"0xA": 5, "0xB": 7}
+    assert (views.balance("0xA"), views.balance("0xB"), views.balance("0xA")) == (5, 7, 5)
+    assert eth.rpcs == ["eth_blockNumber", ("eth_getBalance", "0xA", 100), ("eth_getBalance", "0xB", 100)]
+
+    eth.balances["0xA"] = 6
+    eth.block_number_value = 101
+    clock.now += 1.5
+    assert views.balance("0xA") == 6
+    assert eth.rpcs[-1] == ("eth_getBalance", "0xA", 101)
+
+
+def test_calls_are_keyed_on_function_and_arguments(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch)
+    state = {100: "request"}
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    views.call(StubFunction(eth, state, "viewRequest", 4))
+    views.call(StubFunction(eth, state, "getIPFSHash"))
+    assert [rpc for rpc in eth.rpcs if rpc[0] == "eth_call"] == [
+        ("eth_call", "viewRequest", (3,), 100),
+        ("eth_call", "viewRequest", (4,), 100),
+        ("eth_call", "getIPFSHash", (), 100),
+    ]
+    assert (views.hits, views.misses) == (1, 3)
+
+
+def test_a_new_block_drops_every_entry(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch, block_check_interval=1.0)
+    state = {100: "old", 101: "new"}
+    assert views.call(StubFunction(eth, state, "viewRequest", 3)) == "old"
+
+    # the head moved but the check is throttled: still served from block 100
+    eth.block_number_value = 101
+    clock.now += 0.5
+    assert views.call(StubFunction(eth, state, "viewRequest", 3)) == "old"
+    assert eth.rpcs.count("eth_blockNumber") == 1
+
+    clock.now += 0.6
+    assert views.block_number() == 101
+    assert eth.rpcs.count("eth_blockNumber") == 2
+    assert not views.entries
+    assert views.call(StubFunction(eth, state, "viewRequest", 3)) == "new"
+    assert eth.rpcs[-1] == ("eth_call", "viewRequest", (3,), 101)
+
+
+def test_same_block_keeps_entries(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch, block_check_interval=1.0)
+    state = {100: "request"}
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    # checked again once the interval is up, but the head has not moved
+    clock.now += 5
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    assert eth.rpcs.count("eth_blockNumber") == 2
+    assert [rpc[0] for rpc in eth.rpcs].count("eth_call") == 1
+
+
+def test_invalidate_forces_a_block_check(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch, block_check_interval=60)
+    state = {100: "request"}
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    views.invalidate()
+    views.call(StubFunction(eth, state, "viewRequest", 3))
+    assert eth.rpcs.count("eth_blockNumber") == 2
+    assert [rpc[0] for rpc in eth.rpcs].count("eth_call") == 2
+
+
+def test_results_from_a_stale_block_are_not_stored(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch)
+
+    # the cache is reset by another session while this call is in flight
+    class Racing(StubFunction):
+        def call(self, block_identifier):
+            views.invalidate()
+            return super().call(block_identifier)
+
+    assert views.call(Racing(eth, {100: "request"}, "viewRequest", 3)) == "request"
+    assert not views.entries
+
+
+def test_least_recently_used_entries_are_evicted(clock, monkeypatch):
+    views, eth = make_views(clock, monkeypatch, max_entries=2)
+    state = {100: "request"}
+    for request in (1, 2, 1, 3):
+        views.call(StubFunction(eth, state, "viewRequest", request))
+    assert [key[2] for key in views.entries] == ["(1,)", "(3,)"]
+    assert len(views.entries) == 2
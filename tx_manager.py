@@ -0,0 +1,117 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from web3.exceptions import TransactionNotFound
+import metrics
+
+# Background transaction manager.  Form handlers hand over a transaction and
+# get a handle back straight away; a worker pool polls for the receipt and runs
+# the post-mining work (ledger row, IPFS publish) so the Streamlit script thread
+# never blocks on a slow block.  Handles are kept in memory and the UI reads
+# their status on each rerun.
+
+PENDING = "pending"
+MINED = "mined"
+REVERTED = "reverted"
+FAILED = "failed"
+
+
+class TxHandle:
+    def __init__(self, label):
+        self.id = uuid.uuid4().hex
+        self.label = label
+        self.status = PENDING
+        self.tx_hash = None
+        self.receipt = None
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.finished_at = None
+
+    @property
+    def done(self):
+        return self.status != PENDING
+
+    def __repr__(self):
+        return f"TxHandle({self.label!r}, {self.status}, {self.tx_hash})"
+
+
+class TransactionManager:
+    def __init__(self, w3, max_workers=4, poll_min=0.2, poll_max=5.0, timeout=600, keep=1000):
+        self.w3 = w3
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tx-manager")
+        self.poll_min = poll_min
+        self.poll_max = poll_max
+        self.timeout = timeout
+        self.keep = keep
+        self.handles = OrderedDict()
+        self.lock = threading.Lock()
+        # running estimate of how long a transaction takes to be mined, used to
+        # decide when the first receipt poll is worth making
+        self.expected_wait = poll_min
+
+    # `send` is a callable returning a tx hash (for example a bound .transact),
+    # `on_mined` receives the receipt once it is mined and its return value is
+    # stored on the handle
+    def submit(self, send, label="", on_mined=None):
+        handle = TxHandle(label)
+        with self.lock:
+            self.handles[handle.id] = handle
+            while len(self.handles) > self.keep:
+                self.handles.popitem(last=False)
+        self.pool.submit(self._run, handle, send, on_mined)
+        return handle
+
+    # Same as submit for a transaction that has already been sent
+    def track(self, tx_hash, label="", on_mined=None):
+        return self.submit(lambda: tx_hash, label, on_mined)
+
+    def get(self, handle_id):
+        with self.lock:
+            return self.handles.get(handle_id)
+
+    def statuses(self, handle_ids):
+        with self.lock:
+            return [self.handles[i] for i in handle_ids if i in self.handles]
+
+    def _wait_for_receipt(self, tx_hash, started):
+        # read and updated by every worker
+        with self.lock:
+            expected_wait = self.expected_wait
+        delay = min(max(expected_wait / 2, self.poll_min), self.poll_max)
+        while True:
+            try:
+                return self.w3.eth.get_transaction_receipt(tx_hash)
+            except TransactionNotFound:
+                pass
+            if time.time() - started > self.timeout:
+                raise TimeoutError(f"transaction {tx_hash} not mined after {self.timeout}s")
+            time.sleep(delay)
+            delay = min(delay * 1.5, self.poll_max)
+
+    def _run(self, handle, send, on_mined):
+        try:
+            handle.tx_hash = send()
+            started = time.time()
+            with metrics.span("tx_wait", label=handle.label):
+                handle.receipt = self._wait_for_receipt(handle.tx_hash, started)
+            waited = time.time() - started
+            with self.lock:
+                self.expected_wait = 0.8 * self.expected_wait + 0.2 * waited
+            if handle.receipt.get("status", 1) == 0:
+                handle.status = REVERTED
+                return
+            if on_mined is not None:
+                with metrics.span("tx_on_mined", label=handle.label):
+                    handle.result = on_mined(handle.receipt)
+            handle.status = MINED
+        except Exception as e:
+            handle.error = e
+            handle.status = FAILED
+        finally:
+            handle.finished_at = time.time()
+
+    def shutdown(self, wait=True):
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,99 @@
+import datetime
+from typing import NamedTuple
+import pandas as pd
+import http_session
+import metrics
+from web3 import HTTPProvider
+
+import singleton_requests
+from singleton_requests import LEDGER_COLUMNS
+
+# Post-transaction stage shared by every workflow in app.py.  Once a receipt is
+# mined we need the contract balance and the block timestamp for the ledger
+# row; both are looked up at the receipt's own block and, on an HTTP provider,
+# sent to the node as one JSON-RPC batch instead of two round trips.
+
+
+class LedgerRow(NamedTuple):
+    contract_balance: str
+    tx_hash: str
+    sender: str
+    to: str
+    gas: int
+    timestamp: datetime.datetime
+
+    @classmethod
+    def from_receipt(cls, receipt, contract_balance, block_info):
+        return cls(*singleton_requests.convert_receipt(receipt, contract_balance, block_info).values())
+
+
+class RPCError(Exception):
+    pass
+
+
+def _rpc_batch(provider, calls):
+    payload = [
+        {"jsonrpc": "2.0", "id": i, "method": method, "params": params}
+        for i, (method, params) in enumerate(calls)
+    ]
+    with metrics.span("rpc", method="batch"):
+        # only read calls are batched, so a throttled batch is safe to resend
+        response = http_session.post_idempotent(provider.endpoint_uri, json=payload, **provider.get_request_kwargs())
+    response.raise_for_status()
+    replies = {reply["id"]: reply for reply in response.json()}
+    results = []
+    for i in range(len(calls)):
+        reply = replies.get(i)
+        if reply is None or "error" in reply:
+            raise RPCError(reply["error"] if reply else f"missing reply for call {i}")
+        results.append(reply["result"])
+    return results
+
+
+# Balance of `address` and the timestamp of `block_number`, as of that block
+def fetch_balance_and_block(w3, address, block_number):
+    if isinstance(w3.provider, HTTPProvider):
+        block_tag = hex(block_number)
+        balance, block = _rpc_batch(w3.provider, [
+            ("eth_getBalance", [address, block_tag]),
+            ("eth_getBlockByNumber", [block_tag, False]),
+        ])
+        return int(balance, 16), {"timestamp": int(block["timestamp"], 16)}
+
+    # providers that cannot batch (IPC, websocket, in-process testers)
+    balance = w3.eth.get_balance(address, block_identifier=block_number)
+    block_info = w3.eth.get_block(block_number)
+    return balance, block_info
+
+
+# Turns a mined receipt into a ledger row and records it in the session history
+def record_receipt(w3, receipt):
+    contract_balance, block_info = fetch_balance_and_block(w3, receipt["to"], receipt["blockNumber"])
+    with metrics.span("receipt_store"):
+        singleton_requests.add_block(receipt, contract_balance, block_info)
+    return LedgerRow.from_receipt(receipt, contract_balance, block_info)
+
+
+# Post-transaction step shared by every workflow, run once the receipt is mined:
+# records the ledger row and queues it with the write-behind ledger publisher,
+# which pins and anchors rows in batches.  The row is also folded into the
+# ledger analytics when given, named after the event the receipt emitted
+def publish_receipt(w3, receipt, publisher, analytics=None, indexer=None):
+    row = record_receipt(w3, receipt)
+    publisher.add([row])
+    frame = ledger_frame([row])
+    if analytics is not None:
+        analytics.add(
+            frame,
+            {row.tx_hash: indexer.receipt_event(receipt)} if indexer is not None else None,
+            {row.tx_hash: (receipt["blockNumber"], receipt["transactionIndex"])},
+        )
+    return frame
+
+
+# Ledger rows in the DataFrame layout used by the IPFS ledger
+def ledger_frame(rows):
+    block_chain_df = pd.DataFrame.from_records(list(rows), columns=LEDGER_COLUMNS)
+    block_chain_df.set_index('Tx Hash', inplace=True)
+    block_chain_df['Contract Balance'] = block_chain_df['Contract Balance'].astype('str')
+    return block_chain_df
@@ -0,0 +1,76 @@
+import time
+import threading
+from collections import OrderedDict
+
+# Read-through cache for contract view calls.  A view can only return something
+# new once a new block has been mined, so results are keyed by function,
+# arguments and block number, and the whole cache is dropped as soon as a cheap
+# eth_blockNumber check sees the chain move.  The block check itself is
+# throttled, so a burst of reruns costs at most one RPC per interval.
+
+BLOCK_CHECK_INTERVAL = 1.0
+
+
+class ViewCache:
+    def __init__(self, w3, block_check_interval=BLOCK_CHECK_INTERVAL, max_entries=1024):
+        self.w3 = w3
+        self.block_check_interval = block_check_interval
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.block = None
+        self.checked_at = 0
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def block_number(self):
+        with self.lock:
+            if self.block is not None and time.monotonic() - self.checked_at < self.block_check_interval:
+                return self.block
+        block = self.w3.eth.block_number
+        with self.lock:
+            self.checked_at = time.monotonic()
+            if block != self.block:
+                self.block = block
+                self.entries.clear()
+        return block
+
+    def invalidate(self):
+        with self.lock:
+            self.block = None
+            self.entries.clear()
+
+    # Result of `fetch(block)` for the current block, cached under `key`
+    def _get(self, key, fetch):
+        block = self.block_number()
+        with self.lock:
+            if key in self.entries:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            self.misses += 1
+
+        # pinned to the block the cache is keyed on, so an entry never mixes
+        # state from two different blocks
+        result = fetch(block)
+        with self.lock:
+            if block == self.block:
+                self.entries[key] = result
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return result
+
+    # Cached equivalent of `contract_function.call()`, e.g.
+    # views.call(contract.functions.viewRequest(3))
+    def call(self, contract_function):
+        key = (
+            contract_function.address,
+            contract_function.fn_name,
+            repr(contract_function.args),
+            repr(contract_function.kwargs),
+        )
+        return self._get(key, lambda block: contract_function.call(block_identifier=block))
+
+    # Cached equivalent of `w3.eth.get_balance(address)`
+    def balance(self, address):
+        return self._get(("balance", address), lambda block: self.w3.eth.get_balance(address, block))